@@ -0,0 +1,90 @@
+"""
+Benchmarks for the musubi app.
+
+Each module is a script run from the project root, for example::
+
+    python -m benchmarks.notification_fanout
+
+Most time one part of the app in-process; load_test drives the whole app
+over HTTP with concurrent virtual users.
+
+Benchmarks run against a throwaway test database, never db.sqlite3. Set
+BENCHMARK_LOAD_SCALE to fill it with generate_load_data first, so any
+benchmark runs next to production-sized tables::
+
+    BENCHMARK_LOAD_SCALE=1 python -m benchmarks.catalog_cache
+"""
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+
+def setup_django():
+    """Configure Django for a standalone benchmark script"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'musubiproject.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(name=None):
+    """
+    Create the test database for the duration of the block.
+
+    Pass a file name to put an SQLite test database somewhere other than
+    the TEST NAME in settings, e.g. in a temporary directory. With
+    BENCHMARK_LOAD_SCALE set (and optionally BENCHMARK_LOAD_SEED) it is
+    filled with that much synthetic load data first.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if name:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        scale = os.environ.get('BENCHMARK_LOAD_SCALE')
+        if scale:
+            load_data(float(scale), seed=int(os.environ.get('BENCHMARK_LOAD_SEED', 0)))
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def load_data(scale, seed=0, **options):
+    """Add synthetic data with generate_load_data, reporting progress on stderr"""
+    from musubiapp.loaddata import generate_load_data
+
+    started = time.perf_counter()
+    created = generate_load_data(seed=seed, scale=scale, log=lambda line: print(line, file=sys.stderr), **options)
+    print(f'Generated {sum(created.values())} rows in {time.perf_counter() - started:.0f}s', file=sys.stderr)
+    return created
+
+
+def measure(func, repeat):
+    """Call func repeat times and return the elapsed seconds of each call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, pct):
+    """Return the pct-th percentile of a list of timings"""
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[pct - 1]
+
+
+def print_table(headers, rows):
+    """Print rows as a plain text table"""
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,93 @@
+"""
+Request latency with and without the buffered activity log writer.
+
+Both ``customer_login`` and ``view_message`` write an ActivityLog row on every
+request. This runs each view through the test client with
+ACTIVITY_LOG_BUFFERED off and on and reports latency, sequential throughput
+and the number of ActivityLog INSERTs issued.
+
+    python -m benchmarks.activity_log_buffer [--requests 500]
+"""
+import argparse
+import time
+
+from benchmarks import percentile, print_table, setup_django, test_database
+
+
+def run(requests):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    from musubiapp.models import Customer, Message
+    from musubiapp.utils import flush_activity_log
+
+    user = User.objects.create_user(username='bench-customer', password='musubi-bench')
+    Customer.objects.create(user=user, role='customer')
+    admin = User.objects.create(username='bench-admin')
+    Customer.objects.create(user=admin, role='admin')
+    message = Message.objects.create(sender=admin, recipient=user, subject='Hello', message='Aloha')
+
+    login_client = Client()
+    message_client = Client()
+    message_client.force_login(user)
+    unread = Message.objects.filter(id=message.id)
+
+    def customer_login():
+        login_client.post('/login/', {'username': 'bench-customer', 'password': 'musubi-bench'})
+
+    def view_message():
+        message_client.get(f'/messages/view/{message.id}/')
+
+    def prepare_view_message():
+        unread.update(is_read=False)
+
+    scenarios = [
+        ('customer_login', customer_login, None),
+        ('view_message', view_message, prepare_view_message),
+    ]
+
+    rows = []
+    for name, request, prepare in scenarios:
+        for buffered in (False, True):
+            with override_settings(ACTIVITY_LOG_BUFFERED=buffered):
+                timings = []
+                inserts = 0
+                for _ in range(requests):
+                    if prepare:
+                        prepare()
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        request()
+                        timings.append(time.perf_counter() - start)
+                    inserts += sum('INSERT INTO "musubiapp_activitylog"' in q['sql'] for q in queries)
+                flush_activity_log()
+            rows.append([
+                name,
+                'on' if buffered else 'off',
+                f'{percentile(timings, 50) * 1000:.2f}',
+                f'{percentile(timings, 95) * 1000:.2f}',
+                f'{len(timings) / sum(timings):.0f}',
+                inserts,
+            ])
+
+    print_table(['view', 'buffered', 'p50 ms', 'p95 ms', 'req/s', 'log INSERTs'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per view and mode')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import override_settings
+
+    # Password hashing would otherwise dominate the login timings
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+        with test_database():
+            run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
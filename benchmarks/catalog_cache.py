@@ -0,0 +1,71 @@
+"""
+Home page and menu throughput with a cold and a warm catalog cache.
+
+Builds a catalog (200 products by default) and requests ``/`` and
+``/menu/`` through the test client, as a guest and as a signed-in
+customer. Cold runs clear the cache before every request, so each one
+queries the products and renders the whole grid; warm runs reuse the
+cached grid fragments (see musubiapp.catalog).
+
+    python -m benchmarks.catalog_cache [--products 200] [--repeat 200]
+"""
+import argparse
+import time
+
+from benchmarks import percentile, print_table, setup_django, test_database
+from benchmarks.product_search import build_catalog
+
+PAGES = [('/', 'guest'), ('/', 'customer'), ('/menu/', 'customer')]
+
+
+def run(products, repeat):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client
+
+    from musubiapp.models import Customer
+
+    build_catalog(products)
+    user = User.objects.create(username='bench-customer')
+    Customer.objects.create(user=user, role='customer')
+    clients = {'guest': Client(), 'customer': Client()}
+    clients['customer'].force_login(user)
+
+    rows = []
+    for path, viewer in PAGES:
+        client = clients[viewer]
+        for state in ('cold', 'warm'):
+            cache.clear()
+            client.get(path)
+            timings = []
+            for _ in range(repeat):
+                if state == 'cold':
+                    cache.clear()
+                start = time.perf_counter()
+                response = client.get(path)
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+            rows.append([
+                path,
+                viewer,
+                state,
+                f'{repeat / sum(timings):.0f}',
+                f'{percentile(timings, 50) * 1000:.2f}',
+                f'{percentile(timings, 95) * 1000:.2f}',
+            ])
+    print_table(['page', 'viewer', 'cache', 'req/s', 'p50 ms', 'p95 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=200, help='Active products in the catalog')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed requests per page and cache state')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.products, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
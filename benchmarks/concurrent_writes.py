@@ -0,0 +1,156 @@
+"""
+Concurrent checkouts and activity log writes under each database profile.
+
+Several worker processes each place orders for the same few products (so
+they contend for the same rows) and write an activity log entry after
+each, as the checkout view and its order_placed job do. Reports writes per
+second, p50/p95 latency and how many attempts failed with a database
+error, for:
+
+- sqlite-default: SQLite as Django sets it up, rollback journal, deferred
+  transactions, 5 s busy wait
+- sqlite-tuned: the DB_ENGINE=sqlite profile after enable_wal (WAL,
+  synchronous=NORMAL, busy_timeout, mmap, immediate transactions)
+- postgres: the DB_ENGINE=postgres profile; start the benchmark with the
+  DB_* variables pointing at a server, e.g. one started with
+  docker run -e POSTGRES_USER=musubi -e POSTGRES_PASSWORD=musubi -p 5432:5432 postgres:16
+
+    python -m benchmarks.concurrent_writes [--workers 1 4 8] [--orders 200]
+    DB_ENGINE=postgres DB_PASSWORD=musubi python -m benchmarks.concurrent_writes
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+
+from benchmarks import percentile, print_table, setup_django, test_database
+
+PRODUCTS = 5
+
+
+def child(profile, db_name, orders, seed):
+    """Child process: place orders and print the latencies and error count"""
+    setup_django()
+    from django.db import DatabaseError, connection
+
+    connection.settings_dict['NAME'] = db_name
+    if profile == 'sqlite-default':
+        connection.settings_dict['OPTIONS'] = {}
+
+    from django.contrib.auth.models import User
+
+    from musubiapp.checkout import place_order
+    from musubiapp.models import Cart, CartItem, Customer, Product
+    from musubiapp.utils import log_activity
+
+    user = User.objects.get(username=f'bench-{seed}')
+    customer = Customer.objects.get(user=user)
+    cart = Cart.objects.get(customer=customer)
+    products = list(Product.objects.order_by('id'))
+
+    latencies = []
+    errors = 0
+    for i in range(orders):
+        product = products[(seed + i) % len(products)]
+        started = time.perf_counter()
+        try:
+            item = CartItem.objects.create(cart=cart, product=product, quantity=1)
+            order, _ = place_order(user, customer, [item], total_amount=product.price, delivery_address='Honolulu')
+            log_activity(user=user, action='create', entity_type='order', entity_id=order.id,
+                         description=f'Customer placed order #{order.id}')
+        except DatabaseError:
+            errors += 1
+            continue
+        finally:
+            connection.close_if_unusable_or_obsolete()
+        latencies.append(time.perf_counter() - started)
+    print(json.dumps({'latencies': latencies, 'errors': errors}))
+
+
+def prepare(workers):
+    from django.contrib.auth.models import User
+
+    from musubiapp.models import Cart, Customer, Product
+
+    Product.objects.bulk_create([
+        Product(name=f'Musubi {i}', description='Bench', price=45, stock=10 ** 9) for i in range(PRODUCTS)
+    ])
+    for seed in range(workers):
+        user = User.objects.create(username=f'bench-{seed}')
+        Cart.objects.create(customer=Customer.objects.create(user=user, role='customer'))
+
+
+def run(profile, workers_list, orders):
+    from django.core.management import call_command
+    from django.db import connection
+
+    prepare(max(workers_list))
+    if profile == 'sqlite-tuned':
+        call_command('enable_wal', stdout=StringIO())
+    db_name = connection.settings_dict['NAME']
+    connection.close()
+
+    rows = []
+    for workers in workers_list:
+        started = time.perf_counter()
+        children = [
+            subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.concurrent_writes', '--child', profile,
+                 '--db', str(db_name), '--orders', str(orders), '--seed', str(seed)],
+                stdout=subprocess.PIPE, text=True,
+            )
+            for seed in range(workers)
+        ]
+        results = [json.loads(child.communicate()[0]) for child in children]
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for result in results for latency in result['latencies']]
+        errors = sum(result['errors'] for result in results)
+        rows.append([
+            profile,
+            workers,
+            len(latencies),
+            errors,
+            f'{len(latencies) / elapsed:.0f}',
+            f'{percentile(latencies, 50) * 1000:.1f}' if latencies else '-',
+            f'{percentile(latencies, 95) * 1000:.1f}' if latencies else '-',
+        ])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Worker processes to try')
+    parser.add_argument('--orders', type=int, default=200, help='Orders placed by each worker')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.db, args.orders, args.seed)
+        return
+
+    setup_django()
+    from django.conf import settings
+
+    if settings.DB_ENGINE == 'postgres':
+        profiles = ['postgres']
+    else:
+        profiles = ['sqlite-default', 'sqlite-tuned']
+
+    rows = []
+    for profile in profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            name = os.path.join(tmp, 'bench.sqlite3') if profile.startswith('sqlite') else None
+            with test_database(name):
+                rows += run(profile, args.workers, args.orders)
+    print_table(['profile', 'workers', 'orders', 'errors', 'orders/s', 'p50 ms', 'p95 ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
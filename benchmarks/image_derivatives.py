@@ -0,0 +1,114 @@
+"""
+Bytes transferred per menu render: original uploads versus resized copies.
+
+Copies the media/products images into a scratch MEDIA_ROOT, lists them as
+products, and renders /menu/ before and after build_image_derivatives. For
+each render it adds up the HTML and the image files a browser would fetch:
+the <img src> before, and after, the srcset candidate a browser would pick
+for a few typical screens.
+
+    python -m benchmarks.image_derivatives [--products 12]
+"""
+import argparse
+import os
+import re
+import shutil
+import tempfile
+from decimal import Decimal
+from html import unescape
+from io import StringIO
+
+from benchmarks import print_table, setup_django, test_database
+
+# (label, CSS pixels the card image is drawn at, device pixel ratio, WebP)
+SCREENS = [
+    ('desktop', 420, 1, True),
+    ('laptop, 2x', 420, 2, True),
+    ('phone, 3x', 390, 3, True),
+    ('phone, no WebP', 390, 2, False),
+]
+
+PICTURE_RE = re.compile(r'<picture><source type="image/webp" srcset="([^"]*)"[^>]*><img src="([^"]*)" srcset="([^"]*)"')
+IMG_RE = re.compile(r'<img src="(/media/[^"]*)"')
+
+
+def pick(srcset, pixels):
+    """The smallest candidate at least pixels wide, as browsers do"""
+    candidates = sorted(
+        (int(descriptor[:-1]), url)
+        for url, descriptor in (entry.strip().rsplit(' ', 1) for entry in unescape(srcset).split(','))
+    )
+    return next((url for width, url in candidates if width >= pixels), candidates[-1][1])
+
+
+def file_size(media_root, url):
+    return os.path.getsize(os.path.join(media_root, unescape(url)[len('/media/'):]))
+
+
+def load_products(media_root, count):
+    from django.contrib.auth.models import User
+
+    from musubiapp.models import Customer, Product
+
+    source = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media', 'products')
+    names = sorted(os.listdir(source))
+    os.makedirs(os.path.join(media_root, 'products'))
+    for name in names:
+        shutil.copy(os.path.join(source, name), os.path.join(media_root, 'products', name))
+    Product.objects.bulk_create([
+        Product(name=f'Musubi {i}', description='Bench', price=Decimal('45.00'), stock=10,
+                image=f'products/{names[i % len(names)]}')
+        for i in range(count)
+    ])
+    user = User.objects.create(username='bench')
+    Customer.objects.create(user=user)
+    return user
+
+
+def run(count):
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        client = Client()
+        client.force_login(load_products(media_root, count))
+
+        before = client.get('/menu/').content.decode()
+        originals = IMG_RE.findall(before)
+        before_bytes = len(before.encode()) + sum(file_size(media_root, url) for url in originals)
+
+        call_command('build_image_derivatives', stdout=StringIO())
+        after = client.get('/menu/').content.decode()
+        pictures = PICTURE_RE.findall(after)
+        if len(pictures) != len(originals):
+            raise SystemExit(f'Expected {len(originals)} <picture> elements, found {len(pictures)}')
+
+        results = []
+        for label, css_width, ratio, webp in SCREENS:
+            images = sum(
+                file_size(media_root, pick(webp_srcset if webp else jpeg_srcset, css_width * ratio))
+                for webp_srcset, _, jpeg_srcset in pictures
+            )
+            after_bytes = len(after.encode()) + images
+            results.append([
+                label,
+                f'{before_bytes / 1024:.0f}',
+                f'{after_bytes / 1024:.0f}',
+                f'{100 * (1 - after_bytes / before_bytes):.0f}%',
+            ])
+        print(f'{len(originals)} product images on the menu')
+        print_table(['screen', 'before KB', 'after KB', 'saved'], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=12, help='Products listed on the menu')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.products)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Job queue throughput: how fast run_worker drains queued emails.
+
+Queues a batch of send_email jobs in an on-disk SQLite database, then
+times 1, 2 and 4 worker processes (each one `work(burst=True)`, as
+`manage.py run_worker --burst` runs) draining it, at a few batch sizes.
+Emails go to the in-memory backend, so this measures the queue itself:
+claiming, running and deleting jobs.
+
+    python -m benchmarks.job_queue [--jobs 5000] [--workers 1 2 4] [--batch-sizes 1 10 50]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import print_table, setup_django, test_database
+
+
+def drain(db_name, batch_size):
+    """Child process: run a burst worker and print the jobs it ran"""
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    connection.settings_dict['NAME'] = db_name
+    from musubiapp.jobs import work
+
+    succeeded, failed = work(batch_size=batch_size, burst=True)
+    print(succeeded, failed)
+
+
+def queue_jobs(count):
+    from django.db import transaction
+
+    from musubiapp.jobs import enqueue
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        for i in range(count):
+            enqueue('send_email', subject='Password Reset Request', message=f'Reset link {i}',
+                    recipient_list=[f'customer{i}@example.com'])
+    return time.perf_counter() - started
+
+
+def run(jobs, workers, batch_sizes):
+    from django.db import connection
+
+    from musubiapp.models import Job
+
+    db_name = connection.settings_dict['NAME']
+    results = []
+    for batch_size in batch_sizes:
+        for count in workers:
+            queued = queue_jobs(jobs)
+            # Let the children write the database file
+            connection.close()
+
+            started = time.perf_counter()
+            children = [
+                subprocess.Popen(
+                    [sys.executable, '-m', 'benchmarks.job_queue', '--drain', db_name, '--batch-size', str(batch_size)],
+                    stdout=subprocess.PIPE, text=True,
+                )
+                for _ in range(count)
+            ]
+            ran = [list(map(int, child.communicate()[0].split())) for child in children]
+            elapsed = time.perf_counter() - started
+
+            left = Job.objects.count()
+            Job.objects.all().delete()
+            results.append([
+                batch_size,
+                count,
+                f'{jobs / queued:.0f}',
+                sum(succeeded for succeeded, _ in ran),
+                left,
+                f'{elapsed:.2f}',
+                f'{(jobs - left) / elapsed:.0f}',
+            ])
+    print_table(['batch', 'workers', 'queued/s', 'ran', 'left', 'seconds', 'jobs/s'], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=5000, help='Jobs queued for each run')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker processes to try')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 50], help='Jobs claimed at a time')
+    parser.add_argument('--drain', metavar='DB', help=argparse.SUPPRESS)
+    parser.add_argument('--batch-size', type=int, default=10, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.drain:
+        drain(args.drain, args.batch_size)
+        return
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as tmp, test_database(os.path.join(tmp, 'bench.sqlite3')):
+        run(args.jobs, args.workers, args.batch_sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Activity log page latency by depth: OFFSET pagination versus keyset cursors.
+
+Loads a large ActivityLog (five million rows by default) and times fetching
+page N of 50 entries, newest first, for increasingly deep pages:
+
+- offset: Paginator as admin_activity_log used it, COUNT(*) plus
+  LIMIT/OFFSET
+- keyset: KeysetPaginator continuing from the cursor of page N-1, with its
+  count capped at 1000
+
+    python -m benchmarks.keyset_pagination [--rows 5000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from benchmarks import measure, percentile, print_table, setup_django, test_database
+
+PER_PAGE = 50
+ACTIONS = ['create', 'update', 'delete', 'login', 'logout', 'view']
+
+
+def load_logs(count, users=200):
+    """Insert log rows with raw SQL, a few seconds apart over the past"""
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+
+    from musubiapp.models import ActivityLog
+
+    rng = random.Random(5)
+    user_ids = [u.id for u in User.objects.bulk_create([User(username=f'bench-{i}') for i in range(users)])]
+    sql = (
+        f'INSERT INTO {ActivityLog._meta.db_table} (user_id, action, entity_type, entity_id, description, created_at) '
+        "VALUES (%s, %s, 'product', %s, 'Bench entry', %s)"
+    )
+    newest = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+    batch = 100000
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, count, batch):
+            rows = []
+            for i in range(start, min(start + batch, count)):
+                # Several entries per second, so timestamps tie
+                created = newest - timedelta(seconds=i // 3)
+                rows.append((rng.choice(user_ids), rng.choice(ACTIONS), rng.randint(1, 500), created))
+            cursor.executemany(sql, rows)
+
+
+def run(rows, repeat):
+    from django.core.paginator import Paginator
+    from django.test import RequestFactory
+
+    from musubiapp.models import ActivityLog
+    from musubiapp.pagination import KeysetPaginator, encode_cursor
+
+    started = time.perf_counter()
+    load_logs(rows)
+    print(f'Loaded {rows} activity log rows in {time.perf_counter() - started:.1f}s')
+
+    logs = ActivityLog.objects.select_related('user')
+    last_page = rows // PER_PAGE
+    depths = [n for n in [1, 10, 100, 1000, 10000, 100000] if n <= last_page] + [last_page]
+    factory = RequestFactory()
+
+    results = []
+    for n in sorted(set(depths)):
+        def offset_page():
+            return list(Paginator(logs, PER_PAGE).page(n).object_list)
+
+        if n == 1:
+            request = factory.get('/')
+        else:
+            # Cursor of the last entry on page n-1, as the Older link carries it
+            created_at, pk = ActivityLog.objects.order_by('-created_at', '-id').values_list(
+                'created_at', 'id')[(n - 1) * PER_PAGE - 1]
+            request = factory.get('/', {'cursor': encode_cursor('next', created_at, pk)})
+
+        def keyset_page():
+            return list(KeysetPaginator(logs, per_page=PER_PAGE, count_limit=1000).get_page(request))
+
+        if [log.id for log in offset_page()] != [log.id for log in keyset_page()]:
+            raise SystemExit(f'Offset and keyset page {n} differ')
+        offset = measure(offset_page, repeat)
+        keyset = measure(keyset_page, repeat)
+        results.append([
+            n,
+            f'{percentile(offset, 50) * 1000:.1f}',
+            f'{percentile(keyset, 50) * 1000:.1f}',
+        ])
+
+    print_table(['page', 'offset ms', 'keyset ms'], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000, help='Activity log rows to load')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per page and method')
+    args = parser.parse_args()
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as tmp, test_database(os.path.join(tmp, 'bench.sqlite3')):
+        run(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
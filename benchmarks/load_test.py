@@ -0,0 +1,468 @@
+"""
+Concurrent virtual users replaying customer and admin journeys over HTTP.
+
+Serves the app on a local server, either the threaded WSGI server that
+runserver uses or, with --server asgi, uvicorn if it is installed. The
+server runs with DEBUG off against a throwaway database filled by
+generate_load_data. Then --users virtual users sign in as generated users
+and repeat these journeys, measured for --duration seconds from --warmup
+seconds after the last of them has signed in:
+
+- order (customers): menu, product detail, add to cart, checkout, place order
+- reservation (customers): reservation form, create reservation, my reservations
+- admin (every fifth user): dashboard, analytics, order list
+
+Reports requests, errors, throughput and p50/p95/p99 latency per URL name
+(POSTs as e.g. "checkout POST"). --output writes the results as JSON. With
+--baseline, the exit status is 1 when an endpoint named by --fail-on
+(default: all in the baseline) is slower at --metric than the baseline by
+more than --threshold percent, or has no successful requests.
+
+The virtual users share the machine with the server. For many users, run
+the app elsewhere (with generate_load_data run against its database) and
+point --url at it.
+
+    python -m benchmarks.load_test [--users 10] [--duration 30] [--server wsgi] [--scale 0.1]
+    python -m benchmarks.load_test --output after.json --baseline before.json --fail-on checkout product_detail
+    python -m benchmarks.load_test --url http://192.168.1.20:8000 --users 50
+"""
+import argparse
+import gzip
+import http.cookiejar
+import importlib.util
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from benchmarks import load_data, percentile, print_table, setup_django, test_database
+
+PRODUCT_ID_RE = re.compile(r'data-product-id="(\d+)"')
+RESERVATION_PRODUCT_RE = re.compile(r'name="product_(\d+)"')
+CHECKOUT_TOKEN_RE = re.compile(r'name="checkout_token" value="([^"]+)"')
+PERCENTILES = [50, 95, 99]
+ADMIN_EVERY = 5
+
+
+class JourneyError(Exception):
+    pass
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as they are instead of following them, as journeys check where they lead"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser:
+    """One simulated visitor with its own cookies, recording every request it makes"""
+
+    def __init__(self, base_url, record, rng, think=0):
+        self.base_url = base_url
+        self.record = record
+        self.rng = rng
+        self.think = think
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def cookie(self, name):
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), '')
+
+    def request(self, method, name, data=None, expect=200, **kwargs):
+        """
+        Request the URL named name and return the response body.
+
+        Args:
+            data: Form fields to POST
+            expect: Status code expected, or the URL name a redirect must lead to
+            **kwargs: Arguments of the URL
+
+        Raises:
+            JourneyError: The response was not the one expected
+        """
+        from django.urls import reverse
+
+        headers = {'Accept-Encoding': 'gzip'}
+        body = None
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.cookie('csrftoken')
+            body = urllib.parse.urlencode(data or {}).encode()
+        request = urllib.request.Request(self.base_url + reverse(name, kwargs=kwargs), data=body,
+                                         headers=headers, method=method)
+        label = name if method == 'GET' else f'{name} {method}'
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                status, response_headers, content = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, response_headers, content = e.code, e.headers, e.read()
+        except OSError as e:
+            self.record(label, time.perf_counter() - started, False)
+            raise JourneyError(f'{label}: {e}')
+        elapsed = time.perf_counter() - started
+
+        if isinstance(expect, str):
+            location = urllib.parse.urlparse(response_headers.get('Location', '')).path
+            ok = status in (301, 302, 303) and location == reverse(expect)
+        else:
+            ok = status == expect
+        self.record(label, elapsed, ok)
+        if not ok:
+            raise JourneyError(f'{label}: {status} {response_headers.get("Location", "")}'.strip())
+        if response_headers.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        if self.think:
+            time.sleep(self.rng.expovariate(1 / self.think))
+        return content.decode()
+
+    def get(self, name, expect=200, **kwargs):
+        return self.request('GET', name, expect=expect, **kwargs)
+
+    def post(self, name, data=None, expect=200, **kwargs):
+        return self.request('POST', name, data=data, expect=expect, **kwargs)
+
+    def login(self, username, password, landing):
+        self.get('customer_login')
+        self.post('customer_login', {'username': username, 'password': password}, expect=landing)
+
+
+def order_journey(user, rng):
+    menu = user.get('product_list')
+    product_ids = PRODUCT_ID_RE.findall(menu)
+    if not product_ids:
+        raise JourneyError('No products on the menu')
+    product_id = rng.choice(product_ids)
+    user.get('product_detail', product_id=product_id)
+    if not json.loads(user.post('add_to_cart', product_id=product_id)).get('success'):
+        raise JourneyError('add_to_cart POST: not added')
+    page = user.get('checkout')
+    token = CHECKOUT_TOKEN_RE.search(page)
+    if not token:
+        raise JourneyError('checkout: no checkout token')
+    user.post('checkout', {
+        'checkout_token': token.group(1),
+        'delivery_address': '12 Mabini St., Makati',
+        'payment_method': 'cod',
+    }, expect='home')
+
+
+def reservation_journey(user, rng):
+    form = user.get('customer_reservation_create')
+    data = {
+        'reservation_date': (date.today() + timedelta(days=rng.randint(1, 21))).isoformat(),
+        'reservation_time': rng.choice(['11:30', '12:00', '18:00', '18:30', '19:00']),
+        'number_of_guests': rng.randint(2, 6),
+    }
+    product_ids = RESERVATION_PRODUCT_RE.findall(form)
+    if product_ids and rng.random() < 0.5:
+        data[f'product_{rng.choice(product_ids)}'] = rng.randint(1, 4)
+    user.post('customer_reservation_create', data, expect='customer_reservations')
+    user.get('customer_reservations')
+
+
+def admin_journey(user, rng):
+    user.get('admin_dashboard')
+    user.get('admin_analytics')
+    user.get('admin_order_list')
+
+
+# (journey, weight) for customers; admins only run admin_journey
+CUSTOMER_JOURNEYS = [(order_journey, 3), (reservation_journey, 1)]
+
+
+def virtual_user(index, base_url, args, signed_in, window, record, finished):
+    rng = random.Random(args.seed * 100_000 + index)
+    user = VirtualUser(base_url, record, rng, think=args.think)
+    if index % ADMIN_EVERY == ADMIN_EVERY - 1:
+        username, landing, choices = f'{args.prefix}-staff-0', 'admin_dashboard', [(admin_journey, 1)]
+    else:
+        username, landing, choices = f'{args.prefix}-customer-{index}', 'product_list', CUSTOMER_JOURNEYS
+    try:
+        user.login(username, args.password, landing)
+    except JourneyError as e:
+        finished('login', False)
+        print(f'User {index} could not sign in as {username} ({e})', file=sys.stderr)
+        return
+    finally:
+        signed_in.wait()
+
+    while time.monotonic() < window['until']:
+        journey = rng.choices([journey for journey, _ in choices], weights=[weight for _, weight in choices])[0]
+        name = journey.__name__.removesuffix('_journey')
+        try:
+            journey(user, rng)
+        except JourneyError:
+            finished(name, False)
+        else:
+            finished(name, True)
+
+
+def run_load(base_url, args):
+    """Run the virtual users against base_url and return the results"""
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    journeys = defaultdict(int)
+    lock = threading.Lock()
+    window = {}
+
+    def start_clock():
+        # Sign-ins hash passwords, which would swamp the first seconds, so
+        # the warmup starts once the last user has signed in
+        window['from'] = time.monotonic() + args.warmup
+        window['until'] = window['from'] + args.duration
+
+    def measuring():
+        return 'from' in window and time.monotonic() >= window['from']
+
+    def record(label, elapsed, ok):
+        # Requests during the warmup fill caches and connection pools; not counted
+        if not measuring():
+            return
+        with lock:
+            samples[label].append(elapsed)
+            if not ok:
+                errors[label] += 1
+
+    def finished(journey, ok):
+        # Failed sign-ins are counted, though they come before the clock starts
+        if journey != 'login' and not measuring():
+            return
+        with lock:
+            journeys[journey, ok] += 1
+
+    signed_in = threading.Barrier(args.users, action=start_clock)
+    started = datetime.now().astimezone()
+    threads = [
+        threading.Thread(target=virtual_user, args=(index, base_url, args, signed_in, window, record, finished),
+                         daemon=True)
+        for index in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = max(time.monotonic() - window['from'], 1e-9)
+
+    endpoints = {}
+    for label, timings in sorted(samples.items()):
+        endpoints[label] = {
+            'requests': len(timings),
+            'errors': errors[label],
+            'throughput': round(len(timings) / elapsed, 2),
+            **{f'p{pct}': round(percentile(timings, pct) * 1000, 2) for pct in PERCENTILES},
+        }
+    all_timings = [timing for timings in samples.values() for timing in timings]
+    return {
+        'started': started.isoformat(timespec='seconds'),
+        'url': base_url,
+        'server': None if args.url else args.server,
+        'users': args.users,
+        'duration': round(elapsed, 2),
+        'think': args.think,
+        'scale': None if args.url else args.scale,
+        'seed': args.seed,
+        'requests': len(all_timings),
+        'errors': sum(errors.values()),
+        'throughput': round(len(all_timings) / elapsed, 2),
+        'journeys': {
+            name: {'completed': journeys[name, True], 'failed': journeys[name, False]}
+            for name in sorted({name for name, _ in journeys})
+        },
+        'endpoints': endpoints,
+    }
+
+
+def serve(server, port):
+    """Child process: serve the app on 127.0.0.1:port until terminated"""
+    setup_django()
+    from django.conf import settings
+
+    # As deployed: no debug pages, and no query log growing with every request
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+    # Pages are what is measured, so they may link static files collectstatic has not hashed
+    settings.STATIC_MANIFEST_STRICT = False
+
+    if server == 'asgi':
+        import uvicorn
+
+        from musubiproject.asgi import application
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning')
+        return
+
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class Server(ThreadedWSGIServer):
+        # runserver's backlog of 10 refuses connections once more users wait
+        request_queue_size = 256
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    httpd = Server(('127.0.0.1', port), QuietHandler)
+    httpd.set_app(get_wsgi_application())
+    httpd.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(process, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'The server exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f'The server did not start listening on port {port} within {timeout}s')
+
+
+def prepare(args):
+    """Fill the test database and leave enough stock for every order placed during the run"""
+    from django.contrib.auth.models import User
+
+    from musubiapp.catalog import catalog_changed
+    from musubiapp.models import Customer, Product
+
+    if not User.objects.filter(username=f'{args.prefix}-staff-0').exists():
+        load_data(args.scale, seed=args.seed, prefix=args.prefix, password=args.password)
+    customers = Customer.objects.filter(role='customer', user__username__startswith=f'{args.prefix}-customer-').count()
+    if customers < args.users:
+        raise SystemExit(f'Only {customers} generated customers for {args.users} users; raise --scale')
+    Product.objects.update(stock=10 ** 6)
+    catalog_changed()
+
+
+def run_local(args):
+    from django.core.management import call_command
+    from django.db import connection
+
+    prepare(args)
+    if connection.vendor == 'sqlite':
+        # As deployed
+        call_command('enable_wal', stdout=StringIO())
+    db_name = str(connection.settings_dict['NAME'])
+    connection.close()
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.load_test', '--serve', args.server, '--port', str(port)],
+        env={**os.environ, 'DB_NAME': db_name},
+    )
+    try:
+        wait_for_server(process, port)
+        return run_load(f'http://127.0.0.1:{port}', args)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def regressions(results, baseline, names, metric, threshold):
+    """Return a line for each named endpoint slower than in baseline by more than threshold percent"""
+    failures = []
+    for name in names or sorted(baseline['endpoints']):
+        before = baseline['endpoints'].get(name, {}).get(metric)
+        after = results['endpoints'].get(name, {})
+        if before is None:
+            failures.append(f'{name}: not in the baseline')
+        elif not after or after['errors'] == after['requests']:
+            failures.append(f'{name}: no successful requests')
+        elif after[metric] > before * (1 + threshold / 100):
+            failures.append(f'{name}: {metric} {after[metric]:.1f} ms, was {before:.1f} ms '
+                            f'(+{100 * (after[metric] / before - 1):.0f}%, limit +{threshold:g}%)')
+    return failures
+
+
+def report(results):
+    rows = [
+        [name, endpoint['requests'], endpoint['errors'], f'{endpoint["throughput"]:.1f}',
+         *(f'{endpoint[f"p{pct}"]:.1f}' for pct in PERCENTILES)]
+        for name, endpoint in results['endpoints'].items()
+    ]
+    rows.append(['total', results['requests'], results['errors'], f'{results["throughput"]:.1f}', '', '', ''])
+    print_table(['endpoint', 'requests', 'errors', 'req/s', *(f'p{pct} ms' for pct in PERCENTILES)], rows)
+    print()
+    print_table(['journey', 'completed', 'failed'], [
+        [name, counts['completed'], counts['failed']] for name, counts in results['journeys'].items()
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds measured, after the warmup')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds of load before measuring starts, once every user has signed in')
+    parser.add_argument('--think', type=float, default=0, help='Average seconds a user waits after each page')
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi', help='Local server to run the app under')
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--scale', type=float, default=0.1, help='generate_load_data scale of the local database')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the data and of the users\' choices')
+    parser.add_argument('--prefix', default='load', help='generate_load_data username prefix to sign in with')
+    parser.add_argument('--password', default='musubi', help='Password of the generated users')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--fail-on', nargs='+', metavar='ENDPOINT', help='Endpoints that must not regress (default: all)')
+    parser.add_argument('--metric', choices=[f'p{pct}' for pct in PERCENTILES], default='p95', help='Latency compared with the baseline')
+    parser.add_argument('--threshold', type=float, default=20, help='Percent slower than the baseline that fails the run')
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+    if args.server == 'asgi' and not args.url and importlib.util.find_spec('uvicorn') is None:
+        parser.error('--server asgi needs uvicorn (pip install uvicorn)')
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    setup_django()
+    if args.url:
+        results = run_load(args.url.rstrip('/'), args)
+    else:
+        from django.conf import settings
+
+        with tempfile.TemporaryDirectory() as tmp:
+            name = os.path.join(tmp, 'load_test.sqlite3') if settings.DB_ENGINE == 'sqlite' else None
+            with test_database(name):
+                results = run_local(args)
+
+    report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    if baseline:
+        failures = regressions(results, baseline, args.fail_on, args.metric, args.threshold)
+        if failures:
+            print('\nRegressed:\n' + '\n'.join(f'  {failure}' for failure in failures))
+            sys.exit(1)
+        print(f'\nNo endpoint regressed more than {args.threshold:g}% at {args.metric}')
+
+
+if __name__ == '__main__':
+    main()
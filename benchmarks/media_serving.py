@@ -0,0 +1,182 @@
+"""
+Serving media/products images: reading whole files versus streaming them.
+
+Starts a threaded WSGI server in a child process for each mode, has many
+concurrent clients download the product images from it, and reports the
+server's peak RSS and throughput:
+
+- read: the old serve_media, one HttpResponse(f.read()) per request
+- stream: serve_media now, a FileResponse streamed from the open file
+- revalidate: serve_media with clients sending If-None-Match, as browsers do
+  once the images are cached
+
+    python -m benchmarks.media_serving [--clients 64] [--requests 3000]
+"""
+import argparse
+import http.client
+import itertools
+import mimetypes
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.urls import path
+
+from benchmarks import print_table, setup_django
+
+MODES = ['read', 'stream', 'revalidate']
+
+
+def read_whole_file(request, path):
+    """serve_media as it was: the whole file in memory, no validators"""
+    from django.conf import settings
+    from django.http import Http404, HttpResponse
+
+    file_path = os.path.join(settings.MEDIA_ROOT, path)
+    if not os.path.exists(file_path):
+        raise Http404("File not found")
+    content_type, _ = mimetypes.guess_type(file_path)
+    with open(file_path, 'rb') as f:
+        return HttpResponse(f.read(), content_type=content_type or 'application/octet-stream')
+
+
+def _serve_media(request, path):
+    from musubiapp.media_views import serve_media
+    return serve_media(request, path)
+
+
+# ROOT_URLCONF of the child server
+urlpatterns = [
+    path('read/<path:path>', read_whole_file),
+    path('media/<path:path>', _serve_media),
+]
+
+
+def serve():
+    """Child process: serve on an ephemeral port and print it"""
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    from django.conf import settings
+
+    setup_django()
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['127.0.0.1']
+    settings.ROOT_URLCONF = 'benchmarks.media_serving'
+
+    from django.core.wsgi import get_wsgi_application
+
+    class Server(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    httpd = make_server('127.0.0.1', 0, get_wsgi_application(), server_class=Server, handler_class=QuietHandler)
+    print(httpd.server_port, flush=True)
+    httpd.serve_forever()
+
+
+def _memory_kb(pid, field):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def fetch(port, url, headers):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', url, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, len(body), response.getheader('ETag')
+    finally:
+        conn.close()
+
+
+def run_mode(mode, names, clients, requests):
+    child = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.media_serving', '--serve'],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        port = int(child.stdout.readline())
+        prefix = '/read/products/' if mode == 'read' else '/media/products/'
+        etags = {}
+        for name in names:
+            etags[name] = fetch(port, prefix + name, {})[2]
+        idle_kb = _memory_kb(child.pid, 'VmRSS')
+
+        work = itertools.cycle(names)
+        lock = threading.Lock()
+        remaining = [requests]
+        totals = {'bytes': 0, 'errors': 0}
+
+        def client():
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+                    remaining[0] -= 1
+                    name = next(work)
+                headers = {'If-None-Match': etags[name]} if mode == 'revalidate' else {}
+                status, size, _ = fetch(port, prefix + name, headers)
+                with lock:
+                    totals['bytes'] += size
+                    totals['errors'] += status not in (200, 304)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        peak_kb = _memory_kb(child.pid, 'VmHWM')
+    finally:
+        child.kill()
+        child.wait()
+    return [
+        mode,
+        f'{idle_kb / 1024:.1f}',
+        f'{peak_kb / 1024:.1f}',
+        f'{requests / elapsed:.0f}',
+        f'{totals["bytes"] / elapsed / 1024 / 1024:.1f}',
+        totals['errors'],
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64, help='Concurrent client threads')
+    parser.add_argument('--requests', type=int, default=3000, help='Requests per mode')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve()
+        return
+
+    setup_django()
+    from django.conf import settings
+
+    names = sorted(os.listdir(os.path.join(settings.MEDIA_ROOT, 'products')))
+    if not names:
+        raise SystemExit('No images in media/products')
+    sizes = [os.path.getsize(os.path.join(settings.MEDIA_ROOT, 'products', name)) for name in names]
+    print(f'{len(names)} images, {sum(sizes) / len(sizes) / 1024:.0f} KB on average, '
+          f'{args.clients} clients, {args.requests} requests per mode')
+
+    results = [run_mode(mode, names, args.clients, args.requests) for mode in MODES]
+    print_table(['mode', 'idle RSS MB', 'peak RSS MB', 'req/s', 'MB/s', 'errors'], results)
+
+
+if __name__ == '__main__':
+    main()
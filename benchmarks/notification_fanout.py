@@ -0,0 +1,85 @@
+"""
+Checkout latency as the number of admins grows.
+
+Every checkout notifies every admin. This places orders through the real
+checkout view for 1 to 200 admins and compares the bulk fan-out used by
+``notifications.notify`` with the old one-INSERT-per-admin loop.
+
+    python -m benchmarks.notification_fanout [--repeat 30]
+"""
+import argparse
+
+from benchmarks import measure, percentile, print_table, setup_django, test_database
+
+ADMIN_COUNTS = [1, 10, 50, 100, 200]
+
+
+def run(repeat):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from musubiapp.models import Cart, CartItem, Customer, Notification, Product
+    from musubiapp.notifications import ADMINS, admin_user_ids, notify
+
+    user = User.objects.create(username='bench-customer')
+    customer = Customer.objects.create(user=user, role='customer')
+    cart = Cart.objects.create(customer=customer)
+    product = Product.objects.create(name='Classic Spam Musubi', description='Bench', price=45, stock=10 ** 9)
+    client = Client()
+    client.force_login(user)
+
+    def place_order():
+        CartItem.objects.create(cart=cart, product=product, quantity=1)
+        client.post('/checkout/', {'delivery_address': 'Honolulu'})
+
+    def legacy_fanout():
+        for admin_user in User.objects.filter(customer__role='admin'):
+            Notification.objects.create(user=admin_user, notification_type='new_order', title='Bench', message='Bench')
+
+    def bulk_fanout():
+        notify(ADMINS, notification_type='new_order', title='Bench', message='Bench')
+
+    rows = []
+    admins = 0
+    for target in ADMIN_COUNTS:
+        for i in range(admins, target):
+            admin = User.objects.create(username=f'bench-admin-{i}')
+            Customer.objects.create(user=admin, role='admin')
+        admins = target
+        admin_user_ids()
+
+        with CaptureQueriesContext(connection) as queries:
+            place_order()
+        checkout_queries = len(queries)
+        checkout = measure(place_order, repeat)
+        legacy = measure(legacy_fanout, repeat)
+        bulk = measure(bulk_fanout, repeat)
+        rows.append([
+            target,
+            checkout_queries,
+            f'{percentile(checkout, 50) * 1000:.2f}',
+            f'{percentile(checkout, 95) * 1000:.2f}',
+            f'{percentile(legacy, 50) * 1000:.2f}',
+            f'{percentile(bulk, 50) * 1000:.2f}',
+        ])
+
+    print_table(
+        ['admins', 'checkout queries', 'checkout p50 ms', 'checkout p95 ms', 'loop fan-out p50 ms', 'bulk fan-out p50 ms'],
+        rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=30, help='Checkouts per admin count')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
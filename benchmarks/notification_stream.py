@@ -0,0 +1,183 @@
+"""
+Request rate of the notification badge with many open tabs.
+
+Drives musubiproject.asgi.application in-process with N simulated tabs for a
+stretch of simulated time, once with every tab polling the unread-count
+endpoint every 30 seconds and once with every tab holding the Server-Sent
+Events stream. New notifications arrive at a steady rate during both runs.
+Time is compressed by --speedup; reported rates are per real-world second.
+
+    python -m benchmarks.notification_stream [--tabs 500] [--users 100] [--minutes 10]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+
+from benchmarks import print_table, setup_django, test_database
+
+POLL_INTERVAL = 30.0
+
+
+class Stats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.refreshes = 0
+
+
+def http_scope(path, cookie):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie)],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+
+
+async def request(application, path, cookie, stats, on_chunk=None):
+    """Send one GET through the ASGI app and read the response to the end"""
+    from asgiref.testing import ApplicationCommunicator
+
+    stats.requests += 1
+    communicator = ApplicationCommunicator(application, http_scope(path, cookie))
+    await communicator.send_input({'type': 'http.request', 'body': b''})
+    try:
+        await communicator.receive_output(timeout=60)
+        while True:
+            message = await communicator.receive_output(timeout=3600)
+            if on_chunk and message.get('body'):
+                on_chunk(message['body'])
+            if not message.get('more_body'):
+                break
+    finally:
+        await communicator.wait(timeout=1)
+
+
+async def polling_tab(application, cookie, stats, deadline, speedup):
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(random.uniform(0, POLL_INTERVAL / speedup))
+    while loop.time() < deadline:
+        await request(application, '/api/notifications/unread-count/', cookie, stats)
+        stats.refreshes += 1
+        await asyncio.sleep(POLL_INTERVAL / speedup)
+
+
+async def streaming_tab(application, cookie, stats, deadline):
+    loop = asyncio.get_running_loop()
+
+    def on_chunk(chunk):
+        stats.refreshes += chunk.count(b'event: unread')
+
+    while loop.time() < deadline:
+        try:
+            await asyncio.wait_for(
+                request(application, '/api/notifications/stream/', cookie, stats, on_chunk),
+                timeout=deadline - loop.time(),
+            )
+        except asyncio.TimeoutError:
+            break
+
+
+async def notification_source(user_ids, per_minute, deadline, speedup):
+    from asgiref.sync import sync_to_async
+
+    from musubiapp.notifications import notify
+
+    loop = asyncio.get_running_loop()
+    interval = 60.0 / per_minute / speedup
+    while loop.time() < deadline:
+        await sync_to_async(notify)([random.choice(user_ids)], 'order_preparing', 'Bench', 'Bench')
+        await asyncio.sleep(interval)
+
+
+async def simulate(mode, cookies, user_ids, stats, seconds, speedup, per_minute):
+    from musubiproject.asgi import application
+
+    deadline = asyncio.get_running_loop().time() + seconds / speedup
+    if mode == 'polling':
+        tabs = [polling_tab(application, cookie, stats, deadline, speedup) for cookie in cookies]
+    else:
+        tabs = [streaming_tab(application, cookie, stats, deadline) for cookie in cookies]
+    source = notification_source(user_ids, per_minute, deadline, speedup)
+    await asyncio.gather(source, *tabs)
+
+
+def run(tabs, users, seconds, speedup, per_minute):
+    from django.contrib.auth.models import User
+    from django.db.backends.signals import connection_created
+    from django.db import connection
+    from django.test import Client, override_settings
+
+    from musubiapp.models import Customer
+
+    stats = Stats()
+
+    def count_queries(execute, sql, params, many, context):
+        stats.queries += 1
+        return execute(sql, params, many, context)
+
+    def install_counter(sender, connection, **kwargs):
+        connection.execute_wrappers.append(count_queries)
+
+    connection_created.connect(install_counter)
+    connection.execute_wrappers.append(count_queries)
+
+    user_cookies = []
+    user_ids = []
+    for i in range(users):
+        user = User.objects.create(username=f'bench-tab-{i}')
+        Customer.objects.create(user=user, role='customer')
+        client = Client()
+        client.force_login(user)
+        user_ids.append(user.id)
+        user_cookies.append(client.cookies.output(header='', sep=';').strip().encode())
+    cookies = list(itertools.islice(itertools.cycle(user_cookies), tabs))
+
+    rows = []
+    for mode in ('polling', 'sse'):
+        stats.__init__()
+        with override_settings(
+            NOTIFICATION_STREAM_CHECK_INTERVAL=1.0 / speedup,
+            NOTIFICATION_STREAM_HEARTBEAT=15.0 / speedup,
+            NOTIFICATION_STREAM_LIFETIME=300.0 / speedup,
+        ):
+            asyncio.run(simulate(mode, cookies, user_ids, stats, seconds, speedup, per_minute))
+        rows.append([
+            mode,
+            tabs,
+            stats.requests,
+            f'{stats.requests / seconds:.2f}',
+            f'{stats.queries / seconds:.2f}',
+            stats.refreshes,
+        ])
+
+    print_table(['mode', 'tabs', 'requests', 'requests/s', 'db queries/s', 'badge refreshes'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tabs', type=int, default=500, help='Open tabs')
+    parser.add_argument('--users', type=int, default=100, help='Distinct logged-in users behind the tabs')
+    parser.add_argument('--minutes', type=float, default=10, help='Simulated minutes per mode')
+    parser.add_argument('--speedup', type=float, default=10, help='Time compression factor')
+    parser.add_argument('--notifications-per-minute', type=float, default=30, help='New notifications per simulated minute')
+    args = parser.parse_args()
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as tmp, test_database(os.path.join(tmp, 'bench.sqlite3')):
+        run(args.tabs, args.users, args.minutes * 60, args.speedup, args.notifications_per_minute)
+
+
+if __name__ == '__main__':
+    main()
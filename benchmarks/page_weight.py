@@ -0,0 +1,106 @@
+"""
+HTML bytes per page with the page styles and scripts inline versus linked.
+
+Renders ten of the busiest pages as a customer or an admin and measures the
+HTML as served now, with each page's styles and scripts in static files
+(musubiapp/static/musubiapp/pages), and as it was before, with those files
+put back inline. The linked files are downloaded once and then cached, so
+on later visits only the HTML counts.
+
+    python -m benchmarks.page_weight
+"""
+import argparse
+import gzip
+import re
+from decimal import Decimal
+
+from benchmarks import print_table, setup_django, test_database
+
+PAGES = [
+    ('/', 'customer'),
+    ('/menu/', 'customer'),
+    ('/product/{product}/', 'customer'),
+    ('/cart/', 'customer'),
+    ('/checkout/', 'customer'),
+    ('/reservations/create/', 'customer'),
+    ('/login/', None),
+    ('/register/', None),
+    ('/admin/dashboard/', 'admin'),
+    ('/admin/orders/', 'admin'),
+]
+LINK_RE = re.compile(r'<link rel="stylesheet" href="/static/(musubiapp/pages/[^"]+)">')
+SCRIPT_RE = re.compile(r'<script src="/static/(musubiapp/pages/[^"]+)"></script>')
+
+
+def read_asset(path):
+    from django.contrib.staticfiles import finders
+
+    with open(finders.find(path), encoding='utf-8') as f:
+        return f.read()
+
+
+def inline(html):
+    """Put the page assets linked from html back inline, as the templates had them"""
+    html = LINK_RE.sub(lambda m: f'<style>\n{read_asset(m.group(1))}</style>', html)
+    return SCRIPT_RE.sub(lambda m: f'<script>\n{read_asset(m.group(1))}</script>', html)
+
+
+def page_assets(html):
+    return LINK_RE.findall(html) + SCRIPT_RE.findall(html)
+
+
+def kb(size):
+    return f'{size / 1024:.1f}'
+
+
+def run():
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from musubiapp.models import Cart, CartItem, Customer, Product
+
+    products = Product.objects.bulk_create([
+        Product(name=f'Musubi {i}', description='Spam, egg and furikake on rice', price=Decimal(45), stock=20)
+        for i in range(12)
+    ])
+    customer_user = User.objects.create(username='bench-customer')
+    customer = Customer.objects.create(user=customer_user, role='customer')
+    cart = Cart.objects.create(customer=customer)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=1) for product in products[:3]])
+    admin_user = User.objects.create(username='bench-admin')
+    Customer.objects.create(user=admin_user, role='admin')
+    clients = {None: Client(), 'customer': Client(), 'admin': Client()}
+    clients['customer'].force_login(customer_user)
+    clients['admin'].force_login(admin_user)
+
+    rows = []
+    totals = [0, 0, 0, 0]
+    for path, viewer in PAGES:
+        path = path.format(product=products[0].id)
+        response = clients[viewer].get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        after = response.content.decode()
+        before = inline(after)
+        sizes = [
+            len(before.encode()),
+            len(after.encode()),
+            len(gzip.compress(before.encode())),
+            len(gzip.compress(after.encode())),
+        ]
+        totals = [total + size for total, size in zip(totals, sizes)]
+        rows.append([path, *map(kb, sizes), f'{100 - 100 * sizes[1] / sizes[0]:.0f}%', len(page_assets(after))])
+    rows.append(['total', *map(kb, totals), f'{100 - 100 * totals[1] / totals[0]:.0f}%', ''])
+    print_table(['page', 'before KB', 'after KB', 'before gz KB', 'after gz KB', 'saved', 'page files'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run()
+
+
+if __name__ == '__main__':
+    main()
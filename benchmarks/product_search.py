@@ -0,0 +1,97 @@
+"""
+Product search latency: icontains scan versus the FTS5 index.
+
+Builds a synthetic catalog (100k products by default) and times a set of
+queries through ``musubiapp.search.search_products`` with the FTS5 index and
+with the icontains fallback it replaces.
+
+    python -m benchmarks.product_search [--products 100000] [--repeat 20]
+"""
+import argparse
+import random
+from decimal import Decimal
+from unittest import mock
+
+from benchmarks import measure, percentile, print_table, setup_django, test_database
+
+FOOD_WORDS = (
+    'spam musubi teriyaki egg furikake nori rice katsu chicken garlic shoyu '
+    'spicy mayo kimchi bacon cheese ube mango calamansi pineapple sweet '
+    'crispy glazed smoked classic deluxe mini jumbo bundle combo'
+).split()
+SYLLABLES = 'ka lo mi nu pe ra si to wa ho li ma ne ko pu'.split()
+CATEGORIES = ['spam', 'chicken', 'vegetarian', 'special']
+# Common words, a phrase, a prefix and words that only a few products use
+QUERIES = ['teriyaki', 'spam musubi', 'kat', 'ube mango', 'lomika', 'rasiwa pehonu']
+
+
+def build_catalog(count):
+    from musubiapp.models import Product
+
+    rng = random.Random(7)
+    # Filler vocabulary so descriptions read like varied text rather than
+    # repeating the same few words, which would make every query match
+    vocabulary = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+    batch = []
+    for i in range(count):
+        batch.append(Product(
+            name=' '.join(rng.sample(FOOD_WORDS, 2) + [rng.choice(vocabulary)]).title(),
+            description=' '.join(rng.sample(FOOD_WORDS, 2) + rng.choices(vocabulary, k=20)),
+            category=rng.choice(CATEGORIES),
+            price=Decimal(rng.randint(30, 300)),
+            stock=rng.randint(0, 100),
+        ))
+        if len(batch) == 5000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def run(products, repeat, limit):
+    from musubiapp.models import Product
+    from musubiapp.search import search_products
+
+    build_catalog(products)
+
+    def page(query):
+        results = search_products(Product.objects.filter(is_active=True), query)
+        return list(results.order_by('search_rank', 'name')[:limit])
+
+    def count(query):
+        return search_products(Product.objects.filter(is_active=True), query).count()
+
+    rows = []
+    for query in QUERIES:
+        for backend in ('icontains', 'fts5'):
+            if backend == 'icontains':
+                patch = mock.patch('musubiapp.search.fts_index_exists', return_value=False)
+            else:
+                patch = mock.patch('musubiapp.search.fts_index_exists', return_value=True)
+            with patch:
+                matches = count(query)
+                timings = measure(lambda: page(query), repeat)
+            rows.append([
+                query,
+                backend,
+                matches,
+                f'{percentile(timings, 50) * 1000:.2f}',
+                f'{percentile(timings, 95) * 1000:.2f}',
+            ])
+
+    print_table(['query', 'backend', 'matches', 'p50 ms', 'p95 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000, help='Products in the synthetic catalog')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query and backend')
+    parser.add_argument('--limit', type=int, default=24, help='Results fetched per search')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.products, args.repeat, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Bytes on the wire and latency of the menu, cart and dashboard with the
+compression and ETag middleware off and on.
+
+Requests each page as a phone would, through the full middleware stack:
+
+- off: COMPRESSION_ENABLED and ETAGS_ENABLED turned off
+- gzip: compressed for a client sending Accept-Encoding: gzip
+- br: the same with brotli, if the brotli package is installed
+- revisit: the client sends back the ETag it got, and the page is unchanged
+
+    python -m benchmarks.response_compression [--products 60] [--repeat 200]
+"""
+import argparse
+from decimal import Decimal
+
+from benchmarks import measure, percentile, print_table, setup_django, test_database
+
+PAGES = [('/menu/', 'customer'), ('/cart/', 'customer'), ('/admin/dashboard/', 'admin')]
+
+
+def run(products, repeat):
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+
+    from musubiapp import middleware
+    from musubiapp.models import Cart, CartItem, Customer, Product
+
+    catalog = Product.objects.bulk_create([
+        Product(name=f'Musubi {i}', description='Spam, egg and furikake on rice, glazed with shoyu sugar',
+                price=Decimal(45), stock=20)
+        for i in range(products)
+    ])
+    customer_user = User.objects.create(username='bench-customer')
+    customer = Customer.objects.create(user=customer_user, role='customer')
+    cart = Cart.objects.create(customer=customer)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=2) for product in catalog[:5]])
+    admin_user = User.objects.create(username='bench-admin')
+    Customer.objects.create(user=admin_user, role='admin')
+    clients = {'customer': Client(), 'admin': Client()}
+    clients['customer'].force_login(customer_user)
+    clients['admin'].force_login(admin_user)
+
+    modes = [('off', {}), ('gzip', {'HTTP_ACCEPT_ENCODING': 'gzip'})]
+    if middleware.brotli is not None:
+        modes.append(('br', {'HTTP_ACCEPT_ENCODING': 'br, gzip'}))
+    modes.append(('revisit', {'HTTP_ACCEPT_ENCODING': 'gzip'}))
+
+    rows = []
+    for path, viewer in PAGES:
+        client = clients[viewer]
+        for mode, headers in modes:
+            enabled = mode != 'off'
+            with override_settings(COMPRESSION_ENABLED=enabled, ETAGS_ENABLED=enabled):
+                if mode == 'revisit':
+                    headers = {**headers, 'HTTP_IF_NONE_MATCH': client.get(path, **headers)['ETag']}
+                response = client.get(path, **headers)
+                timings = measure(lambda: client.get(path, **headers), repeat)
+            rows.append([
+                path,
+                mode,
+                response.status_code,
+                f'{len(response.content) / 1024:.1f}',
+                f'{percentile(timings, 50) * 1000:.2f}',
+                f'{percentile(timings, 95) * 1000:.2f}',
+            ])
+    print_table(['page', 'mode', 'status', 'body KB', 'p50 ms', 'p95 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=60, help='Products on the menu')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed requests per page and mode')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(args.products, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
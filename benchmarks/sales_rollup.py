@@ -0,0 +1,161 @@
+"""
+Analytics query time: scanning orders versus reading the daily sales rollup.
+
+Loads a synthetic order history (a million orders over two years by
+default), builds DailySalesRollup from it with rebuild_sales_rollup, then
+times the figures admin_analytics shows for several date ranges both ways:
+the raw GROUP BY over Order/OrderItem the view used to run, and the rollup
+queries it runs now.
+
+    python -m benchmarks.sales_rollup [--orders 1000000] [--days 730] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from benchmarks import measure, percentile, print_table, setup_django, test_database
+
+STATUSES = ['pending', 'preparing', 'shipping', 'completed', 'completed', 'completed', 'cancelled']
+RANGES = [7, 30, 365, 730]
+
+
+def load_orders(count, days, products=40, customers=2000):
+    """Insert orders and items with raw SQL so created_at can be backdated"""
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+
+    from musubiapp.models import Customer, Order, OrderItem, Product
+
+    rng = random.Random(11)
+    catalog = Product.objects.bulk_create([
+        Product(name=f'Musubi {i}', description='Bench', category=rng.choice(['spam', 'chicken', 'vegetarian', 'special']),
+                price=Decimal(rng.randint(40, 120)), stock=1000)
+        for i in range(products)
+    ])
+    users = User.objects.bulk_create([User(username=f'bench-{i}') for i in range(customers)])
+    customer_ids = [c.id for c in Customer.objects.bulk_create([Customer(user=user) for user in users])]
+
+    order_sql = (
+        f'INSERT INTO {Order._meta.db_table} (id, customer_id, total_amount, discount_amount, status, '
+        'payment_method, payment_status, delivery_address, created_at, updated_at) '
+        "VALUES (%s, %s, %s, 0, %s, 'cod', 'pending', 'Bench', %s, %s)"
+    )
+    item_sql = f'INSERT INTO {OrderItem._meta.db_table} (order_id, product_id, quantity, price) VALUES (%s, %s, %s, %s)'
+
+    end = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+    span = days * 86400
+    batch = 50000
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(1, count + 1, batch):
+            orders, items = [], []
+            for order_id in range(start, min(start + batch, count + 1)):
+                created = end - timedelta(seconds=rng.randrange(span))
+                total = Decimal(0)
+                for product in rng.sample(catalog, rng.randint(1, 3)):
+                    quantity = rng.randint(1, 4)
+                    items.append((order_id, product.id, quantity, product.price))
+                    total += quantity * product.price
+                orders.append((order_id, rng.choice(customer_ids), total + 50, rng.choice(STATUSES), created, created))
+            cursor.executemany(order_sql, orders)
+            cursor.executemany(item_sql, items)
+    return end.date()
+
+
+def raw_report(start, end):
+    """The figures admin_analytics computed before the rollup, from Order/OrderItem"""
+    from django.db.models import Count, F, Sum
+    from django.db.models.functions import TruncDate
+
+    from musubiapp.models import Order, OrderItem
+
+    orders = Order.objects.filter(created_at__date__gte=start, created_at__date__lte=end)
+    items = OrderItem.objects.filter(order__created_at__date__gte=start, order__created_at__date__lte=end)
+    previous_start = start - (end - start)
+    previous = Order.objects.filter(created_at__date__gte=previous_start, created_at__date__lt=start)
+    return {
+        'orders': orders.count(),
+        'revenue': orders.aggregate(total=Sum('total_amount'))['total'],
+        'status': sorted(orders.values_list('status').annotate(count=Count('id'))),
+        'by_date': list(orders.annotate(date=TruncDate('created_at')).values('date').annotate(
+            revenue=Sum('total_amount'), orders=Count('id')).order_by('date').values_list('date', 'revenue', 'orders')),
+        'top_products': list(items.values('product__name').annotate(
+            quantity_sold=Sum('quantity')).order_by('-quantity_sold', 'product__name').values_list('product__name', 'quantity_sold')[:10]),
+        'categories': sorted(items.values('product__category').annotate(
+            revenue=Sum(F('quantity') * F('price'))).values_list('product__category', 'revenue')),
+        'previous': (previous.count(), previous.aggregate(total=Sum('total_amount'))['total']),
+    }
+
+
+def rollup_report(start, end):
+    """The same figures from DailySalesRollup, as admin_analytics computes them now"""
+    from django.db.models import F, Sum
+
+    from musubiapp.rollups import order_totals, product_sales
+
+    totals = order_totals(start, end)
+    sales = product_sales(start, end)
+    overview = totals.aggregate(orders=Sum('order_count'), revenue=Sum('sales_amount'))
+    previous = order_totals(start - (end - start), start - timedelta(days=1)).aggregate(
+        orders=Sum('order_count'), revenue=Sum('sales_amount'))
+    return {
+        'orders': overview['orders'],
+        'revenue': overview['revenue'],
+        'status': sorted(totals.values_list('status').annotate(count=Sum('order_count'))),
+        'by_date': list(totals.values(date=F('day')).annotate(
+            revenue=Sum('sales_amount'), orders=Sum('order_count')).order_by('date').values_list('date', 'revenue', 'orders')),
+        'top_products': list(sales.values('product__name').annotate(
+            quantity_sold=Sum('quantity')).order_by('-quantity_sold', 'product__name').values_list('product__name', 'quantity_sold')[:10]),
+        'categories': sorted(sales.values('category').annotate(
+            revenue=Sum('sales_amount')).values_list('category', 'revenue')),
+        'previous': (previous['orders'], previous['revenue']),
+    }
+
+
+def run(count, days, repeat):
+    from musubiapp.models import DailySalesRollup
+    from musubiapp.rollups import rebuild_sales_rollup
+
+    started = time.perf_counter()
+    end = load_orders(count, days)
+    print(f'Loaded {count} orders in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    rows = rebuild_sales_rollup(end - timedelta(days=days + 1), end)
+    print(f'Built {rows} rollup rows in {time.perf_counter() - started:.1f}s')
+    assert rows == DailySalesRollup.objects.count()
+
+    results = []
+    for span in RANGES:
+        start = end - timedelta(days=span - 1)
+        if raw_report(start, end) != rollup_report(start, end):
+            raise SystemExit(f'Raw and rollup figures differ for the last {span} days')
+        raw = measure(lambda: raw_report(start, end), repeat)
+        rollup = measure(lambda: rollup_report(start, end), repeat)
+        results.append([
+            span,
+            f'{percentile(raw, 50) * 1000:.1f}',
+            f'{percentile(rollup, 50) * 1000:.1f}',
+            f'{percentile(raw, 50) / percentile(rollup, 50):.0f}x',
+        ])
+
+    print_table(['days', 'raw scan ms', 'rollup ms', 'speedup'], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, default=1000000, help='Synthetic orders to load')
+    parser.add_argument('--days', type=int, default=730, help='Days of history the orders are spread over')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per range and path')
+    args = parser.parse_args()
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as tmp, test_database(os.path.join(tmp, 'bench.sqlite3')):
+        run(args.orders, args.days, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
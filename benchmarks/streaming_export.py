@@ -0,0 +1,157 @@
+"""
+Exporting the activity log: peak memory as the log grows.
+
+Loads the activity log in steps up to two million rows. At each size, a
+fresh child process exports every row as CSV three ways and reports its
+peak RSS:
+
+- list: the rows read into a list of model instances first, as rendering
+  them on a page does, then written out
+- command: manage.py export_data activity-log
+- view: the admin_export view, its streamed response read to the end
+
+    python -m benchmarks.streaming_export [--rows 2000000] [--steps 4]
+"""
+import argparse
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from benchmarks import print_table, setup_django, test_database
+
+MODES = ['list', 'command', 'view']
+ACTIONS = ['create', 'update', 'delete', 'login', 'logout', 'view']
+
+
+def load_logs(start, count, user_ids):
+    """Insert log rows start to start+count with raw SQL, a few per second"""
+    from django.db import connection, transaction
+
+    from musubiapp.models import ActivityLog
+
+    rng = random.Random(start)
+    sql = (
+        f'INSERT INTO {ActivityLog._meta.db_table} '
+        '(user_id, action, entity_type, entity_id, description, ip_address, user_agent, created_at) '
+        "VALUES (%s, %s, 'product', %s, %s, '203.0.113.7', 'Mozilla/5.0 (bench)', %s)"
+    )
+    oldest = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    batch = 100000
+    with transaction.atomic(), connection.cursor() as cursor:
+        for first in range(start, start + count, batch):
+            cursor.executemany(sql, [
+                (rng.choice(user_ids), rng.choice(ACTIONS), i % 500, f'Bench entry {i}, updated stock',
+                 oldest + timedelta(seconds=i // 3))
+                for i in range(first, min(first + batch, start + count))
+            ])
+
+
+def _memory_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def export(mode, db_name):
+    """Child process: export the log one way and print idle and peak RSS and seconds"""
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import RequestFactory
+
+    connection.settings_dict['NAME'] = db_name
+    from django.contrib.auth.models import User
+
+    from musubiapp.exports import EXPORTS
+    from musubiapp.models import ActivityLog
+    from musubiapp.views import admin_export
+
+    admin = User.objects.select_related('customer').get(username='bench-admin')
+    idle_kb = _memory_kb('VmRSS')
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w', newline='') as out:
+        if mode == 'list':
+            columns = EXPORTS['activity-log'].columns
+            logs = list(ActivityLog.objects.select_related('user').order_by('created_at', 'id'))
+            writer = csv.writer(out)
+            writer.writerow([name for name, _ in columns])
+            for log in logs:
+                writer.writerow([log.id, log.created_at.isoformat(), log.user.username, log.action, log.entity_type,
+                                 log.entity_id, log.description, log.ip_address, log.user_agent])
+        elif mode == 'command':
+            call_command('export_data', 'activity-log', '--output', os.devnull, stdout=StringIO())
+        else:
+            request = RequestFactory().get('/admin/export/activity-log/')
+            request.user = admin
+            for chunk in admin_export(request, 'activity-log').streaming_content:
+                out.write(chunk.decode())
+    elapsed = time.perf_counter() - started
+    print(idle_kb, _memory_kb('VmHWM'), f'{elapsed:.2f}')
+
+
+def run(rows, steps):
+    from django.contrib.auth.models import User
+    from django.db import connection
+
+    from musubiapp.models import Customer
+
+    users = User.objects.bulk_create([User(username=f'bench-{i}') for i in range(200)])
+    admin = User.objects.create(username='bench-admin')
+    Customer.objects.create(user=admin, role='admin')
+    user_ids = [u.id for u in users]
+    db_name = connection.settings_dict['NAME']
+    # Let the children read the database file
+    connection.close()
+
+    results = []
+    loaded = 0
+    for step in range(1, steps + 1):
+        size = rows * step // steps
+        load_logs(loaded, size - loaded, user_ids)
+        loaded = size
+        connection.close()
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.streaming_export', '--export', mode, '--db', db_name],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            idle_kb, peak_kb, seconds = int(output[0]), int(output[1]), float(output[2])
+            results.append([
+                size,
+                mode,
+                f'{idle_kb / 1024:.0f}',
+                f'{peak_kb / 1024:.0f}',
+                f'{seconds:.1f}',
+                f'{size / seconds:.0f}',
+            ])
+    print_table(['rows', 'mode', 'idle RSS MB', 'peak RSS MB', 'seconds', 'rows/s'], results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000, help='Activity log rows at the last step')
+    parser.add_argument('--steps', type=int, default=4, help='Sizes the log is exported at')
+    parser.add_argument('--export', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.export:
+        export(args.export, args.db)
+        return
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as tmp, test_database(os.path.join(tmp, 'bench.sqlite3')):
+        run(args.rows, args.steps)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MusubiappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'musubiapp'
+
+    def ready(self):
+        # Connect signal receivers and register the background tasks
+        from . import catalog, counters, dashboard, database, notifications, ratings, search, tasks, utils  # noqa: F401
@@ -0,0 +1,139 @@
+# musubiapp/assets.py
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Page styles and scripts live in static files rather than inline in the
+# templates, so browsers download them once and not with every page.
+# extract_inline_assets moves any inline <style> or <script> block a
+# template still has into musubiapp/static/musubiapp/pages/ and links it
+# in its place. Blocks using template tags stay inline, since they differ
+# per request.
+#
+# collectstatic then copies them to STATIC_ROOT under content-hashed names
+# (home.3f2a9c1b20de.css), listed in staticfiles.json, and writes .gz and
+# (with the brotli package) .br copies of text files next to them. A
+# hashed name changes whenever the content does, so serve_static lets
+# browsers keep those files for a year.
+PAGE_ASSETS_DIR = 'musubiapp/pages'
+
+INLINE_BLOCK_RE = re.compile(r'<(style|script)(\s[^>]*)?>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+TEMPLATE_SYNTAX_RE = re.compile(r'\{[%{#]')
+LOAD_RE = re.compile(r'\{%\s*load\s+([^%]*?)\s*%\}')
+EXTENDS_RE = re.compile(r'\{%\s*extends\s[^%]*%\}[^\n]*\n?')
+SCRIPT_TYPES = {'', 'text/javascript', 'application/javascript'}
+ATTRIBUTE_RE = re.compile(r'''([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|(\S+)))?''')
+
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.xml', '.html')
+# Smaller files gain too little to be worth a second request header
+MIN_COMPRESS_SIZE = 512
+
+
+def _movable(tag, attrs, body):
+    """Whether an inline block can become a static file as it is"""
+    if TEMPLATE_SYNTAX_RE.search(body) or not body.strip():
+        return False
+    attributes = {m.group(1).lower(): next((v for v in m.groups()[1:] if v is not None), '')
+                  for m in ATTRIBUTE_RE.finditer(attrs or '')}
+    if tag == 'style':
+        return set(attributes) <= {'type'}
+    # Scripts with src already are files; data blocks (application/json) are not code
+    return set(attributes) <= {'type'} and attributes.get('type', '').lower() in SCRIPT_TYPES
+
+
+def extract_inline_assets(source, stem):
+    """
+    Move a template's inline styles and scripts out to static files.
+
+    Args:
+        source: Template source
+        stem: Name the files are given, e.g. 'home' for home.css and home.js
+
+    Returns:
+        (new_source, files), files being a list of (static path, content)
+    """
+    files = []
+    used = {}
+
+    def replace(match):
+        tag, attrs, body = match.group(1).lower(), match.group(2), match.group(3)
+        if not _movable(tag, attrs, body):
+            return match.group(0)
+        ext = 'css' if tag == 'style' else 'js'
+        used[ext] = used.get(ext, 0) + 1
+        suffix = f'-{used[ext]}' if used[ext] > 1 else ''
+        path = f'{PAGE_ASSETS_DIR}/{stem}{suffix}.{ext}'
+        files.append((path, body.strip('\n') + '\n'))
+        if tag == 'style':
+            return f'<link rel="stylesheet" href="{{% static \'{path}\' %}}">'
+        return f'<script src="{{% static \'{path}\' %}}"></script>'
+
+    new_source = INLINE_BLOCK_RE.sub(replace, source)
+    if files and not any('static' in m.group(1).split() for m in LOAD_RE.finditer(new_source)):
+        # {% load %} must come after {% extends %}, which must come first
+        extends = EXTENDS_RE.search(new_source)
+        at = extends.end() if extends else 0
+        new_source = new_source[:at] + '{% load static %}\n' + new_source[at:]
+    return new_source, files
+
+
+def compress(content):
+    """
+    Return the encodings worth storing for a file's content.
+
+    Returns:
+        Dict mapping file suffix ('.gz', '.br') to the compressed bytes,
+        for those that shrink the content by at least a twentieth
+    """
+    if len(content) < MIN_COMPRESS_SIZE:
+        return {}
+    encoded = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['.br'] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in encoded.items() if len(data) < len(content) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also stores precompressed copies of the
+    hashed text files, for serve_static or the web server to send as-is.
+
+    With STATIC_MANIFEST_STRICT off (with DEBUG on, and in tests), files
+    collectstatic has not seen keep their plain names instead of failing to
+    render. In production a missing or stale collectstatic raises, rather
+    than linking unhashed files that browsers may keep for a year.
+    """
+
+    @property
+    def manifest_strict(self):
+        return getattr(settings, 'STATIC_MANIFEST_STRICT', True)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.manifest_strict:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSED_EXTENSIONS) or not self.exists(name):
+                continue
+            with self.open(name) as f:
+                content = f.read()
+            for suffix, data in compress(content).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self.save(name + suffix, ContentFile(data))
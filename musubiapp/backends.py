@@ -1,26 +1,26 @@
-# Create new file: musubiapp/backends.py
+# musubiapp/backends.py
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
-from .models import Customer
+from django.core.exceptions import PermissionDenied
+
+
+class CustomerProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's Customer profile in the same query
+    as the user, so role checks and request.customer cost nothing extra.
+    """
 
-class RoleBasedAuthBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(username=username)
-            if user.check_password(password):
-                # Check if user has a customer profile and is approved
-                try:
-                    customer = user.customer
-                    if customer.is_approved:
-                        return user
-                except Customer.DoesNotExist:
-                    # Allow users without customer profile (superusers)
-                    return user
-        except User.DoesNotExist:
-            return None
-    
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None and (username or kwargs.get(User.USERNAME_FIELD)) is not None:
+            # Stop here: ModelBackend, listed next for older sessions, would
+            # only hash the same wrong password again
+            raise PermissionDenied
+        return user
+
     def get_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
+            user = User._default_manager.select_related('customer').get(pk=user_id)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,92 @@
+# musubiapp/catalog.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CartItem, Product, Review
+
+# The product grids on the home page, the menu and search results are cached
+# as template fragments (see {% cache %} in home.html and product_list.html)
+# for CATALOG_CACHE_TIMEOUT seconds. Every fragment key includes the catalog
+# version, a counter bumped whenever a product, its stock, its images or its
+# reviews change, so a change shows on the next request and the old
+# fragments simply expire.
+#
+# Fragments are shared between users, so they may only depend on the
+# catalog and on the viewer's role. Anything about one user, such as the
+# cart badge, stays outside them.
+CATALOG_VERSION_KEY = 'musubiapp:catalog_version'
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600)
+
+
+def catalog_version():
+    """Return the current catalog version, starting a new one if it was evicted"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1, so fragments cached under an
+        # evicted version cannot be picked up again
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Not cached: the next catalog_version() starts a new version anyway
+        pass
+
+
+def catalog_changed():
+    """Call after changing products without save(), e.g. with update()"""
+    # After commit, so a page rendered mid-transaction cannot cache the old
+    # catalog under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+def viewer_role(request):
+    """The part of the viewer a catalog fragment may depend on"""
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    return request.customer.role if request.customer else 'user'
+
+
+def catalog_cache(request, *parts):
+    """
+    Return the context a template needs to cache a catalog fragment.
+
+    Args:
+        request: The request being rendered
+        parts: Anything else the fragment depends on, e.g. search filters
+
+    Returns:
+        Dict with catalog_cache_key and catalog_cache_timeout, for
+        {% cache catalog_cache_timeout name catalog_cache_key %}
+    """
+    return {
+        'catalog_cache_key': ':'.join(str(part) for part in (catalog_version(), viewer_role(request), *parts)),
+        'catalog_cache_timeout': _timeout(),
+    }
+
+
+def cart_count(request):
+    """Number of lines in the signed-in customer's cart, for the cart badge"""
+    if not request.customer:
+        return 0
+    return CartItem.objects.filter(cart__customer=request.customer).count()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def forget_catalog(sender, **kwargs):
+    catalog_changed()
@@ -0,0 +1,147 @@
+# musubiapp/checkout.py
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, When
+
+from .catalog import catalog_changed
+from .jobs import enqueue
+from .models import CartItem, InventoryLog, Order, OrderItem, Product
+from .rollups import record_new_order
+
+
+class InsufficientStock(Exception):
+    """Raised when a cart asks for more units of a product than are left"""
+
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(
+            f'Insufficient stock for {product.name}. Only {product.stock} available.'
+        )
+
+
+def _find_shortfall(products, quantities):
+    """Return the first (product, quantity) pair that cannot be fulfilled"""
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        if product.stock < quantity:
+            return product, quantity
+    return None
+
+
+def new_checkout_token():
+    """Issue a one-time token for a checkout form"""
+    return uuid.uuid4().hex
+
+
+def find_order_for_token(customer, checkout_token):
+    """Return the order already placed with this checkout token, if any"""
+    if not checkout_token:
+        return None
+    return Order.objects.filter(customer=customer, checkout_token=checkout_token).first()
+
+
+def place_order(user, customer, cart_items, checkout_token=None, job_payload=None, **order_fields):
+    """
+    Turn cart items into an order inside a single transaction.
+
+    The products in the cart are locked with one SELECT ... FOR UPDATE, stock
+    is decremented by one guarded UPDATE built from F() expressions, and the
+    order items and inventory logs are written with bulk_create. The number of
+    queries therefore stays the same no matter how many items are in the cart.
+
+    A checkout token makes the call idempotent: if another request already
+    placed an order with the same token, the unique index on
+    Order.checkout_token rolls this attempt back and the existing order is
+    returned instead.
+
+    Args:
+        user: User placing the order (recorded on the inventory logs)
+        customer: Customer the order belongs to
+        cart_items: CartItem objects with their products selected
+        checkout_token: One-time token from the checkout form (optional)
+        job_payload: Arguments of an order_placed job to queue with the order
+            (optional); it commits together with the order or not at all
+        **order_fields: Extra Order fields (total_amount, delivery_address, ...)
+
+    Returns:
+        (order, created) tuple, where created is False for a replayed token
+
+    Raises:
+        InsufficientStock: if any product has fewer units than requested.
+            Nothing is written in that case.
+    """
+    quantities = {}
+    for item in cart_items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    try:
+        return _place_order(user, customer, cart_items, quantities, checkout_token, job_payload, order_fields), True
+    except IntegrityError:
+        order = find_order_for_token(customer, checkout_token)
+        if order is None:
+            raise
+        return order, False
+
+
+def _place_order(user, customer, cart_items, quantities, checkout_token, job_payload, order_fields):
+    with transaction.atomic():
+        # Insert the order first so a replayed token conflicts on the unique
+        # index before any stock is touched
+        order = Order.objects.create(customer=customer, checkout_token=checkout_token, **order_fields)
+
+        # Lock in primary key order so concurrent checkouts cannot deadlock
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(id__in=quantities).order_by('id')
+        }
+        shortfall = _find_shortfall(products, quantities)
+        if shortfall:
+            raise InsufficientStock(*shortfall)
+
+        # The stock__gte guard keeps the decrement safe on backends where
+        # SELECT ... FOR UPDATE is a no-op (SQLite)
+        in_stock = Q()
+        for product_id, quantity in quantities.items():
+            in_stock |= Q(id=product_id, stock__gte=quantity)
+        updated = Product.objects.filter(in_stock).update(
+            stock=Case(
+                *[When(id=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()],
+                default=F('stock'),
+            )
+        )
+        if updated != len(quantities):
+            products = {product.id: product for product in Product.objects.filter(id__in=quantities)}
+            raise InsufficientStock(*_find_shortfall(products, quantities))
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=products[product_id],
+                quantity=quantity,
+                price=products[product_id].price,
+            )
+            for product_id, quantity in quantities.items()
+        ])
+
+        InventoryLog.objects.bulk_create([
+            InventoryLog(
+                product=products[product_id],
+                action='sold',
+                quantity=quantity,
+                previous_stock=products[product_id].stock,
+                new_stock=products[product_id].stock - quantity,
+                notes=f"Sold via order #{order.id}",
+                created_by=user,
+            )
+            for product_id, quantity in quantities.items()
+        ])
+
+        CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+        record_new_order(order.id)
+        catalog_changed()
+        if job_payload is not None:
+            enqueue('order_placed', order_id=order.id, **job_payload)
+
+    return order
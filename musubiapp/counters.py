@@ -0,0 +1,118 @@
+# musubiapp/counters.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Message, Notification
+
+# Per-user unread counters kept in the cache so badges and inboxes do not
+# need a COUNT(*) on every request. A missing key is recomputed from the
+# database on the next read; reconcile_unread_counts rebuilds all of them.
+NOTIFICATIONS = 'notifications'
+MESSAGES = 'messages'
+
+COUNTED_MODELS = {
+    NOTIFICATIONS: (Notification, 'user'),
+    MESSAGES: (Message, 'recipient'),
+}
+
+
+def counter_key(kind, user_id):
+    return f'musubiapp:unread:{kind}:{user_id}'
+
+
+def _timeout():
+    # Bounds drift when processes do not share a cache backend
+    return getattr(settings, 'UNREAD_COUNTER_TIMEOUT', 300)
+
+
+def count_unread(kind, user_id):
+    """Count a user's unread rows in the database"""
+    model, user_field = COUNTED_MODELS[kind]
+    return model.objects.filter(**{user_field: user_id, 'is_read': False}).count()
+
+
+def unread_count(kind, user_id):
+    """Return a user's unread count, recomputing it on a cache miss"""
+    key = counter_key(kind, user_id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread(kind, user_id)
+        cache.add(key, count, _timeout())
+    return count
+
+
+def unread_notification_count(user_id):
+    return unread_count(NOTIFICATIONS, user_id)
+
+
+def unread_message_count(user_id):
+    return unread_count(MESSAGES, user_id)
+
+
+def adjust_unread(kind, user_id, delta):
+    """
+    Add delta to a cached counter once the current transaction commits, so
+    rolled-back rows are never counted. Uncached counters are left to be
+    recomputed.
+    """
+    if delta:
+        transaction.on_commit(lambda: _adjust_unread(kind, user_id, delta))
+
+
+def _adjust_unread(kind, user_id, delta):
+    key = counter_key(kind, user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def reset_unread(kind, user_id, count=0):
+    transaction.on_commit(lambda: cache.set(counter_key(kind, user_id), count, _timeout()))
+
+
+def reconcile_unread_counts(user_ids):
+    """
+    Recompute the counters for these users from the database.
+
+    Returns a dict mapping each counter key to a (cached, actual) pair, where
+    cached is None if the counter was not in the cache.
+    """
+    counts = {}
+    for kind, (model, user_field) in COUNTED_MODELS.items():
+        unread = dict(
+            model.objects.filter(is_read=False, **{f'{user_field}__in': user_ids})
+            .values(user_field)
+            .annotate(count=Count('id'))
+            .values_list(user_field, 'count')
+        )
+        for user_id in user_ids:
+            counts[counter_key(kind, user_id)] = unread.get(user_id, 0)
+    cached = cache.get_many(counts)
+    cache.set_many(counts, _timeout())
+    return {key: (cached.get(key), count) for key, count in counts.items()}
+
+
+@receiver(post_save, sender=Message)
+def count_new_message(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread(MESSAGES, instance.recipient_id, 1)
+
+
+@receiver(post_delete, sender=Message)
+def uncount_deleted_message(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread(MESSAGES, instance.recipient_id, -1)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    # Also covers notifications removed by cascade, e.g. with their order
+    if not instance.is_read:
+        adjust_unread(NOTIFICATIONS, instance.user_id, -1)
@@ -0,0 +1,82 @@
+# musubiapp/dashboard.py
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Customer, Order, Product
+
+# Counters shown on the admin dashboard and admin profile. They are computed
+# with one aggregate query per table and cached for DASHBOARD_STATS_TIMEOUT
+# seconds; saving or deleting an order, product or customer clears them.
+DASHBOARD_STATS_CACHE_KEY = 'musubiapp:dashboard_stats'
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 60)
+
+
+def compute_dashboard_stats():
+    """Count products, orders and customers straight from the database"""
+    today = date.today()
+    completed = Q(status='completed')
+    placed_today = Q(created_at__date=today)
+
+    stats = Product.objects.aggregate(
+        total_products=Count('id'),
+        active_products=Count('id', filter=Q(is_active=True)),
+        out_of_stock=Count('id', filter=Q(stock=0)),
+        low_stock=Count('id', filter=Q(stock__lte=10, stock__gt=0)),
+    )
+    stats.update(Order.objects.aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='pending')),
+        processing_orders=Count('id', filter=Q(status='processing')),
+        completed_orders=Count('id', filter=completed),
+        total_revenue=Sum('total_amount', filter=completed),
+        today_orders=Count('id', filter=placed_today),
+        today_revenue=Sum('total_amount', filter=completed & placed_today),
+    ))
+    stats['total_customers'] = Customer.objects.filter(role='customer').count()
+
+    stats['total_revenue'] = stats['total_revenue'] or 0
+    stats['today_revenue'] = stats['today_revenue'] or 0
+    return stats
+
+
+def dashboard_stats():
+    """
+    Return the dashboard counters, from the cache when possible.
+
+    Returns:
+        Dict with total_products, active_products, out_of_stock, low_stock,
+        total_orders, pending_orders, processing_orders, completed_orders,
+        total_revenue, today_orders, today_revenue and total_customers
+    """
+    # The date is part of the key so today's figures restart at midnight
+    key = f'{DASHBOARD_STATS_CACHE_KEY}:{date.today().isoformat()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, _timeout())
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(f'{DASHBOARD_STATS_CACHE_KEY}:{date.today().isoformat()}')
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def forget_dashboard_stats(sender, **kwargs):
+    # After commit, so a dashboard rendered mid-transaction cannot cache the
+    # old figures again for the whole timeout
+    transaction.on_commit(invalidate_dashboard_stats)
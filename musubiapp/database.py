@@ -0,0 +1,17 @@
+# musubiapp/database.py
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# synchronous=NORMAL saves an fsync on every commit and is safe in WAL mode,
+# but with the rollback journal SQLite starts in, a power loss at the wrong
+# moment can corrupt the file. So it is only set on connections to a
+# database that enable_wal has switched to WAL; the rest keep FULL.
+
+
+@receiver(connection_created)
+def relax_sqlite_sync_under_wal(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # The raw connection, so the checks stay out of connection.queries
+    if connection.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+        connection.connection.execute('PRAGMA synchronous=NORMAL')
@@ -0,0 +1,137 @@
+# musubiapp/exports.py
+import csv
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import filter_activity_logs, filter_inventory_logs, filter_orders
+from .models import ActivityLog, InventoryLog, Order
+
+# CSV and JSON Lines exports of the admin lists. Rows are read with
+# .iterator() and written out a batch at a time as they are read, so memory
+# stays flat however many rows match; the admin_export view streams them
+# with StreamingHttpResponse and the export_data command writes them to a
+# file.
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Rows fetched from the database at a time
+CHUNK_SIZE = 2000
+
+
+class Export:
+    """
+    One exportable list.
+
+    Args:
+        model: Model whose rows are exported, oldest first
+        filter_rows: Function filtering a queryset by the list page's GET
+            parameters (see musubiapp.filters)
+        columns: (column name, field lookup) pairs
+    """
+
+    def __init__(self, model, filter_rows, columns):
+        self.model = model
+        self.filter_rows = filter_rows
+        self.columns = columns
+
+    def rows(self, params, chunk_size=CHUNK_SIZE):
+        """Tuples of column values for the rows matching params"""
+        queryset = self.filter_rows(self.model.objects.all(), params).order_by('created_at', 'id')
+        return queryset.values_list(*[lookup for _, lookup in self.columns]).iterator(chunk_size=chunk_size)
+
+    def stream(self, params, fmt='csv', chunk_size=CHUNK_SIZE):
+        """
+        The export as chunks of text, each holding up to chunk_size rows.
+
+        Args:
+            params: GET parameters of the list page, filtering the rows
+            fmt: A key of FORMATS
+        """
+        names = [name for name, _ in self.columns]
+        lines = (csv_lines if fmt == 'csv' else jsonl_lines)(names, self.rows(params, chunk_size))
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= chunk_size:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+
+
+class _Line:
+    """File-like object for csv.writer that hands back each row it writes"""
+
+    def write(self, value):
+        return value
+
+
+# Text starting with one of these is run as a formula by spreadsheet apps,
+# so customer-entered values like "=HYPERLINK(...)" are prefixed with a quote
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(names, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def jsonl_lines(names, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+EXPORTS = {
+    'orders': Export(Order, filter_orders, [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('customer', 'customer__user__username'),
+        ('email', 'customer__user__email'),
+        ('status', 'status'),
+        ('payment_method', 'payment_method'),
+        ('payment_status', 'payment_status'),
+        ('total_amount', 'total_amount'),
+        ('discount_amount', 'discount_amount'),
+        ('delivery_address', 'delivery_address'),
+        ('notes', 'notes'),
+        ('updated_at', 'updated_at'),
+    ]),
+    'inventory-logs': Export(InventoryLog, filter_inventory_logs, [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('product_id', 'product_id'),
+        ('product', 'product__name'),
+        ('action', 'action'),
+        ('quantity', 'quantity'),
+        ('previous_stock', 'previous_stock'),
+        ('new_stock', 'new_stock'),
+        ('notes', 'notes'),
+        ('created_by', 'created_by__username'),
+    ]),
+    'activity-log': Export(ActivityLog, filter_activity_logs, [
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('user', 'user__username'),
+        ('action', 'action'),
+        ('entity_type', 'entity_type'),
+        ('entity_id', 'entity_id'),
+        ('description', 'description'),
+        ('ip_address', 'ip_address'),
+        ('user_agent', 'user_agent'),
+    ]),
+}
@@ -0,0 +1,58 @@
+# musubiapp/filters.py
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+# Filters of the admin lists, taking the list page's GET parameters. The
+# HTML views and the exports (musubiapp.exports) both use them, so an
+# export holds exactly the rows its page lists.
+
+
+def start_of_day(value, days_after=0):
+    """Aware datetime at which a YYYY-MM-DD day begins, or None if value is not a date"""
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        return None
+    return timezone.make_aware(datetime.combine(day + timedelta(days=days_after), time.min))
+
+
+def filter_orders(orders, params):
+    """Filter by ?status="""
+    status = params.get('status')
+    if status:
+        orders = orders.filter(status=status)
+    return orders
+
+
+def filter_inventory_logs(logs, params):
+    """Filter by ?product= (a product ID) and ?action="""
+    product_id = params.get('product')
+    if product_id and product_id.isdigit():
+        logs = logs.filter(product_id=product_id)
+    action = params.get('action')
+    if action:
+        logs = logs.filter(action=action)
+    return logs
+
+
+def filter_activity_logs(logs, params):
+    """Filter by ?action=, ?entity=, ?user= (part of a username), ?date_from= and ?date_to="""
+    action = params.get('action')
+    if action:
+        logs = logs.filter(action=action)
+    entity = params.get('entity')
+    if entity:
+        logs = logs.filter(entity_type=entity)
+    username = params.get('user')
+    if username:
+        logs = logs.filter(user__username__icontains=username)
+
+    # Filter on created_at itself rather than its date, so the indexes apply
+    start = start_of_day(params.get('date_from') or '')
+    if start:
+        logs = logs.filter(created_at__gte=start)
+    end = start_of_day(params.get('date_to') or '', days_after=1)
+    if end:
+        logs = logs.filter(created_at__lt=end)
+    return logs
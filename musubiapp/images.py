@@ -0,0 +1,158 @@
+# musubiapp/images.py
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from .catalog import catalog_changed
+
+logger = logging.getLogger(__name__)
+
+# Uploaded images are served to the menu as fixed-width JPEG and WebP copies
+# instead of the original upload. The copies are named after a hash of the
+# original's content, e.g.
+#
+#     derivatives/products/spam_musubi.3f2a9c1b20de.640w.webp
+#
+# so they can be cached forever and never go stale. Each model keeps a
+# <field>_derivatives JSON field recording which copies exist for which
+# upload; until they do, the template tags fall back to the original.
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+_executor = None
+
+
+def derivative_widths():
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [320, 480, 640, 960]))
+
+
+def derivative_name(source, digest, width, ext):
+    """Storage name of one resized copy of source"""
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join('derivatives', directory, f'{stem}.{digest}.{width}w.{ext}')
+
+
+def current_derivatives(fieldfile, derivatives):
+    """
+    The derivatives recorded for an image, if they belong to its current file.
+
+    Returns:
+        (digest, widths), or None when the copies are missing or were made
+        from a previous upload
+    """
+    if not fieldfile or not derivatives or derivatives.get('source') != fieldfile.name:
+        return None
+    return derivatives['digest'], derivatives['widths']
+
+
+def _encode(image, ext):
+    options = dict(FORMATS[ext])
+    if options['format'] == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def make_derivatives(fieldfile):
+    """
+    Write the resized copies of an image to its storage.
+
+    Copies that already exist are kept, so running this again for the same
+    upload is cheap.
+
+    Returns:
+        Dict for the <field>_derivatives JSON field
+    """
+    with fieldfile.open('rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    storage = fieldfile.storage
+
+    with Image.open(BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        # Never upscale: widths past the original collapse into one copy at
+        # the original width
+        widths = sorted({min(width, original.width) for width in derivative_widths()})
+        for width in widths:
+            names = {ext: derivative_name(fieldfile.name, digest, width, ext) for ext in FORMATS}
+            missing = [ext for ext, name in names.items() if not storage.exists(name)]
+            if not missing:
+                continue
+            height = max(1, round(original.height * width / original.width))
+            resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            for ext in missing:
+                storage.save(names[ext], ContentFile(_encode(resized, ext)))
+
+    return {'source': fieldfile.name, 'digest': digest, 'widths': widths}
+
+
+def build_derivatives(model_label, pk, field_name):
+    """
+    Make the derivatives of one instance's image and record them on it.
+
+    Returns:
+        True if derivatives were recorded
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    fieldfile = getattr(instance, field_name, None)
+    if not fieldfile:
+        return False
+    derivatives = make_derivatives(fieldfile)
+    # Only if the image was not replaced while the copies were being made
+    updated = model.objects.filter(pk=pk, **{field_name: fieldfile.name}).update(
+        **{f'{field_name}_derivatives': derivatives}
+    )
+    if updated:
+        # The menu lists the new copies in its cached srcsets
+        catalog_changed()
+    return bool(updated)
+
+
+def _build_in_background(model_label, pk, field_name):
+    try:
+        build_derivatives(model_label, pk, field_name)
+    except Exception:
+        logger.exception('Could not build image derivatives for %s %s', model_label, pk)
+    finally:
+        connection.close()
+
+
+def _run(model_label, pk, field_name):
+    global _executor
+    if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        build_derivatives(model_label, pk, field_name)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    _executor.submit(_build_in_background, model_label, pk, field_name)
+
+
+def queue_derivatives(instance, field_name):
+    """
+    Build the derivatives of instance's image once the transaction commits.
+
+    The work runs on a background thread unless IMAGE_DERIVATIVES_ASYNC is
+    off, so the request that saved the image does not wait for it.
+
+    Args:
+        instance: Saved model instance, e.g. a Product
+        field_name: Name of its ImageField, e.g. 'image'
+    """
+    if getattr(instance, field_name):
+        label = instance._meta.label
+        transaction.on_commit(lambda: _run(label, instance.pk, field_name))
@@ -0,0 +1,178 @@
+# musubiapp/jobs.py
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+# A small job queue kept in the Job table. Requests queue work with
+# enqueue(), which only inserts a row, in the same transaction as the
+# change that caused it; run_worker claims due jobs, runs the function
+# registered under their name and deletes them once they succeed. Failed
+# attempts are retried with exponential backoff (see the JOB_* settings).
+#
+# Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the database has it
+# (PostgreSQL, MySQL 8), so workers never wait on each other's rows.
+# SQLite has no row locks; there each job is claimed with a conditional
+# UPDATE that only one worker can win.
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(name):
+    """
+    Register a function as the task run for jobs queued under name.
+
+    Usage:
+        @task('send_email')
+        def send_email(subject, message, recipient_list):
+            ...
+
+    The job's payload is passed as keyword arguments, so it must be JSON
+    serialisable: pass IDs rather than model instances.
+    """
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def enqueue(name, delay=0, max_attempts=None, **payload):
+    """
+    Queue the task registered under name to run with payload.
+
+    Args:
+        name: Registered task name
+        delay: Seconds before the job may run
+        max_attempts: Runs before giving up, default JOB_MAX_ATTEMPTS
+
+    Returns:
+        The Job, or None when JOBS_RUN_INLINE ran it instead
+    """
+    if name not in _tasks:
+        raise KeyError(f'No task registered as {name!r}')
+    if getattr(settings, 'JOBS_RUN_INLINE', False):
+        transaction.on_commit(lambda: _tasks[name](**payload))
+        return None
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5),
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait after a job's attempts-th failed run"""
+    base = getattr(settings, 'JOB_RETRY_DELAY', 10)
+    return min(base * 2 ** (attempts - 1), getattr(settings, 'JOB_RETRY_MAX_DELAY', 3600))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def claim_jobs(worker, limit=1):
+    """
+    Mark up to limit due jobs as running by worker.
+
+    Returns:
+        The claimed jobs, oldest first
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    claim = {'status': Job.RUNNING, 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(ready.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(**claim)
+    else:
+        jobs = [
+            job for job in ready[:limit]
+            if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(**claim)
+        ]
+
+    for job in jobs:
+        job.status, job.locked_by, job.locked_at = Job.RUNNING, worker, now
+        job.attempts += 1
+    return jobs
+
+
+def run_job(job):
+    """
+    Run a claimed job: delete it if it succeeds, otherwise queue it again
+    after a delay, or mark it failed once it has used up its attempts.
+
+    Returns:
+        True if the job succeeded
+    """
+    try:
+        func = _tasks[job.name]
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s (%s) failed for good after %d attempts:\n%s', job.pk, job.name, job.attempts, error)
+            changes = {'status': Job.FAILED}
+        else:
+            logger.warning('Job %s (%s) failed, attempt %d of %d', job.pk, job.name, job.attempts, job.max_attempts)
+            changes = {'status': Job.QUEUED, 'run_at': timezone.now() + timedelta(seconds=retry_delay(job.attempts))}
+        Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            locked_by='', locked_at=None, last_error=error, **changes
+        )
+        return False
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).delete()
+    return True
+
+
+def release_stale_jobs():
+    """
+    Queue again the jobs whose worker has held them longer than
+    JOB_LOCK_TIMEOUT, taking the worker to have died.
+
+    Returns:
+        Number of jobs released
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 600))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(
+        status=Job.QUEUED, locked_by='', locked_at=None,
+    )
+
+
+def work(worker=None, batch_size=10, idle_sleep=1.0, burst=False, should_stop=lambda: False):
+    """
+    Claim and run jobs until should_stop() returns True, or, with burst,
+    until no job is due.
+
+    Returns:
+        (succeeded, failed) counts
+    """
+    worker = worker or worker_name()
+    succeeded = failed = 0
+    release_stale_jobs()
+    while not should_stop():
+        jobs = claim_jobs(worker, batch_size)
+        if not jobs:
+            if burst:
+                break
+            release_stale_jobs()
+            time.sleep(idle_sleep)
+            continue
+        for job in jobs:
+            if run_job(job):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
@@ -0,0 +1,633 @@
+# musubiapp/loaddata.py
+import contextlib
+import random
+import time as clock
+from array import array
+from bisect import bisect
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog import catalog_changed
+from .models import (
+    ActivityLog, Customer, InventoryLog, Message, Notification, Order, OrderItem, Product, Reservation,
+    ReservationItem, Review,
+)
+from .ratings import SUMMARY_FIELDS, compute_rating_summaries
+from .rollups import rebuild_sales_rollup
+
+# Synthetic data at production scale, for benchmarks and for reproducing
+# slow pages locally (see the generate_load_data command). The same seed,
+# volumes and end date always give the same rows.
+#
+# The data is shaped like a growing shop's: a few products and customers
+# account for most orders, orders cluster around lunch, dinner and
+# weekends and grow over the window, old orders are completed or
+# cancelled while the last day's are still pending, and reviews lean to
+# five stars. Rows are built in memory a chunk at a time and written with
+# bulk_create, one transaction per chunk, so signals do not fire; the
+# rating summaries, sales rollup and catalog version are brought up to
+# date at the end instead.
+#
+# At scale 1 this is about 1.1 million rows; scale 10 is about 11 million.
+VOLUMES = {
+    'customers': 10_000,
+    'products': 500,
+    'orders': 100_000,
+    'reservations': 10_000,
+    'reviews': 30_000,
+    'messages': 20_000,
+    'notifications': 200_000,
+    'activity_logs': 500_000,
+    'inventory_logs': 50_000,
+}
+
+# Relative traffic per hour of the day and per weekday (Monday first)
+HOUR_WEIGHTS = [1, 0.5, 0.2, 0.2, 0.2, 0.5, 2, 5, 7, 6, 9, 16, 18, 12, 7, 6, 8, 13, 16, 14, 9, 5, 3, 2]
+WEEKDAY_WEIGHTS = [0.9, 0.85, 0.9, 0.95, 1.15, 1.35, 1.2]
+# The last day of the window sees this many times the orders of the first
+GROWTH = 3
+
+DELIVERY_FEE = Decimal('50.00')
+
+FIRST_NAMES = [
+    'Maria', 'Jose', 'Angel', 'Mark', 'John', 'Kimberly', 'Christian', 'Princess', 'Joshua', 'Nicole',
+    'Kenji', 'Leilani', 'Kai', 'Noelani', 'Mika', 'Paolo', 'Andrea', 'Miguel', 'Bea', 'Carlo',
+]
+LAST_NAMES = [
+    'Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Ramos', 'Aquino', 'Tanaka', 'Kahale',
+    'Villanueva', 'Castillo', 'Dela Cruz', 'Fernandez', 'Lopez', 'Nakamura', 'Torres', 'Flores',
+]
+STREETS = ['Mabini', 'Rizal', 'Bonifacio', 'Luna', 'Del Pilar', 'Kalaw', 'Aguinaldo', 'Katipunan', 'Shaw', 'Ortigas']
+CITIES = ['Quezon City', 'Makati', 'Pasig', 'Taguig', 'Manila', 'Mandaluyong', 'San Juan', 'Marikina', 'Parañaque']
+
+# (category, fillings, base price)
+MENU = [
+    ('spam', ['Classic Spam', 'Spam & Egg', 'Teriyaki Spam', 'Spicy Spam', 'Spam & Cheese', 'Garlic Spam'], 45),
+    ('chicken', ['Chicken Teriyaki', 'Chicken Katsu', 'Chicken Adobo', 'Karaage', 'Chicken Sisig'], 60),
+    ('vegetarian', ['Tamago', 'Tofu Teriyaki', 'Shiitake', 'Kimchi Veggie', 'Avocado Furikake'], 50),
+    ('special', ['Unagi', 'Tuna Mayo', 'Salmon Furikake', 'Bacon Kimchi', 'Ube Spam', 'Family Box'], 90),
+]
+STYLES = ['', 'Grilled', 'Double', 'Mini', 'Jumbo', 'Hawaiian', 'Furikake', 'Shoyu Glazed', 'Crispy', 'Loaded']
+
+REVIEW_TEXT = {
+    1: ('Disappointed', 'Arrived cold and the rice was dry.'),
+    2: ('Not great', 'Too salty for me and the portion was small.'),
+    3: ('Okay', 'Decent musubi but nothing special.'),
+    4: ('Really good', 'Tasty and filling, delivery was a bit slow.'),
+    5: ('Ono!', 'Tastes just like back home. Will order again!'),
+}
+RATING_WEIGHTS = [9, 5, 9, 22, 55]
+TAGLINES = ['A customer favorite!', 'Perfect for breakfast.', 'Great for sharing.', 'Made fresh every morning.', '']
+
+MESSAGE_SUBJECTS = [
+    'Question about my order', 'Delivery time', 'Bulk order for an event', 'Allergy information',
+    'Change of address', 'Thank you!', 'Missing item', 'Reservation for a party',
+]
+USER_AGENTS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; SM-A546E) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15',
+]
+
+# (action, entity type, weight) for activity logged by customers and by staff
+CUSTOMER_ACTIVITY = [
+    ('view', 'product', 45), ('login', 'system', 15), ('logout', 'system', 8), ('create', 'order', 12),
+    ('create', 'reservation', 4), ('update', 'customer', 4), ('create', 'message', 3), ('view', 'order', 9),
+]
+STAFF_ACTIVITY = [
+    ('update', 'order', 40), ('update', 'product', 12), ('create', 'inventory', 15), ('view', 'system', 10),
+    ('login', 'system', 10), ('logout', 'system', 5), ('update', 'reservation', 6), ('delete', 'product', 2),
+]
+
+ORDER_NOTIFICATIONS = {
+    'preparing': ['order_preparing'],
+    'shipping': ['order_preparing', 'order_shipping'],
+    'completed': ['order_preparing', 'order_shipping', 'order_completed'],
+    'cancelled': ['order_cancelled'],
+}
+NOTIFICATION_TEXT = {
+    'new_order': ('New Order Received', 'New order #{id} from {username}.'),
+    'order_preparing': ('Order is Being Prepared', 'Your order #{id} is now being prepared!'),
+    'order_shipping': ('Order is On The Way', 'Your order #{id} is now out for delivery! It should arrive soon.'),
+    'order_completed': ('Order Completed', 'Your order #{id} has been completed. Thank you for your purchase!'),
+    'order_cancelled': ('Order Cancelled', 'Your order #{id} has been cancelled.'),
+    'new_reservation': ('New Reservation', 'New reservation #{id} from {username}.'),
+    'reservation_confirmed': ('Reservation Confirmed', 'Your reservation #{id} has been confirmed!'),
+    'reservation_cancelled': ('Reservation Cancelled', 'Your reservation #{id} has been cancelled.'),
+}
+
+
+def volumes(scale=1.0, **counts):
+    """
+    Return the rows to generate per kind: VOLUMES times scale, with any
+    count given (not None) taking precedence.
+    """
+    result = {name: round(count * scale) for name, count in VOLUMES.items()}
+    result.update((name, count) for name, count in counts.items() if count is not None)
+    unknown = set(result) - set(VOLUMES)
+    if unknown:
+        raise ValueError(f'Unknown volumes: {", ".join(sorted(unknown))}')
+    return result
+
+
+@contextlib.contextmanager
+def explicit_timestamps(*models):
+    """Let auto_now and auto_now_add fields of models keep the values set on them"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _popularity(count, exponent):
+    """Cumulative Zipf weights: rank 1 is picked about 2**exponent times as often as rank 2"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def _pick_weighted(rng, choices):
+    """Pick from (..., weight) tuples"""
+    return rng.choices(choices, weights=[choice[-1] for choice in choices])[0]
+
+
+class LoadDataGenerator:
+    """
+    Writes one set of synthetic rows; see generate_load_data().
+
+    IDs and timestamps of the rows made so far are kept in arrays, so later
+    rows (reviews, notifications, logs) can refer to them without queries.
+    """
+
+    def __init__(self, counts, seed=0, days=365, until=None, prefix='load', password='musubi', chunk_size=10_000, log=None):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.password = password
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        until = until or timezone.localdate()
+        tz = timezone.get_current_timezone()
+        self.end = timezone.make_aware(datetime.combine(until, time.min), tz)
+        self.start = self.end - timedelta(days=days)
+        self.days = days
+        self.created = {}
+
+    def timeline(self, count, start=None, days=None):
+        """Yield count datetimes in order over the window, busier at meal times, weekends and later on"""
+        start = start or self.start
+        days = days or self.days
+        weights = [
+            (1 + (GROWTH - 1) * day / max(days - 1, 1)) * WEEKDAY_WEIGHTS[(start + timedelta(days=day)).weekday()]
+            for day in range(days)
+        ]
+        total = sum(weights)
+        hours = list(accumulate(HOUR_WEIGHTS))
+        emitted = 0
+        expected = 0
+        for day, weight in enumerate(weights):
+            expected += count * weight / total
+            n = count - emitted if day == days - 1 else round(expected) - emitted
+            emitted += n
+            seconds = sorted(
+                hour * 3600 + self.rng.randrange(3600)
+                for hour in self.rng.choices(range(24), cum_weights=hours, k=n)
+            )
+            midnight = start + timedelta(days=day)
+            for second in seconds:
+                yield midnight + timedelta(seconds=second)
+
+    def chunks(self, count, **kwargs):
+        moments = self.timeline(count, **kwargs)
+        while batch := list(islice(moments, self.chunk_size)):
+            yield batch
+
+    def write(self, label, model, rows):
+        model.objects.bulk_create(rows, batch_size=self.chunk_size)
+        self.created[label] = self.created.get(label, 0) + len(rows)
+        return rows
+
+    def run(self):
+        steps = [
+            ('customers', self.make_customers),
+            ('products', self.make_products),
+            ('orders', self.make_orders),
+            ('reservations', self.make_reservations),
+            ('inventory_logs', self.make_inventory_logs),
+            ('messages', self.make_messages),
+            ('notifications', self.make_notifications),
+            ('activity_logs', self.make_activity_logs),
+        ]
+        with explicit_timestamps(Customer, Product, Order, Reservation, Review, InventoryLog, Message, Notification):
+            for name, step in steps:
+                started = clock.perf_counter()
+                before = sum(self.created.values())
+                step()
+                rows = sum(self.created.values()) - before
+                self.log(f'{name}: {rows} rows in {clock.perf_counter() - started:.1f}s')
+        self.refresh_summaries()
+        return self.created
+
+    def address(self, index):
+        return f'{index % 300 + 1} {STREETS[index % len(STREETS)]} St., {CITIES[index // 7 % len(CITIES)]}'
+
+    def make_customers(self):
+        rng = self.rng
+        hashed = make_password(self.password)
+        # One admin, then a staff member per thousand customers
+        staff = max(1, self.counts['customers'] // 1000)
+        users = [
+            User(username=f'{self.prefix}-staff-{i}', password=hashed, first_name=rng.choice(FIRST_NAMES),
+                 last_name=rng.choice(LAST_NAMES), email=f'{self.prefix}-staff-{i}@example.com',
+                 is_staff=True, is_superuser=i == 0, date_joined=self.start - timedelta(days=self.days))
+            for i in range(staff)
+        ]
+        self.write('users', User, users)
+        self.write('customers', Customer, [
+            Customer(user=user, role='admin' if i == 0 else 'staff', phone=f'0917{rng.randrange(10 ** 7):07d}',
+                     created_at=user.date_joined)
+            for i, user in enumerate(users)
+        ])
+        self.staff_user_ids = [user.id for user in users]
+
+        self.customer_ids = array('q')
+        self.customer_user_ids = array('q')
+        index = 0
+        # Customers signed up during the window before the orders start
+        for moments in self.chunks(self.counts['customers'], start=self.start - timedelta(days=self.days)):
+            with transaction.atomic():
+                users = []
+                for moment in moments:
+                    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                    username = f'{self.prefix}-customer-{index + len(users)}'
+                    users.append(User(username=username, password=hashed, first_name=first, last_name=last,
+                                      email=f'{username}@example.com', date_joined=moment))
+                self.write('users', User, users)
+                customers = self.write('customers', Customer, [
+                    Customer(user=user, role='customer', phone=f'09{rng.randrange(10 ** 9):09d}',
+                             address=self.address(index + i), created_at=user.date_joined)
+                    for i, user in enumerate(users)
+                ])
+            self.customer_ids.extend(customer.id for customer in customers)
+            self.customer_user_ids.extend(user.id for user in users)
+            index += len(users)
+        # Who orders most is unrelated to who signed up first
+        order = list(range(len(self.customer_ids)))
+        rng.shuffle(order)
+        self.customer_rank = order
+        self.customer_weights = _popularity(len(order), 0.9)
+
+    def pick_customer(self):
+        """Return the index of a customer, regulars far more often than others"""
+        return self.rng.choices(self.customer_rank, cum_weights=self.customer_weights)[0]
+
+    def make_products(self):
+        rng = self.rng
+        products = []
+        for i in range(self.counts['products']):
+            category, fillings, base = MENU[i % len(MENU)]
+            filling = fillings[i // len(MENU) % len(fillings)]
+            style = STYLES[i // (len(MENU) * 5) % len(STYLES)]
+            name = f'{style} {filling} Musubi'.strip()
+            if i >= len(MENU) * 5 * len(STYLES):
+                name += f' No. {i // (len(MENU) * 5 * len(STYLES)) + 1}'
+            price = Decimal(base + 5 * rng.randrange(0, 8))
+            products.append(Product(
+                name=name,
+                description=f'{filling} on seasoned rice, wrapped in nori. {rng.choice(TAGLINES)}',
+                price=price,
+                bundle_price=(price * Decimal('0.9')).quantize(Decimal('1')) if rng.random() < 0.1 else None,
+                stock=rng.randrange(20, 200),
+                category=category,
+                is_active=rng.random() < 0.95,
+                created_at=self.start - timedelta(days=rng.randrange(1, 365)),
+            ))
+        with transaction.atomic():
+            for start in range(0, len(products), self.chunk_size):
+                self.write('products', Product, products[start:start + self.chunk_size])
+        self.product_ids = [product.id for product in products]
+        self.prices = {product.id: product.price for product in products}
+        self.stock = {product.id: product.stock for product in products}
+        active = [product.id for product in products if product.is_active]
+        rng.shuffle(active)
+        self.active_products = active
+        self.product_weights = _popularity(len(active), 1.1)
+
+    def pick_products(self, count):
+        """Return count different products, bestsellers far more often than others"""
+        count = min(count, len(self.active_products))
+        picked = []
+        while len(picked) < count:
+            product_id = self.rng.choices(self.active_products, cum_weights=self.product_weights)[0]
+            if product_id not in picked:
+                picked.append(product_id)
+        return picked
+
+    def order_status(self, age):
+        if age < timedelta(hours=1):
+            return 'pending'
+        if age < timedelta(hours=3):
+            return self.rng.choice(['pending', 'preparing'])
+        if age < timedelta(days=1):
+            return self.rng.choices(['preparing', 'shipping', 'completed', 'cancelled'], weights=[2, 3, 10, 1])[0]
+        return self.rng.choices(['completed', 'cancelled'], weights=[92, 8])[0]
+
+    def make_orders(self):
+        rng = self.rng
+        count = self.counts['orders']
+        if count and not (self.customer_ids and self.active_products):
+            raise ValueError('Orders need customers and active products')
+        reviewed = set(rng.sample(range(count), min(self.counts['reviews'], count)))
+        has_completed = bytearray(len(self.customer_ids))
+        self.order_ids = array('q')
+        self.order_customers = array('q')
+        self.order_times = array('d')
+        self.order_statuses = []
+        index = 0
+        for moments in self.chunks(count):
+            orders, customers, lines, reviews = [], [], [], []
+            for moment in moments:
+                customer = self.pick_customer()
+                customers.append(customer)
+                products = self.pick_products(rng.choices([1, 2, 3, 4, 5], weights=[45, 28, 14, 8, 5])[0])
+                quantities = rng.choices([1, 2, 3, 4, 6], weights=[55, 25, 10, 6, 4], k=len(products))
+                subtotal = sum(self.prices[product] * quantity for product, quantity in zip(products, quantities))
+                status = 'completed' if index in reviewed else self.order_status(self.end - moment)
+                # First-time customer discount, as at checkout
+                discount = Decimal('0.00')
+                if not has_completed[customer]:
+                    discount = min((subtotal * Decimal('0.10')).quantize(Decimal('0.01')), Decimal('200.00'))
+                if status == 'completed':
+                    has_completed[customer] = 1
+                orders.append(Order(
+                    customer_id=self.customer_ids[customer],
+                    total_amount=subtotal + DELIVERY_FEE - discount,
+                    discount_amount=discount,
+                    discount_details='First-time order 10% discount (max ₱200)' if discount else '',
+                    status=status,
+                    delivery_address=self.address(customer),
+                    created_at=moment,
+                    updated_at=moment if status == 'pending' else min(moment + timedelta(hours=rng.uniform(0.5, 4)), self.end),
+                ))
+                lines.append((products, quantities))
+                if index in reviewed:
+                    reviews.append((len(orders) - 1, customer, products[0]))
+                index += 1
+
+            with transaction.atomic():
+                self.write('orders', Order, orders)
+                self.write('order_items', OrderItem, [
+                    OrderItem(order=order, product_id=product, quantity=quantity, price=self.prices[product])
+                    for order, (products, quantities) in zip(orders, lines)
+                    for product, quantity in zip(products, quantities)
+                ])
+                self.write('reviews', Review, [self.review(orders[position], customer, product)
+                                               for position, customer, product in reviews])
+            self.order_ids.extend(order.id for order in orders)
+            self.order_customers.extend(customers)
+            self.order_times.extend(order.created_at.timestamp() for order in orders)
+            self.order_statuses.extend(order.status for order in orders)
+
+    def review(self, order, customer, product):
+        rng = self.rng
+        rating = rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0]
+        title, comment = REVIEW_TEXT[rating]
+        moment = min(order.created_at + timedelta(days=rng.uniform(0.2, 10)), self.end - timedelta(seconds=1))
+        return Review(
+            product_id=product, customer_id=self.customer_ids[customer], order=order, rating=rating,
+            title=title, comment=comment, is_verified_purchase=True, is_approved=rng.random() < 0.96,
+            helpful_count=int(rng.expovariate(0.5)), created_at=moment, updated_at=moment,
+        )
+
+    def reservation_status(self, reservation_date):
+        if reservation_date < timezone.localdate(self.end):
+            return self.rng.choices(['completed', 'cancelled'], weights=[82, 18])[0]
+        return self.rng.choices(['pending', 'confirmed', 'cancelled'], weights=[40, 52, 8])[0]
+
+    def make_reservations(self):
+        rng = self.rng
+        count = self.counts['reservations']
+        if count and not self.customer_ids:
+            raise ValueError('Reservations need customers')
+        self.reservation_ids = array('q')
+        self.reservation_customers = array('q')
+        self.reservation_times = array('d')
+        self.reservation_statuses = []
+        for moments in self.chunks(count):
+            reservations, customers, lines = [], [], []
+            for moment in moments:
+                customer = self.pick_customer()
+                day = timezone.localdate(moment) + timedelta(days=rng.choices(range(1, 22), weights=[22 - d for d in range(1, 22)])[0])
+                # Half of the reservations pre-order food for the table
+                products = self.pick_products(rng.randint(1, 3)) if self.active_products and rng.random() < 0.5 else []
+                guests = rng.choices(range(1, 11), weights=[6, 30, 16, 22, 8, 8, 3, 4, 1, 2])[0]
+                reservations.append(Reservation(
+                    customer_id=self.customer_ids[customer],
+                    reservation_date=day,
+                    reservation_time=time(rng.randint(10, 20), rng.choice([0, 30])),
+                    number_of_guests=guests,
+                    special_requests=rng.choice(['Birthday celebration', 'High chair please', 'Window seat', 'No pork for one guest']) if rng.random() < 0.2 else None,
+                    delivery_address=self.address(customer) if products and rng.random() < 0.5 else None,
+                    status=self.reservation_status(day),
+                    created_at=moment,
+                    updated_at=moment,
+                ))
+                customers.append(customer)
+                lines.append(products)
+            with transaction.atomic():
+                self.write('reservations', Reservation, reservations)
+                self.write('reservation_items', ReservationItem, [
+                    ReservationItem(reservation=reservation, product_id=product,
+                                    quantity=rng.randint(1, reservation.number_of_guests * 2), price=self.prices[product])
+                    for reservation, products in zip(reservations, lines)
+                    for product in products
+                ])
+            self.reservation_ids.extend(reservation.id for reservation in reservations)
+            self.reservation_customers.extend(customers)
+            self.reservation_times.extend(reservation.created_at.timestamp() for reservation in reservations)
+            self.reservation_statuses.extend(reservation.status for reservation in reservations)
+
+    def make_inventory_logs(self):
+        rng = self.rng
+        count = self.counts['inventory_logs']
+        if count and not self.active_products:
+            raise ValueError('Inventory logs need active products')
+        for moments in self.chunks(count):
+            logs = []
+            for moment in moments:
+                product = self.pick_products(1)[0]
+                previous = self.stock[product]
+                action = rng.choices(['sold', 'stock_in', 'stock_out', 'adjustment'], weights=[70, 20, 4, 6])[0]
+                quantity = {'sold': rng.randint(1, 6), 'stock_out': rng.randint(1, 10)}.get(action, 0)
+                if quantity > previous:
+                    action = 'stock_in'
+                if action == 'stock_in':
+                    quantity = 10 * rng.randint(5, 30)
+                    change = quantity
+                elif action == 'adjustment':
+                    change = max(rng.randint(-5, 5), -previous)
+                    quantity = abs(change)
+                else:
+                    change = -quantity
+                self.stock[product] = previous + change
+                logs.append(InventoryLog(
+                    product_id=product, action=action, quantity=quantity, previous_stock=previous,
+                    new_stock=previous + change, notes={'stock_out': 'Spoiled', 'adjustment': 'Stock count'}.get(action),
+                    created_by_id=rng.choice(self.staff_user_ids), created_at=moment,
+                ))
+            with transaction.atomic():
+                self.write('inventory_logs', InventoryLog, logs)
+
+    def make_messages(self):
+        rng = self.rng
+        count = self.counts['messages']
+        if count and not self.customer_ids:
+            raise ValueError('Messages need customers')
+        for moments in self.chunks(count):
+            messages = []
+            for moment in moments:
+                customer = self.customer_user_ids[self.pick_customer()]
+                staff = rng.choice(self.staff_user_ids)
+                # Customers write in; staff answer
+                sender, recipient = (customer, staff) if rng.random() < 0.55 else (staff, customer)
+                subject = rng.choice(MESSAGE_SUBJECTS)
+                messages.append(Message(
+                    sender_id=sender, recipient_id=recipient, subject=subject,
+                    message=f'{subject}. Salamat po!' if sender == customer else f'Re: {subject}. We are on it!',
+                    is_read=rng.random() < (0.95 if self.end - moment > timedelta(days=3) else 0.5),
+                    created_at=moment,
+                ))
+            with transaction.atomic():
+                self.write('messages', Message, messages)
+
+    def notification(self, moment):
+        """Return a notification about an order or reservation made shortly before moment"""
+        rng = self.rng
+        about_order = self.order_ids and (not self.reservation_ids or rng.random() < 0.85)
+        ids, customers, times, statuses = (
+            (self.order_ids, self.order_customers, self.order_times, self.order_statuses) if about_order else
+            (self.reservation_ids, self.reservation_customers, self.reservation_times, self.reservation_statuses)
+        )
+        index = max(bisect(times, moment.timestamp()) - 1 - int(rng.expovariate(0.05)), 0)
+        if about_order:
+            kinds = ['new_order'] + ORDER_NOTIFICATIONS.get(statuses[index], [])
+        else:
+            kinds = ['new_reservation'] + {
+                'confirmed': ['reservation_confirmed'],
+                'completed': ['reservation_confirmed'],
+                'cancelled': ['reservation_cancelled'],
+            }.get(statuses[index], [])
+        kind = rng.choice(kinds)
+        customer = customers[index]
+        title, message = NOTIFICATION_TEXT[kind]
+        return Notification(
+            user_id=rng.choice(self.staff_user_ids) if kind.startswith('new_') else self.customer_user_ids[customer],
+            notification_type=kind,
+            title=title,
+            message=message.format(id=ids[index], username=f'{self.prefix}-customer-{customer}'),
+            order_id=ids[index] if about_order else None,
+            reservation_id=None if about_order else ids[index],
+            is_read=rng.random() < (0.92 if self.end - moment > timedelta(days=7) else 0.45),
+            created_at=max(moment, datetime.fromtimestamp(times[index], tz=moment.tzinfo)),
+        )
+
+    def make_notifications(self):
+        count = self.counts['notifications']
+        if count and not (self.order_ids or self.reservation_ids):
+            raise ValueError('Notifications need orders or reservations')
+        for moments in self.chunks(count):
+            with transaction.atomic():
+                self.write('notifications', Notification, [self.notification(moment) for moment in moments])
+
+    def make_activity_logs(self):
+        rng = self.rng
+        count = self.counts['activity_logs']
+        if count and not self.customer_ids:
+            raise ValueError('Activity logs need customers')
+        for moments in self.chunks(count):
+            logs = []
+            for moment in moments:
+                if rng.random() < 0.85:
+                    customer = self.pick_customer()
+                    user = self.customer_user_ids[customer]
+                    action, entity_type, _ = _pick_weighted(rng, CUSTOMER_ACTIVITY)
+                    ip_address = f'112.{customer // 65536 % 256}.{customer // 256 % 256}.{customer % 256}'
+                else:
+                    staff = rng.randrange(len(self.staff_user_ids))
+                    user = self.staff_user_ids[staff]
+                    action, entity_type, _ = _pick_weighted(rng, STAFF_ACTIVITY)
+                    ip_address = f'10.0.{staff // 250 % 256}.{staff % 250 + 1}'
+                entity_id = self.entity_id(entity_type)
+                logs.append(ActivityLog(
+                    user_id=user, action=action, entity_type=entity_type, entity_id=entity_id,
+                    description=f'{action.capitalize()} {entity_type}' + (f' #{entity_id}' if entity_id else ''),
+                    ip_address=ip_address, user_agent=rng.choice(USER_AGENTS), created_at=moment,
+                ))
+            with transaction.atomic():
+                self.write('activity_logs', ActivityLog, logs)
+
+    def entity_id(self, entity_type):
+        ids = {
+            'product': self.active_products,
+            'inventory': self.active_products,
+            'order': self.order_ids,
+            'reservation': self.reservation_ids,
+            'customer': self.customer_ids,
+        }.get(entity_type)
+        return self.rng.choice(ids) if ids else None
+
+    def refresh_summaries(self):
+        """Bring what signals would have kept up to date in line with the new rows"""
+        for start in range(0, len(self.product_ids), 1000):
+            batch = self.product_ids[start:start + 1000]
+            summaries = compute_rating_summaries(batch)
+            Product.objects.bulk_update(
+                [Product(id=product_id, stock=self.stock[product_id], **summaries[product_id]) for product_id in batch],
+                SUMMARY_FIELDS + ['stock'],
+            )
+        if self.created.get('orders'):
+            day, last = timezone.localdate(self.start), timezone.localdate(self.end) - timedelta(days=1)
+            while day <= last:
+                rebuild_sales_rollup(day, min(day + timedelta(days=30), last))
+                day += timedelta(days=31)
+        catalog_changed()
+
+
+def generate_load_data(seed=0, scale=1.0, days=365, until=None, prefix='load', password='musubi',
+                       chunk_size=10_000, log=None, **counts):
+    """
+    Write a deterministic set of synthetic rows to the database.
+
+    Args:
+        seed: Seed of the random generator; the same seed gives the same rows
+        scale: Multiplier of VOLUMES
+        days: Days of orders, reservations and activity to generate
+        until: Date the generated days end before, default today
+        prefix: Start of the generated usernames, e.g. load-customer-0
+        password: Password of every generated user
+        chunk_size: Rows built and written per bulk_create and transaction
+        log: Called with a line of progress after each kind of row
+        **counts: Rows of a kind, overriding scale, e.g. orders=1000
+
+    Returns:
+        Dict mapping each model to the number of rows created
+    """
+    counts = volumes(scale, **counts)
+    if User.objects.filter(username__startswith=f'{prefix}-').exists():
+        raise ValueError(f'Users starting with {prefix}- already exist; pick another prefix')
+    generator = LoadDataGenerator(counts, seed=seed, days=days, until=until, prefix=prefix, password=password,
+                                  chunk_size=chunk_size, log=log)
+    return generator.run()
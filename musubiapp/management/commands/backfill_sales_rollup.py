@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from musubiapp.models import Order
+from musubiapp.rollups import rebuild_sales_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales rollup from orders, one batch of days at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to rebuild (YYYY-MM-DD), default: first order')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day to rebuild (YYYY-MM-DD), default: today')
+        parser.add_argument('--batch-days', type=int, default=31, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        bounds = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+        if options['since']:
+            since = options['since']
+        elif bounds['first']:
+            since = timezone.localdate(bounds['first'])
+        else:
+            self.stdout.write('No orders to roll up')
+            return
+        until = options['until'] or max(timezone.localdate(), timezone.localdate(bounds['last'] or timezone.now()))
+        if since > until:
+            raise CommandError('--since must not be after --until')
+
+        days = rows = 0
+        start = since
+        while start <= until:
+            end = min(start + timedelta(days=options['batch_days'] - 1), until)
+            rows += rebuild_sales_rollup(start, end)
+            days += (end - start).days + 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Rebuilt {start} to {end}')
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} rollup rows for {days} days ({since} to {until})'))
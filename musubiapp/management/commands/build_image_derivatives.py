@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from musubiapp.images import build_derivatives, current_derivatives
+from musubiapp.models import Customer, Product
+
+IMAGE_FIELDS = [(Product, 'image'), (Customer, 'profile_picture')]
+
+
+class Command(BaseCommand):
+    help = 'Make the resized JPEG/WebP copies of product images and profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Also go over images whose copies are already recorded, recreating any missing files',
+        )
+
+    def handle(self, *args, **options):
+        built = skipped = failed = 0
+        for model, field_name in IMAGE_FIELDS:
+            instances = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for instance in instances.order_by('pk').iterator():
+                fieldfile = getattr(instance, field_name)
+                derivatives = getattr(instance, f'{field_name}_derivatives')
+                if not options['all'] and current_derivatives(fieldfile, derivatives) is not None:
+                    skipped += 1
+                    continue
+                try:
+                    build_derivatives(model._meta.label, instance.pk, field_name)
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f'{model.__name__} {instance.pk} ({fieldfile.name}): {e}')
+                else:
+                    built += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Built image copies for {built} images ({skipped} already done, {failed} failed)'
+        ))
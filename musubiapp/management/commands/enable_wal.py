@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Switch an SQLite database to write-ahead logging. SQLite keeps the mode in the database file, '
+        'so run it once per file, e.g. as a deploy step after migrate'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias (default: "default")')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'{options["database"]} is a {connection.vendor} database, not SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            mode = cursor.fetchone()[0]
+        if mode != 'wal':
+            raise CommandError(f'SQLite kept journal_mode={mode}')
+        self.stdout.write(self.style.SUCCESS(f'{connection.settings_dict["NAME"]} uses WAL'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from musubiapp.exports import CHUNK_SIZE, EXPORTS, FORMATS
+
+
+def key_value(value):
+    key, sep, value = value.partition('=')
+    if not sep:
+        raise ValueError(value)
+    return key, value
+
+
+class Command(BaseCommand):
+    help = 'Export orders, inventory logs or the activity log as CSV or JSON Lines, oldest first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument(
+            '--filter', type=key_value, action='append', default=[], metavar='KEY=VALUE',
+            help='Filter as on the list page, e.g. --filter status=pending or --filter date_from=2026-01-01',
+        )
+        parser.add_argument('--output', help='File to write, default: standard output')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows read from the database at a time')
+
+    def handle(self, *args, **options):
+        export = EXPORTS[options['dataset']]
+        chunks = export.stream(dict(options['filter']), options['format'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        try:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except OSError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f'Exported {options["dataset"]} to {options["output"]}'))
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from musubiapp.assets import extract_inline_assets
+
+APP_DIR = Path(__file__).resolve().parents[2]
+TEMPLATES_DIR = APP_DIR / 'templates' / 'musubiapp'
+STATIC_DIR = APP_DIR / 'static'
+
+
+class Command(BaseCommand):
+    help = "Move the templates' inline <style> and <script> blocks into static files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('templates', nargs='*', help='Template names, e.g. home.html (default: all)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+
+    def handle(self, *args, **options):
+        paths = [TEMPLATES_DIR / name for name in options['templates']] or sorted(TEMPLATES_DIR.rglob('*.html'))
+        moved_files = moved_bytes = 0
+        for path in paths:
+            source = path.read_text(encoding='utf-8')
+            stem = path.relative_to(TEMPLATES_DIR).with_suffix('').as_posix().replace('/', '-').replace(' ', '-')
+            new_source, files = extract_inline_assets(source, stem)
+            if not files:
+                continue
+            size = sum(len(content.encode()) for _, content in files)
+            self.stdout.write(f'{path.relative_to(TEMPLATES_DIR)}: {len(files)} blocks, {size} bytes')
+            moved_files += len(files)
+            moved_bytes += size
+            if options['dry_run']:
+                continue
+            for static_path, content in files:
+                target = STATIC_DIR / static_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(content, encoding='utf-8')
+            path.write_text(new_source, encoding='utf-8')
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved_files} blocks ({moved_bytes} bytes) to static files'))
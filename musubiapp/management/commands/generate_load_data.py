@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musubiapp.loaddata import VOLUMES, generate_load_data
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic customers, orders, reviews and logs for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier of the default volumes (1 is about 1.1 million rows)')
+        for name, count in VOLUMES.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, help=f'Rows to generate, default {count} times --scale')
+        parser.add_argument('--days', type=int, default=365, help='Days of orders and activity to spread the rows over')
+        parser.add_argument('--until', type=date.fromisoformat, help='Day the data ends before (YYYY-MM-DD), default today')
+        parser.add_argument('--prefix', default='load', help='Start of the generated usernames')
+        parser.add_argument('--password', default='musubi', help='Password of every generated user')
+        parser.add_argument('--chunk-size', type=int, default=10_000, help='Rows written per bulk insert and transaction')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--days and --chunk-size must be at least 1')
+        log = self.stdout.write if options['verbosity'] > 0 else None
+        try:
+            created = generate_load_data(
+                seed=options['seed'],
+                scale=options['scale'],
+                days=options['days'],
+                until=options['until'],
+                prefix=options['prefix'],
+                password=options['password'],
+                chunk_size=options['chunk_size'],
+                log=log,
+                **{name: options[name] for name in VOLUMES},
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(created.values())} rows: ' + ', '.join(f'{count} {name}' for name, count in created.items())
+        ))
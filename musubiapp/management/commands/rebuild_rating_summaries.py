@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from musubiapp.models import Product
+from musubiapp.ratings import SUMMARY_FIELDS, compute_rating_summaries, stored_rating_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-product rating summaries from approved reviews and verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Products per batch')
+        parser.add_argument('--check', action='store_true', help='Only report mismatches, do not fix them')
+
+    def handle(self, *args, **options):
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        mismatched = []
+
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start:start + batch_size]
+            with transaction.atomic():
+                # Lock the rows so a review changing mid-batch cannot be lost
+                list(Product.objects.select_for_update().filter(id__in=batch).values_list('id', flat=True))
+                expected = compute_rating_summaries(batch)
+                stored = stored_rating_summaries(batch)
+                stale = [product_id for product_id, summary in expected.items() if stored.get(product_id) != summary]
+                mismatched.extend(stale)
+                if stale and not options['check']:
+                    Product.objects.bulk_update(
+                        [Product(id=product_id, **expected[product_id]) for product_id in stale],
+                        SUMMARY_FIELDS,
+                    )
+                    stored = stored_rating_summaries(batch)
+                    if any(stored.get(product_id) != summary for product_id, summary in expected.items()):
+                        raise CommandError(f'Rating summaries still differ after rebuilding products {batch[0]}-{batch[-1]}')
+
+        if options['check']:
+            if mismatched:
+                raise CommandError(
+                    f'{len(mismatched)} of {len(product_ids)} rating summaries are out of date: '
+                    + ', '.join(str(product_id) for product_id in mismatched[:20])
+                )
+            self.stdout.write(self.style.SUCCESS(f'All {len(product_ids)} rating summaries match'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt rating summaries for {len(product_ids)} products ({len(mismatched)} were out of date)'
+            ))
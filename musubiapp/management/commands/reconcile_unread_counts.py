@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from musubiapp.counters import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached unread notification and message counters from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batch')
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        reconciled = drifted = 0
+
+        for start in range(0, len(user_ids), batch_size):
+            counts = reconcile_unread_counts(user_ids[start:start + batch_size])
+            reconciled += len(counts)
+            drifted += sum(1 for cached, count in counts.values() if cached is not None and cached != count)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {reconciled} counters for {len(user_ids)} users ({drifted} had drifted)'
+        ))
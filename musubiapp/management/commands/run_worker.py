@@ -0,0 +1,39 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from musubiapp.jobs import work, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (emails, order side effects) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of waiting for more')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed at a time')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when no job is due')
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def stop(signum, frame):
+            # Finish the jobs already claimed, then exit
+            stopping.append(signum)
+
+        handlers = {signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+        worker = worker_name()
+        if options['verbosity'] > 1:
+            self.stdout.write(f'Worker {worker} started')
+        try:
+            succeeded, failed = work(
+                worker,
+                batch_size=options['batch_size'],
+                idle_sleep=options['sleep'],
+                burst=options['burst'],
+                should_stop=lambda: bool(stopping),
+            )
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'Ran {succeeded + failed} jobs ({failed} failed, to be retried or given up)'))
@@ -1,24 +1,229 @@
-from django.http import HttpResponse, Http404
-from django.conf import settings
-import os
+# musubiapp/media_views.py
 import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# Uploaded product and profile images are streamed from MEDIA_ROOT with
+# FileResponse, so a request never holds more than one block of the file in
+# memory and WSGI servers that provide wsgi.file_wrapper (gunicorn, uWSGI)
+# send whole files with sendfile(). Responses carry an ETag and Last-Modified
+# for conditional GETs, and single byte ranges are honoured.
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Static files are served the same way from STATIC_ROOT once collectstatic
+# has run. Names with a content hash (see musubiapp.assets) never change
+# content, so browsers may keep them for a year without revalidating; the
+# precompressed copy is sent when the browser accepts its encoding.
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class MediaResponse(FileResponse):
+    # FileResponse's 4 KB default costs a write call per block on servers
+    # without sendfile; 64 KB is still a small fraction of a product image
+    block_size = 64 * 1024
+
+
+class FileRange:
+    """
+    File-like view of length bytes of an open file, starting at offset.
+
+    Has no fileno() on purpose: file wrappers that use sendfile() send up to
+    the end of the file, which is wrong for a range.
+    """
+
+    def __init__(self, file, offset, length):
+        self.file = file
+        self.remaining = length
+        file.seek(offset)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def media_etag(st):
+    """Strong validator from a file's modification time and size"""
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header against a file of the given size.
+
+    Only a single byte range is supported; anything else is ignored and the
+    whole file is sent, as RFC 9110 allows.
+
+    Returns:
+        (start, end) inclusive, None to send the whole file, or False if the
+        range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        return False
+    return start, end
 
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if value is None:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def _open_regular(file_path):
+    """Open a regular file, returning (file, stat) or None"""
+    try:
+        file = open(file_path, 'rb')
+    except (OSError, ValueError):
+        return None
+    # Stat the open file so the validators describe exactly what is sent
+    st = os.fstat(file.fileno())
+    if not stat.S_ISREG(st.st_mode):
+        file.close()
+        return None
+    return file, st
+
+
+@require_safe
 def serve_media(request, path):
-    """Custom media serving view for development"""
-    if not settings.DEBUG:
-        raise Http404("Media serving is only available in debug mode")
-    
-    file_path = os.path.join(settings.MEDIA_ROOT, path)
-    
-    if not os.path.exists(file_path):
+    """
+    Stream a file from MEDIA_ROOT.
+
+    Args:
+        path: Path of the file relative to MEDIA_ROOT
+    """
+    try:
+        file_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
         raise Http404("File not found")
-    
-    # Determine content type
-    content_type, _ = mimetypes.guess_type(file_path)
-    if content_type is None:
+
+    opened = _open_regular(file_path)
+    if opened is None:
+        raise Http404("File not found")
+    file, st = opened
+    etag = media_etag(st)
+    last_modified = int(st.st_mtime)
+
+    content_type, encoding = mimetypes.guess_type(file_path)
+    if encoding:
+        # e.g. .svgz or .gz uploads are sent as-is, not decoded by the browser
         content_type = 'application/octet-stream'
-    
-    # Read and return the file
-    with open(file_path, 'rb') as f:
-        response = HttpResponse(f.read(), content_type=content_type)
-        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        file.close()
+        response = not_modified
+    else:
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(request.META['HTTP_RANGE'], st.st_size)
+
+        if byte_range is False:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{st.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            response = MediaResponse(
+                FileRange(file, start, end - start + 1),
+                status=206,
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+        else:
+            response = MediaResponse(file, content_type=content_type or 'application/octet-stream')
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    # Uploads are user-supplied; never let the browser sniff them into HTML
+    response['X-Content-Type-Options'] = 'nosniff'
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600))
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    """
+    Send a collected static file from STATIC_ROOT, precompressed if possible.
+
+    Args:
+        path: Path of the file relative to STATIC_ROOT
+    """
+    try:
+        file_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    content_type, encoding = mimetypes.guess_type(file_path)
+    if encoding:
+        content_type = 'application/octet-stream'
+
+    accepted = {value.split(';')[0].strip() for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(',')}
+    opened = content_encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accepted:
+            opened = _open_regular(file_path + suffix)
+            if opened:
+                content_encoding = name
+                break
+    opened = opened or _open_regular(file_path)
+    if opened is None:
+        raise Http404("File not found")
+    file, st = opened
+
+    # Each encoding is a different representation, so it gets its own ETag
+    etag = media_etag(st)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if not_modified is not None:
+        file.close()
+        response = not_modified
+    else:
+        response = MediaResponse(
+            file, content_type=content_type or 'application/octet-stream', filename=os.path.basename(file_path),
+        )
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(int(st.st_mtime))
+    patch_vary_headers(response, ['Accept-Encoding'])
+    response['X-Content-Type-Options'] = 'nosniff'
+    if HASHED_NAME_RE.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'STATIC_CACHE_MAX_AGE', 3600))
+    return response
@@ -0,0 +1,208 @@
+# musubiapp/middleware.py
+import re
+from functools import wraps
+from hashlib import md5
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def get_customer(user):
+    """The user's Customer profile, or None for anonymous users and users without one"""
+    return getattr(user, 'customer', None)
+
+
+class CustomerMiddleware(MiddlewareMixin):
+    """
+    Attach the signed-in user's Customer profile as request.customer.
+
+    It is resolved on first use from request.user, which
+    CustomerProfileBackend loads together with the profile, so it never
+    costs a query of its own. Test it with ``if request.customer``; it is a
+    lazy object even when there is no profile.
+
+    Must come after AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        request.customer = SimpleLazyObject(lambda: get_customer(request.user))
+
+
+# Compression and ETags
+#
+# CompressionMiddleware compresses responses of COMPRESSION_TYPES of at
+# least COMPRESSION_MIN_SIZE bytes with the best encoding the client
+# accepts: brotli when the brotli package is installed, otherwise gzip.
+# Mobile clients on slow links gain the most; below the threshold the
+# saving does not pay for the work. ETagMiddleware gives GET and HEAD
+# responses a weak ETag from their content and answers a matching
+# If-None-Match with 304 Not Modified. Both leave alone files (serve_media
+# and serve_static send FileResponses with their own ETag, precompressed
+# encodings and byte ranges, which a compressed body would no longer
+# match), responses that already carry an encoding, partial responses, and
+# views decorated with no_transform.
+#
+# Compressing a secret next to text an attacker can influence leaks the
+# secret through the compressed size (BREACH). Django masks the CSRF token
+# afresh on every render, and gzip gets random padding as GZipMiddleware
+# adds; brotli has no room for padding, so responses that carry a CSRF
+# token are only ever sent gzipped.
+RE_MASKED_CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+def no_transform(view_func):
+    """
+    Send a view's responses as written: not compressed, without an ETag.
+
+    For streams that the client must get chunk by chunk, such as Server-Sent
+    Events, which compression would hold back.
+    """
+    if iscoroutinefunction(view_func):
+        async def wrapper(request, *args, **kwargs):
+            response = await view_func(request, *args, **kwargs)
+            patch_cache_control(response, no_transform=True)
+            return response
+    else:
+        def wrapper(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            patch_cache_control(response, no_transform=True)
+            return response
+    return wraps(view_func)(wrapper)
+
+
+def _transformable(response):
+    return (
+        response.status_code == 200
+        and not isinstance(response, FileResponse)
+        and not response.has_header('Content-Encoding')
+        and not response.has_header('Accept-Ranges')
+        and 'no-transform' not in response.get('Cache-Control', '')
+    )
+
+
+def accepted_encoding(request, allow_brotli=True):
+    """
+    The encoding to compress a response to the request with.
+
+    Args:
+        allow_brotli: False to choose among the other encodings only
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    accepted = {}
+    for value in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = value.strip().lower().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    for coding in ('br', 'gzip') if brotli is not None and allow_brotli else ('gzip',):
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def _carries_csrf_token(response):
+    # CsrfViewMiddleware sets the cookie on every response whose request
+    # called get_token(), e.g. by rendering {% csrf_token %}
+    return settings.CSRF_USE_SESSIONS or settings.CSRF_COOKIE_NAME in response.cookies
+
+
+def _compress(coding, content):
+    if coding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    # Random padding in the gzip header, as GZipMiddleware adds, against BREACH
+    return compress_string(content, max_random_bytes=100)
+
+
+def _compress_stream(coding, chunks):
+    if coding == 'gzip':
+        yield from compress_sequence(chunks, max_random_bytes=100)
+        return
+    compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+    for chunk in chunks:
+        # Flushed per chunk so streamed rows still arrive as they are made
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with brotli or gzip, as the client accepts.
+
+    Goes near the top of MIDDLEWARE, above anything that reads or changes
+    the response body.
+    """
+
+    def process_response(self, request, response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True) or not _transformable(response):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(tuple(getattr(settings, 'COMPRESSION_TYPES', ('text/',)))):
+            return response
+        # A stream's length is only known if it says so, e.g. a FileResponse
+        size = int(response.get('Content-Length', 0)) if response.streaming else len(response.content)
+        if (size or not response.streaming) and size < getattr(settings, 'COMPRESSION_MIN_SIZE', 512):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = accepted_encoding(request, allow_brotli=not _carries_csrf_token(response))
+        if coding is None or (response.streaming and response.is_async):
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(coding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = _compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed bytes differ from the ones a strong ETag described
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+
+class ETagMiddleware(MiddlewareMixin):
+    """
+    Add a weak ETag to GET and HEAD responses and answer a matching
+    If-None-Match with 304 Not Modified.
+
+    Goes below CompressionMiddleware, so the ETag describes the content
+    whatever its encoding, and above CsrfViewMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if (not getattr(settings, 'ETAGS_ENABLED', True) or request.method not in ('GET', 'HEAD')
+                or response.streaming or response.has_header('ETag') or not _transformable(response)):
+            return response
+
+        # Every render masks the CSRF token differently. The tokens a cached
+        # page holds stay valid while the CSRF cookie does, so hash the
+        # cookie in their place.
+        content = RE_MASKED_CSRF_TOKEN.sub('', response.content.decode(response.charset, 'replace'))
+        digest = md5(content.encode(), usedforsecurity=False)
+        digest.update(request.META.get('CSRF_COOKIE', '').encode())
+        response['ETag'] = f'W/"{digest.hexdigest()}"'
+        return get_conditional_response(request, etag=response['ETag'], response=response)
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:06
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_sales_rollup(apps, schema_editor):
+    # Same as `manage.py backfill_sales_rollup` over all orders
+    Order = apps.get_model('musubiapp', 'Order')
+    OrderItem = apps.get_model('musubiapp', 'OrderItem')
+    DailySalesRollup = apps.get_model('musubiapp', 'DailySalesRollup')
+
+    rollups = []
+    items_sold = defaultdict(int)
+    product_rows = OrderItem.objects.annotate(
+        day=TruncDate('order__created_at'), status=F('order__status'), category=F('product__category'),
+    ).values('day', 'status', 'product_id', 'category').annotate(
+        quantity_sold=Sum('quantity'), sales=Sum(F('quantity') * F('price')), orders=Count('order_id', distinct=True),
+    ).order_by()
+    for row in product_rows:
+        items_sold[(row['day'], row['status'])] += row['quantity_sold']
+        rollups.append(DailySalesRollup(
+            day=row['day'], status=row['status'], product_id=row['product_id'], category=row['category'],
+            quantity=row['quantity_sold'], sales_amount=row['sales'], order_count=row['orders'],
+        ))
+    order_rows = Order.objects.annotate(day=TruncDate('created_at')).values('day', 'status').annotate(
+        sales=Sum('total_amount'), orders=Count('id'),
+    ).order_by()
+    for row in order_rows:
+        rollups.append(DailySalesRollup(
+            day=row['day'], status=row['status'], quantity=items_sold[(row['day'], row['status'])],
+            sales_amount=row['sales'], order_count=row['orders'],
+        ))
+    DailySalesRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musubiapp', '0017_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('preparing', 'Preparing'), ('shipping', 'Shipping'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('category', models.CharField(blank=True, max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('sales_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='musubiapp.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('product__isnull', False)), fields=('day', 'status', 'product', 'category'), name='unique_product_sales_rollup'), models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('day', 'status'), name='unique_order_sales_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_sales_rollup, migrations.RunPython.noop),
+    ]
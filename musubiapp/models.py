@@ -1,6 +1,8 @@
 # musubiapp/models.py
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 class Customer(models.Model):
     ROLE_CHOICES = [
@@ -14,6 +16,8 @@ class Customer(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(blank=True, null=True)  # Make sure this allows blank/null
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Resized copies of profile_picture, written by musubiapp.images
+    profile_picture_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -34,12 +38,34 @@ class Product(models.Model):
     stock = models.IntegerField(default=0)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='spam')
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Resized JPEG/WebP copies of image, written by musubiapp.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    # Summary of approved reviews, maintained by musubiapp.ratings
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
-    
+
+    @property
+    def avg_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    @property
+    def rating_histogram(self):
+        """(stars, count) pairs from 5 stars down to 1"""
+        return [(stars, getattr(self, f'rating_{stars}_count')) for stars in range(5, 0, -1)]
+
     @property
     def in_stock(self):
         return self.stock > 0
@@ -48,6 +74,19 @@ class Product(models.Model):
     def low_stock(self):
         return 0 < self.stock <= 10
 
+class ProductSearchIndex(models.Model):
+    # FTS5 table maintained by triggers (migration 0016), only present on
+    # SQLite. Queried through musubiapp.search, never written by Django.
+    product = models.OneToOneField(Product, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_index')
+    # FTS5's hidden column named after the table; MATCH against it searches every column
+    document = models.TextField(db_column='musubiapp_product_fts')
+    # bm25() score, lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'musubiapp_product_fts'
+
 class Cart(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -97,6 +136,7 @@ class Order(models.Model):
     payment_status = models.CharField(max_length=20, default='pending')
     delivery_address = models.TextField()
     notes = models.TextField(blank=True, null=True)
+    checkout_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)  # One-time token from the checkout form
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -105,8 +145,20 @@ class Order(models.Model):
     
     @property
     def item_count(self):
+        # Lists annotate item_quantity rather than read every order's items
+        if hasattr(self, 'item_quantity'):
+            return self.item_quantity
         return sum(item.quantity for item in self.orderitem_set.all())
 
+    class Meta:
+        # Newest-first keyset pagination (musubiapp.pagination), over all
+        # orders, one status and one customer's order history
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+            models.Index(fields=['customer', 'created_at', 'id'], name='order_customer_created_idx'),
+        ]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -119,6 +171,37 @@ class OrderItem(models.Model):
     def get_total(self):
         return self.price * self.quantity
 
+class DailySalesRollup(models.Model):
+    # Sales per day, order status and product, maintained by
+    # musubiapp.rollups so analytics never scan Order/OrderItem. Rows with no
+    # product hold the order totals for the day and status: order_count
+    # orders, sales_amount = sum of Order.total_amount, quantity = items
+    # sold; product rows have sales_amount = quantity * price.
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    category = models.CharField(max_length=20, blank=True)  # Product category when the sale was recorded
+    quantity = models.IntegerField(default=0)
+    sales_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.product_id or 'all'}: {self.order_count} orders"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'product', 'category'],
+                condition=models.Q(product__isnull=False),
+                name='unique_product_sales_rollup',
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'status'],
+                condition=models.Q(product__isnull=True),
+                name='unique_order_sales_rollup',
+            ),
+        ]
+
 class InventoryLog(models.Model):
     ACTION_CHOICES = [
         ('stock_in', 'Stock In'),
@@ -139,6 +222,15 @@ class InventoryLog(models.Model):
     def __str__(self):
         return f"{self.action} - {self.product.name} - {self.quantity}"
 
+    class Meta:
+        # The log list filters by product and action
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='inventorylog_created_idx'),
+            models.Index(fields=['product', 'action', 'created_at', 'id'], name='inventorylog_prod_action_idx'),
+            models.Index(fields=['product', 'created_at', 'id'], name='inventorylog_product_idx'),
+            models.Index(fields=['action', 'created_at', 'id'], name='inventorylog_action_idx'),
+        ]
+
 class Reservation(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -161,6 +253,9 @@ class Reservation(models.Model):
         return f"Reservation #{self.id} - {self.customer.user.username} - {self.reservation_date}"
     
     def get_total_amount(self):
+        # Lists annotate items_total rather than add up every reservation's items
+        if hasattr(self, 'items_total'):
+            return self.items_total
         return sum(item.get_total() for item in self.reservationitem_set.all())
     
     def is_available_date(self):
@@ -198,6 +293,15 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Inbox and sent lists are paginated newest first per user
+        indexes = [
+            models.Index(fields=['recipient', 'created_at', 'id'], name='message_recipient_created_idx'),
+            models.Index(fields=['sender', 'created_at', 'id'], name='message_sender_created_idx'),
+            # Unread counts (musubiapp.counters). Partial, because SQLite
+            # compares a boolean as "NOT is_read", which a column in the
+            # index could not match
+            models.Index(fields=['recipient'], condition=Q(is_read=False), name='message_unread_idx'),
+        ]
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = [
@@ -225,6 +329,12 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # A user's notifications newest first, and their unread ones (see
+        # Message for why that one is partial)
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+            models.Index(fields=['user', 'created_at'], condition=Q(is_read=False), name='notification_unread_idx'),
+        ]
 
 class ActivityLog(models.Model):
     ACTION_TYPES = [
@@ -253,7 +363,7 @@ class ActivityLog(models.Model):
     description = models.TextField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # Set when logged, not when a buffered entry is flushed
     
     def __str__(self):
         return f"{self.user.username} - {self.action} {self.entity_type} - {self.created_at}"
@@ -262,6 +372,12 @@ class ActivityLog(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Activity Log'
         verbose_name_plural = 'Activity Logs'
+        # The log list filters by action, entity type and date range
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='activitylog_created_idx'),
+            models.Index(fields=['action', 'created_at', 'id'], name='activitylog_action_idx'),
+            models.Index(fields=['entity_type', 'created_at', 'id'], name='activitylog_entity_idx'),
+        ]
 
 class Review(models.Model):
     RATING_CHOICES = [
@@ -293,6 +409,7 @@ class Review(models.Model):
         verbose_name = 'Product Review'
         verbose_name_plural = 'Product Reviews'
         unique_together = ['product', 'customer', 'order']  # One review per product per order
+        indexes = [models.Index(fields=['created_at', 'id'], name='review_created_idx')]
 
 class Feedback(models.Model):
     FEEDBACK_TYPES = [
@@ -326,5 +443,39 @@ class Feedback(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at', 'id'], name='feedback_created_idx')]
         verbose_name = 'Customer Feedback'
-        verbose_name_plural = 'Customer Feedbacks'
\ No newline at end of file
+        verbose_name_plural = 'Customer Feedbacks'
+
+
+class Job(models.Model):
+    """Background job run by the run_worker command (see musubiapp.jobs)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)  # Registered task name
+    payload = models.JSONField(default=dict, blank=True)  # Keyword arguments of the task
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # Not run before this; pushed back after each failure
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} #{self.id} - {self.status}"
+    
+    class Meta:
+        # Workers claim the queued jobs that are due, oldest first. Finished
+        # jobs are deleted, so the table only holds pending and failed ones.
+        indexes = [
+            models.Index(fields=['run_at', 'id'], condition=Q(status='queued'), name='job_ready_idx'),
+        ]
@@ -0,0 +1,71 @@
+# musubiapp/notifications.py
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import NOTIFICATIONS, adjust_unread
+from .models import Customer, Notification
+
+# Pass as ``users`` to notify every admin
+ADMINS = 'admins'
+
+ADMIN_IDS_CACHE_KEY = 'musubiapp:admin_user_ids'
+# Bounds how stale the list can get in other processes when a local-memory
+# cache is used; saving or deleting a Customer clears it locally right away
+ADMIN_IDS_TIMEOUT = 300
+
+
+def admin_user_ids():
+    """Return the IDs of all admin users, cached between calls"""
+    user_ids = cache.get(ADMIN_IDS_CACHE_KEY)
+    if user_ids is None:
+        user_ids = list(User.objects.filter(customer__role='admin').values_list('id', flat=True))
+        cache.set(ADMIN_IDS_CACHE_KEY, user_ids, ADMIN_IDS_TIMEOUT)
+    return user_ids
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def forget_admin_user_ids(sender, **kwargs):
+    """A role may have changed, so the cached admin list is no longer trusted"""
+    cache.delete(ADMIN_IDS_CACHE_KEY)
+
+
+def notify(users, notification_type, title, message, order=None, reservation=None):
+    """
+    Send the same notification to one or more users with a single INSERT.
+
+    Args:
+        users: ADMINS, a User, or an iterable of Users or user IDs
+        notification_type: One of Notification.NOTIFICATION_TYPES
+        title: Notification title
+        message: Notification body
+        order: Related Order (optional)
+        reservation: Related Reservation (optional)
+
+    Returns:
+        List of the created Notification objects
+    """
+    if users == ADMINS:
+        # Another process may have deleted an admin since the list was cached
+        user_ids = list(User.objects.filter(id__in=admin_user_ids()).values_list('id', flat=True))
+    elif isinstance(users, User):
+        user_ids = [users.pk]
+    else:
+        user_ids = [getattr(user, 'pk', user) for user in users]
+
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            order=order,
+            reservation=reservation,
+        )
+        for user_id in user_ids
+    ])
+    for user_id in user_ids:
+        adjust_unread(NOTIFICATIONS, user_id, 1)
+    return notifications
@@ -0,0 +1,163 @@
+# musubiapp/pagination.py
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.dateparse import parse_datetime
+
+# Keyset pagination for the newest-first lists (activity log, orders,
+# messages, ...). Instead of OFFSET, each page continues from the
+# (created_at, id) of the last row shown, carried in an opaque cursor, so
+# page 1000 costs the same as page 1 given an index on (created_at, id).
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, created_at, pk):
+    raw = json.dumps([direction, created_at.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns:
+        (direction, created_at, pk), direction being 'next' or 'prev'
+
+    Raises:
+        InvalidCursor: the cursor was not made by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, created_at, pk = json.loads(raw)
+        created_at = parse_datetime(created_at)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('next', 'prev') or created_at is None or type(pk) is not int:
+        raise InvalidCursor(cursor)
+    return direction, created_at, pk
+
+
+class KeysetPage:
+    """One page of rows, newest first, with links to its neighbours"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous, count=None, count_is_capped=False):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.count = count
+        self.count_is_capped = count_is_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _key(self, obj):
+        return getattr(obj, self.paginator.field), obj.pk
+
+    @property
+    def next_cursor(self):
+        return encode_cursor('next', *self._key(self.object_list[-1])) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor('prev', *self._key(self.object_list[0])) if self.has_previous else None
+
+    @property
+    def next_query(self):
+        """Query string of the next (older) page, keeping the other parameters"""
+        return self.paginator.query_string(self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self.paginator.query_string(self.previous_cursor)
+
+    @property
+    def first_query(self):
+        return self.paginator.query_string(None)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest first by (field, pk).
+
+    The queryset may be filtered and use select_related; its own ordering
+    is replaced.
+
+    Args:
+        queryset: Rows to paginate
+        per_page: Rows per page
+        cursor_param: GET parameter carrying the cursor, so one view can
+            paginate several lists independently
+        count_limit: If given, count the rows, but stop at this many and
+            report the count as "N+" beyond it, so the count stays cheap
+        field: Timestamp field to order by
+    """
+
+    def __init__(self, queryset, per_page=50, cursor_param='cursor', count_limit=None, field='created_at'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.cursor_param = cursor_param
+        self.count_limit = count_limit
+        self.field = field
+        self.params = QueryDict(mutable=True)
+
+    def query_string(self, cursor):
+        params = self.params.copy()
+        params.pop(self.cursor_param, None)
+        if cursor:
+            params[self.cursor_param] = cursor
+        return params.urlencode()
+
+    def get_page(self, request):
+        """Page selected by the cursor in request.GET; an invalid cursor gives the first page"""
+        self.params = request.GET.copy()
+        try:
+            cursor = decode_cursor(request.GET[self.cursor_param])
+        except (KeyError, InvalidCursor):
+            cursor = None
+        return self.page(cursor)
+
+    def page(self, cursor=None):
+        field = self.field
+        rows = self.queryset.order_by(f'-{field}', '-pk')
+        direction = 'next'
+        if cursor is not None:
+            direction, value, pk = cursor
+            if direction == 'next':
+                # The range condition on field alone lets the index do the work
+                rows = rows.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}), **{f'{field}__lte': value})
+            else:
+                rows = rows.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}), **{f'{field}__gte': value})
+                rows = rows.order_by(field, 'pk')
+
+        object_list = list(rows[:self.per_page + 1])
+        more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == 'next':
+            has_next, has_previous = more, cursor is not None
+        else:
+            object_list.reverse()
+            has_next, has_previous = True, more
+        if not object_list:
+            # Nothing left on this side of the cursor (rows were deleted)
+            has_next = has_previous = False
+
+        count, capped = None, False
+        if self.count_limit is not None:
+            count = self.queryset.order_by()[:self.count_limit + 1].count()
+            capped = count > self.count_limit
+            count = min(count, self.count_limit)
+        return KeysetPage(object_list, self, has_next, has_previous, count, capped)
@@ -0,0 +1,96 @@
+# musubiapp/ratings.py
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .catalog import catalog_changed
+from .models import Product, Review
+
+# Product.review_count, rating_sum and rating_<n>_count summarise the
+# approved reviews of each product so listings never aggregate reviews.
+# Views adjust them as reviews change; rebuild_rating_summaries recomputes
+# them from scratch.
+STARS = range(1, 6)
+
+SUMMARY_FIELDS = ['review_count', 'rating_sum'] + [f'rating_{stars}_count' for stars in STARS]
+
+
+def adjust_rating_summary(product_id, rating, delta):
+    """
+    Add or remove one approved review's rating from its product's summary.
+
+    Args:
+        product_id: ID of the reviewed product
+        rating: Star rating of the review (1-5)
+        delta: 1 when the review starts counting, -1 when it stops
+    """
+    Product.objects.filter(id=product_id).update(**{
+        'review_count': F('review_count') + delta,
+        'rating_sum': F('rating_sum') + delta * rating,
+        f'rating_{rating}_count': F(f'rating_{rating}_count') + delta,
+    })
+    catalog_changed()
+
+
+def count_review(review):
+    if review.is_approved:
+        adjust_rating_summary(review.product_id, review.rating, 1)
+
+
+def set_review_approval(review, is_approved):
+    """
+    Approve or hide a review and update its product's summary.
+
+    The change is made with a conditional UPDATE so two admins toggling the
+    same review at once cannot both adjust the summary.
+
+    Returns:
+        True if the review changed
+    """
+    with transaction.atomic():
+        changed = Review.objects.filter(id=review.id, is_approved=not is_approved).update(
+            is_approved=is_approved, updated_at=timezone.now()
+        )
+        if changed:
+            review.is_approved = is_approved
+            adjust_rating_summary(review.product_id, review.rating, 1 if is_approved else -1)
+    return bool(changed)
+
+
+@receiver(post_delete, sender=Review)
+def uncount_deleted_review(sender, instance, **kwargs):
+    # Also covers reviews removed by cascade, e.g. with their customer
+    if instance.is_approved:
+        adjust_rating_summary(instance.product_id, instance.rating, -1)
+
+
+def compute_rating_summaries(product_ids=None):
+    """
+    Aggregate approved reviews per product straight from the Review table.
+
+    Returns a dict mapping product ID to a dict of SUMMARY_FIELDS values.
+    Products without approved reviews are included with zeros.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    summaries = {product_id: dict.fromkeys(SUMMARY_FIELDS, 0) for product_id in products.values_list('id', flat=True)}
+
+    reviews = Review.objects.filter(is_approved=True)
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+    rows = reviews.order_by().values('product_id').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{stars}_count': Count('id', filter=Q(rating=stars)) for stars in STARS},
+    )
+    for row in rows:
+        summaries[row.pop('product_id')].update(row)
+    return summaries
+
+
+def stored_rating_summaries(product_ids):
+    rows = Product.objects.filter(id__in=product_ids).values('id', *SUMMARY_FIELDS)
+    return {row.pop('id'): row for row in rows}
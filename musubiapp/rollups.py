@@ -0,0 +1,226 @@
+# musubiapp/rollups.py
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import DailySalesRollup, Order, OrderItem
+
+# DailySalesRollup holds what the analytics pages need from Order and
+# OrderItem, one row per day, status and product plus one order-total row
+# per day and status. Changes to an order are applied as the difference
+# between its contribution before and after the change, so rows are only
+# ever adjusted with F() updates. backfill_sales_rollup rebuilds any range.
+
+
+def order_contribution(order_id):
+    """
+    Work out what one order adds to the rollup.
+
+    Returns a dict mapping (day, status, product_id, category) to
+    (quantity, sales_amount, order_count); product_id None is the order total.
+    """
+    order = Order.objects.filter(id=order_id).values('created_at', 'status', 'total_amount').first()
+    if order is None:
+        return {}
+    day = timezone.localdate(order['created_at'])
+    status = order['status']
+
+    rows = defaultdict(lambda: [0, Decimal('0'), 0])
+    total = rows[(day, status, None, '')]
+    total[1:] = [order['total_amount'], 1]
+    items = OrderItem.objects.filter(order_id=order_id).values_list('product_id', 'product__category', 'quantity', 'price')
+    for product_id, category, quantity, price in items:
+        row = rows[(day, status, product_id, category)]
+        row[0] += quantity
+        row[1] += quantity * price
+        row[2] = 1
+        total[0] += quantity
+    return {key: tuple(row) for key, row in rows.items()}
+
+
+class _RowsChanged(Exception):
+    """Rollup rows were created or removed by another transaction meanwhile"""
+
+
+def _add_to_row(key, quantity, sales_amount, order_count):
+    day, status, product_id, category = key
+    rows = DailySalesRollup.objects.filter(day=day, status=status, product_id=product_id, category=category)
+    changes = {
+        'quantity': F('quantity') + quantity,
+        'sales_amount': F('sales_amount') + sales_amount,
+        'order_count': F('order_count') + order_count,
+    }
+    if not rows.update(**changes):
+        try:
+            with transaction.atomic():
+                DailySalesRollup.objects.create(
+                    day=day, status=status, product_id=product_id, category=category,
+                    quantity=quantity, sales_amount=sales_amount, order_count=order_count,
+                )
+            return
+        except IntegrityError:
+            # Another transaction created the row first
+            rows.update(**changes)
+    rows.filter(quantity=0, sales_amount=0, order_count=0).delete()
+
+
+def _add_to_rows(deltas):
+    """Apply all deltas with a fixed number of queries however many rows they touch"""
+    match = Q()
+    for day, status, product_id, category in deltas:
+        match |= Q(day=day, status=status, product_id=product_id, category=category)
+    existing = {
+        (day, status, product_id, category): row_id
+        for row_id, day, status, product_id, category
+        in DailySalesRollup.objects.filter(match).values_list('id', 'day', 'status', 'product_id', 'category')
+    }
+
+    if existing:
+        def increment(field, index, output_field):
+            return F(field) + Case(
+                *[When(id=row_id, then=Value(deltas[key][index])) for key, row_id in existing.items()],
+                default=Value(0),
+                output_field=output_field,
+            )
+
+        rows = DailySalesRollup.objects.filter(id__in=existing.values())
+        updated = rows.update(
+            quantity=increment('quantity', 0, IntegerField()),
+            sales_amount=increment('sales_amount', 1, DecimalField(max_digits=14, decimal_places=2)),
+            order_count=increment('order_count', 2, IntegerField()),
+        )
+        if updated != len(existing):
+            raise _RowsChanged
+        if any(value < 0 for delta in deltas.values() for value in delta):
+            rows.filter(quantity=0, sales_amount=0, order_count=0).delete()
+
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(
+            day=day, status=status, product_id=product_id, category=category,
+            quantity=quantity, sales_amount=sales_amount, order_count=order_count,
+        )
+        for (day, status, product_id, category), (quantity, sales_amount, order_count) in deltas.items()
+        if (day, status, product_id, category) not in existing
+    ])
+
+
+def apply_contribution_change(before, after):
+    """Adjust the rollup from one order contribution to another"""
+    deltas = {}
+    for key in before.keys() | after.keys():
+        old = before.get(key, (0, 0, 0))
+        new = after.get(key, (0, 0, 0))
+        delta = tuple(n - o for n, o in zip(new, old))
+        if any(delta):
+            deltas[key] = delta
+    if not deltas:
+        return
+    try:
+        with transaction.atomic():
+            _add_to_rows(deltas)
+    except (IntegrityError, _RowsChanged):
+        # Lost a race for one of the rows; retry them one at a time
+        for key, delta in deltas.items():
+            _add_to_row(key, *delta)
+
+
+def record_new_order(order_id):
+    """Add a just-created order, with its items, to the rollup"""
+    apply_contribution_change({}, order_contribution(order_id))
+
+
+@contextmanager
+def recording_sales(order_id):
+    """
+    Keep the rollup in step with whatever the block does to an order.
+
+    The order row is locked for the duration, so concurrent edits of the
+    same order are applied one after the other.
+
+    Args:
+        order_id: ID of the order about to change status, total or items
+    """
+    with transaction.atomic():
+        list(Order.objects.select_for_update().filter(id=order_id).values_list('id'))
+        before = order_contribution(order_id)
+        yield
+        apply_contribution_change(before, order_contribution(order_id))
+
+
+@receiver(pre_delete, sender=Order)
+def remove_deleted_order(sender, instance, **kwargs):
+    # pre_delete runs before the cascade removes the items
+    apply_contribution_change(order_contribution(instance.id), {})
+
+
+def _day_bounds(start, end):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def rebuild_sales_rollup(start, end, batch_size=1000):
+    """
+    Recompute the rollup for every day from start to end inclusive.
+
+    Returns:
+        Number of rollup rows written
+    """
+    since, until = _day_bounds(start, end)
+    orders = Order.objects.filter(created_at__gte=since, created_at__lt=until)
+    items = OrderItem.objects.filter(order__created_at__gte=since, order__created_at__lt=until)
+
+    product_rows = items.annotate(
+        day=TruncDate('order__created_at'),
+        status=F('order__status'),
+        category=F('product__category'),
+    ).values('day', 'status', 'product_id', 'category').annotate(
+        quantity_sold=Sum('quantity'),
+        sales=Sum(F('quantity') * F('price')),
+        orders=Count('order_id', distinct=True),
+    ).values_list('day', 'status', 'product_id', 'category', 'quantity_sold', 'sales', 'orders').order_by()
+    order_rows = orders.annotate(day=TruncDate('created_at')).values('day', 'status').annotate(
+        sales=Sum('total_amount'),
+        orders=Count('id'),
+    ).values_list('day', 'status', 'sales', 'orders').order_by()
+
+    rollups = []
+    items_sold = defaultdict(int)
+    for day, status, product_id, category, quantity, sales, order_count in product_rows:
+        items_sold[(day, status)] += quantity
+        rollups.append(DailySalesRollup(
+            day=day, status=status, product_id=product_id, category=category,
+            quantity=quantity, sales_amount=sales, order_count=order_count,
+        ))
+    for day, status, sales, order_count in order_rows:
+        rollups.append(DailySalesRollup(
+            day=day, status=status, quantity=items_sold[(day, status)],
+            sales_amount=sales, order_count=order_count,
+        ))
+
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(day__gte=start, day__lte=end).delete()
+        DailySalesRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
+
+
+def order_totals(start, end=None):
+    """Order-total rollup rows from start to end inclusive (open-ended if end is None)"""
+    rows = DailySalesRollup.objects.filter(product__isnull=True, day__gte=start)
+    return rows.filter(day__lte=end) if end is not None else rows
+
+
+def product_sales(start, end=None):
+    """Per-product rollup rows from start to end inclusive (open-ended if end is None)"""
+    rows = DailySalesRollup.objects.filter(product__isnull=False, day__gte=start)
+    return rows.filter(day__lte=end) if end is not None else rows
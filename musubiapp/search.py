@@ -0,0 +1,142 @@
+# musubiapp/search.py
+import re
+
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F, FloatField, Lookup, Q, Value
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from .models import Product, ProductSearchIndex
+
+# Full-text search over Product using the FTS5 table created in migration
+# 0016. The table only exists on SQLite builds with FTS5; on any other
+# database search falls back to icontains.
+
+
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+ProductSearchIndex._meta.get_field('document').register_lookup(Match)
+
+FTS_TABLE = ProductSearchIndex._meta.db_table
+
+# Same triggers as migration 0016. SQLite drops them whenever a migration
+# rebuilds musubiapp_product (e.g. AddField), so they are put back after
+# every migrate.
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON musubiapp_product BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON musubiapp_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description, category ON musubiapp_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+            VALUES ('delete', old.id, old.name, old.description, old.category);
+            INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+            VALUES (new.id, new.name, new.description, new.category);
+        END
+    """,
+}
+
+
+@receiver(post_migrate)
+def restore_fts_triggers(sender, using, **kwargs):
+    """Recreate missing index triggers and resync the index if any were gone"""
+    if sender.label != 'musubiapp':
+        return
+    conn = connections[using]
+    # The migrations may have created or dropped the table
+    conn.has_fts_index = None
+    if not fts_index_exists(conn):
+        return
+    if ('musubiapp', '0016_product_fts') not in MigrationRecorder(conn).applied_migrations():
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'musubiapp_product'")
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [sql for name, sql in FTS_TRIGGERS.items() if name not in existing]
+        if missing:
+            for sql in missing:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+@receiver(connection_created)
+def forget_fts_index(sender, connection, **kwargs):
+    connection.has_fts_index = None
+
+
+def fts_index_exists(conn=connection):
+    """
+    Check whether migration 0016 created the FTS5 table on this database.
+
+    The answer is kept on the connection until it reconnects or migrate
+    runs, so searches do not query sqlite_master every time.
+    """
+    if conn.vendor != 'sqlite':
+        return False
+    exists = getattr(conn, 'has_fts_index', None)
+    if exists is None:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            exists = conn.has_fts_index = cursor.fetchone() is not None
+    return exists
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Returns an empty string when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_products(products, query):
+    """
+    Filter a Product queryset to the products matching query.
+
+    The result is annotated with ``search_rank`` so callers can order by
+    relevance (lower is better, as with bm25()). With the FTS5 index the
+    products are joined to their index rows; without it name, description and
+    category are matched with icontains and every row gets the same rank.
+
+    Args:
+        products: Product queryset to search within
+        query: Free text as typed by the user
+    """
+    if not fts_index_exists():
+        return products.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    match = match_expression(query)
+    if not match:
+        return products.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+    return products.filter(search_index__document__match=match).annotate(search_rank=F('search_index__rank'))
+
+
+def search_product_ids(query, limit=None):
+    """Return IDs of active products matching query, best match first"""
+    products = search_products(Product.objects.filter(is_active=True), query)
+    ids = products.order_by('search_rank', 'id').values_list('id', flat=True)
+    return list(ids[:limit] if limit is not None else ids)
@@ -0,0 +1,48 @@
+// static/js/notifications.js
+// Keeps the notification badge up to date. Uses the Server-Sent Events stream
+// when the site runs under ASGI and falls back to polling otherwise.
+function startNotificationBadge(streamUrl, countUrl, pollInterval) {
+    pollInterval = pollInterval || 30000;
+    let pollTimer = null;
+
+    function showCount(count) {
+        const badge = document.getElementById('notificationBadge');
+        if (badge) {
+            if (count > 0) {
+                badge.textContent = count;
+                badge.style.display = 'flex';
+            } else {
+                badge.style.display = 'none';
+            }
+        }
+    }
+
+    function poll() {
+        fetch(countUrl)
+            .then(response => response.json())
+            .then(data => showCount(data.count))
+            .catch(error => console.error('Error fetching notification count:', error));
+    }
+
+    function startPolling() {
+        if (pollTimer === null) {
+            poll();
+            pollTimer = setInterval(poll, pollInterval);
+        }
+    }
+
+    if (!window.EventSource || !streamUrl) {
+        startPolling();
+        return;
+    }
+
+    const source = new EventSource(streamUrl);
+    source.addEventListener('unread', event => showCount(JSON.parse(event.data).count));
+    source.addEventListener('error', () => {
+        // CLOSED means the server refused the stream (e.g. WSGI deployment);
+        // otherwise EventSource reconnects on its own
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    });
+}
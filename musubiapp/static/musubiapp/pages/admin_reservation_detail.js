@@ -0,0 +1,20 @@
+        // Auto-scroll to status update form when accessed from notification
+        document.addEventListener('DOMContentLoaded', function() {
+            const statusForm = document.getElementById('statusUpdateForm');
+            if (statusForm) {
+                // Smooth scroll to the status update form
+                setTimeout(() => {
+                    statusForm.scrollIntoView({ 
+                        behavior: 'smooth', 
+                        block: 'center' 
+                    });
+                    
+                    // Focus on the status select dropdown
+                    const statusSelect = statusForm.querySelector('select[name="status"]');
+                    if (statusSelect) {
+                        statusSelect.focus();
+                    }
+                }, 500);
+            }
+        });
+    
@@ -0,0 +1,94 @@
+        // Mobile Menu Toggle
+        document.addEventListener('DOMContentLoaded', function() {
+            const mobileMenuToggle = document.getElementById('mobileMenuToggle');
+            const sidebar = document.getElementById('sidebar');
+            const sidebarOverlay = document.getElementById('sidebarOverlay');
+            
+            if (mobileMenuToggle && sidebar && sidebarOverlay) {
+                // Toggle sidebar
+                mobileMenuToggle.addEventListener('click', function() {
+                    sidebar.classList.toggle('active');
+                    sidebarOverlay.classList.toggle('active');
+                });
+                
+                // Close sidebar when clicking overlay
+                sidebarOverlay.addEventListener('click', function() {
+                    sidebar.classList.remove('active');
+                    sidebarOverlay.classList.remove('active');
+                });
+                
+                // Close sidebar on escape key
+                document.addEventListener('keydown', function(e) {
+                    if (e.key === 'Escape') {
+                        sidebar.classList.remove('active');
+                        sidebarOverlay.classList.remove('active');
+                    }
+                });
+                
+                // Close sidebar when clicking menu items on mobile
+                const menuItems = sidebar.querySelectorAll('.menu-item');
+                menuItems.forEach(function(item) {
+                    item.addEventListener('click', function() {
+                        if (window.innerWidth <= 768) {
+                            sidebar.classList.remove('active');
+                            sidebarOverlay.classList.remove('active');
+                        }
+                    });
+                });
+            }
+            
+            // Add confirmation for delete buttons
+            const deleteButtons = document.querySelectorAll('.btn-danger[href*="delete"]');
+            deleteButtons.forEach(function(button) {
+                button.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    const deleteUrl = this.getAttribute('href');
+                    if (confirm('Are you sure you want to delete this reservation? This action cannot be undone.')) {
+                        window.location.href = deleteUrl;
+                    }
+                });
+            });
+        });
+
+        // Reserved products modal helper functions
+        window.openReservedModal = function(reservationId) {
+            const overlay = document.getElementById('reservedModalOverlay');
+            const body = document.getElementById('reservedModalBody');
+            const source = document.getElementById('reserved-items-' + reservationId);
+
+            if (!overlay || !body || !source) {
+                return;
+            }
+
+            body.innerHTML = source.innerHTML;
+            overlay.classList.add('active');
+        };
+
+        window.closeReservedModal = function() {
+            const overlay = document.getElementById('reservedModalOverlay');
+            if (overlay) {
+                overlay.classList.remove('active');
+            }
+        };
+
+        // Close modal when clicking outside
+        document.addEventListener('click', function(e) {
+            const overlay = document.getElementById('reservedModalOverlay');
+            const modal = overlay ? overlay.querySelector('.reserved-modal') : null;
+            if (overlay && modal && overlay.classList.contains('active')) {
+                if (!modal.contains(e.target) && e.target !== modal) {
+                    overlay.classList.remove('active');
+                }
+            }
+        });
+
+        // Close modal with ESC key
+        document.addEventListener('keydown', function(e) {
+            if (e.key === 'Escape') {
+                const overlay = document.getElementById('reservedModalOverlay');
+                if (overlay) {
+                    overlay.classList.remove('active');
+                }
+            }
+        });
+    
@@ -0,0 +1,124 @@
+function showCheckoutModal() {
+    document.getElementById('checkoutModal').classList.add('active');
+}
+
+function hideCheckoutModal() {
+    document.getElementById('checkoutModal').classList.remove('active');
+}
+
+// Close modal when clicking outside
+document.getElementById('checkoutModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        hideCheckoutModal();
+    }
+});
+
+// Close modal on ESC key
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        hideCheckoutModal();
+    }
+});
+
+// Modal Address Edit Functions
+function toggleModalAddressEdit() {
+    const addressDisplay = document.getElementById('modalAddressDisplay');
+    const addressEdit = document.getElementById('modalAddressEdit');
+    
+    if (addressDisplay && addressEdit) {
+        addressDisplay.style.display = 'none';
+        addressEdit.style.display = 'block';
+    }
+}
+
+function cancelModalAddressEdit() {
+    const addressDisplay = document.getElementById('modalAddressDisplay');
+    const addressEdit = document.getElementById('modalAddressEdit');
+    
+    if (addressDisplay && addressEdit) {
+        addressDisplay.style.display = 'block';
+        addressEdit.style.display = 'none';
+    }
+}
+
+function saveModalAddressEdit() {
+    const addressTextarea = document.getElementById('delivery_address');
+    const currentAddressP = document.querySelector('.current-address-card p');
+    const noAddressDiv = document.querySelector('.no-address-card');
+    const currentAddressDiv = document.querySelector('.current-address-card');
+    
+    if (addressTextarea && addressTextarea.value.trim()) {
+        // Update the display
+        if (currentAddressP) {
+            currentAddressP.textContent = addressTextarea.value.trim();
+        } else if (noAddressDiv) {
+            // Replace no-address with current-address
+            noAddressDiv.innerHTML = '<p>' + addressTextarea.value.trim() + '</p>';
+            noAddressDiv.className = 'current-address-card';
+        }
+        
+        // Hide edit form and show display
+        cancelModalAddressEdit();
+        
+        // Show success message
+        showModalAddressMessage('Address updated successfully!', 'success');
+    } else {
+        showModalAddressMessage('Please enter a valid address.', 'error');
+    }
+}
+
+function showModalAddressMessage(message, type) {
+    // Remove existing message
+    const existingMessage = document.querySelector('.modal-address-message');
+    if (existingMessage) {
+        existingMessage.remove();
+    }
+    
+    // Create new message
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `modal-address-message alert alert-${type}`;
+    messageDiv.textContent = message;
+    messageDiv.style.marginTop = '8px';
+    messageDiv.style.padding = '8px 12px';
+    messageDiv.style.borderRadius = '6px';
+    messageDiv.style.fontSize = '0.85em';
+    
+    if (type === 'success') {
+        messageDiv.style.background = '#d4edda';
+        messageDiv.style.color = '#155724';
+        messageDiv.style.border = '1px solid #c3e6cb';
+    } else {
+        messageDiv.style.background = '#f8d7da';
+        messageDiv.style.color = '#721c24';
+        messageDiv.style.border = '1px solid #f5c6cb';
+    }
+    
+    // Add to address section
+    const addressSection = document.querySelector('.modal-address-section');
+    if (addressSection) {
+        addressSection.appendChild(messageDiv);
+        
+        // Auto remove after 3 seconds
+        setTimeout(() => {
+            if (messageDiv.parentNode) {
+                messageDiv.remove();
+            }
+        }, 3000);
+    }
+}
+
+// Form validation before submission
+document.addEventListener('DOMContentLoaded', function() {
+    const checkoutForm = document.getElementById('checkoutForm');
+    if (checkoutForm) {
+        checkoutForm.addEventListener('submit', function(e) {
+            const deliveryAddress = document.getElementById('delivery_address');
+            if (!deliveryAddress || !deliveryAddress.value.trim()) {
+                e.preventDefault();
+                showModalAddressMessage('Please provide a delivery address before placing your order.', 'error');
+                toggleModalAddressEdit();
+                return false;
+            }
+        });
+    }
+});
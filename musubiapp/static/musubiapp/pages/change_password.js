@@ -0,0 +1,88 @@
+    function togglePassword(fieldId) {
+      const field = document.getElementById(fieldId);
+      const button = field.nextElementSibling;
+      
+      if (field.type === 'password') {
+        field.type = 'text';
+        button.textContent = '🙈';
+      } else {
+        field.type = 'password';
+        button.textContent = '👁️';
+      }
+    }
+
+    function checkPasswordStrength() {
+      const password = document.getElementById('new_password').value;
+      const strengthBar = document.getElementById('strengthBar');
+      const strengthLabel = document.getElementById('strengthLabel');
+      
+      let strength = 0;
+      
+      if (password.length >= 8) strength++;
+      if (password.match(/[a-z]/) && password.match(/[A-Z]/)) strength++;
+      if (password.match(/[0-9]/)) strength++;
+      if (password.match(/[^a-zA-Z0-9]/)) strength++;
+      
+      strengthBar.className = 'password-strength-bar';
+      
+      if (strength === 0 || password.length === 0) {
+        strengthLabel.textContent = '-';
+        strengthBar.style.width = '0%';
+      } else if (strength <= 2) {
+        strengthLabel.textContent = 'Weak';
+        strengthLabel.style.color = '#E63946';
+        strengthBar.classList.add('strength-weak');
+      } else if (strength === 3) {
+        strengthLabel.textContent = 'Medium';
+        strengthLabel.style.color = '#FFB703';
+        strengthBar.classList.add('strength-medium');
+      } else {
+        strengthLabel.textContent = 'Strong';
+        strengthLabel.style.color = '#06D6A0';
+        strengthBar.classList.add('strength-strong');
+      }
+      
+      checkPasswordMatch();
+    }
+
+    function checkPasswordMatch() {
+      const newPassword = document.getElementById('new_password').value;
+      const confirmPassword = document.getElementById('confirm_password').value;
+      const matchText = document.getElementById('matchText');
+      const submitBtn = document.getElementById('submitBtn');
+      
+      if (confirmPassword.length === 0) {
+        matchText.textContent = '';
+        submitBtn.disabled = false;
+        return;
+      }
+      
+      if (newPassword === confirmPassword) {
+        matchText.textContent = '✅ Passwords match';
+        matchText.style.color = '#06D6A0';
+        submitBtn.disabled = false;
+      } else {
+        matchText.textContent = '❌ Passwords do not match';
+        matchText.style.color = '#E63946';
+        submitBtn.disabled = true;
+      }
+    }
+
+    // Form validation
+    document.getElementById('changePasswordForm').addEventListener('submit', function(e) {
+      const newPassword = document.getElementById('new_password').value;
+      const confirmPassword = document.getElementById('confirm_password').value;
+      
+      if (newPassword.length < 8) {
+        e.preventDefault();
+        alert('Password must be at least 8 characters long!');
+        return false;
+      }
+      
+      if (newPassword !== confirmPassword) {
+        e.preventDefault();
+        alert('Passwords do not match!');
+        return false;
+      }
+    });
+  
@@ -0,0 +1,102 @@
+function toggleAddressEdit() {
+    const addressDisplay = document.getElementById('addressDisplay');
+    const addressEdit = document.getElementById('addressEdit');
+    
+    if (addressDisplay && addressEdit) {
+        addressDisplay.style.display = 'none';
+        addressEdit.style.display = 'block';
+    }
+}
+
+function cancelAddressEdit() {
+    const addressDisplay = document.getElementById('addressDisplay');
+    const addressEdit = document.getElementById('addressEdit');
+    
+    if (addressDisplay && addressEdit) {
+        addressDisplay.style.display = 'block';
+        addressEdit.style.display = 'none';
+    }
+}
+
+function saveAddressEdit() {
+    const addressTextarea = document.getElementById('delivery_address');
+    const currentAddressP = document.querySelector('.current-address p');
+    const noAddressDiv = document.querySelector('.no-address');
+    const currentAddressDiv = document.querySelector('.current-address');
+    
+    if (addressTextarea && addressTextarea.value.trim()) {
+        // Update the display
+        if (currentAddressP) {
+            currentAddressP.textContent = addressTextarea.value.trim();
+        } else if (noAddressDiv && currentAddressDiv) {
+            // Replace no-address with current-address
+            noAddressDiv.style.display = 'none';
+            currentAddressDiv.style.display = 'block';
+            currentAddressDiv.querySelector('p').textContent = addressTextarea.value.trim();
+        }
+        
+        // Hide edit form and show display
+        cancelAddressEdit();
+        
+        // Show success message
+        showAddressUpdateMessage('Address updated successfully!', 'success');
+    } else {
+        showAddressUpdateMessage('Please enter a valid address.', 'error');
+    }
+}
+
+function showAddressUpdateMessage(message, type) {
+    // Remove existing message
+    const existingMessage = document.querySelector('.address-message');
+    if (existingMessage) {
+        existingMessage.remove();
+    }
+    
+    // Create new message
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `address-message alert alert-${type}`;
+    messageDiv.textContent = message;
+    messageDiv.style.marginTop = '10px';
+    messageDiv.style.padding = '10px';
+    messageDiv.style.borderRadius = '6px';
+    messageDiv.style.fontSize = '0.9em';
+    
+    if (type === 'success') {
+        messageDiv.style.background = '#d4edda';
+        messageDiv.style.color = '#155724';
+        messageDiv.style.border = '1px solid #c3e6cb';
+    } else {
+        messageDiv.style.background = '#f8d7da';
+        messageDiv.style.color = '#721c24';
+        messageDiv.style.border = '1px solid #f5c6cb';
+    }
+    
+    // Add to address section
+    const addressSection = document.querySelector('.current-address-section');
+    if (addressSection) {
+        addressSection.appendChild(messageDiv);
+        
+        // Auto remove after 3 seconds
+        setTimeout(() => {
+            if (messageDiv.parentNode) {
+                messageDiv.remove();
+            }
+        }, 3000);
+    }
+}
+
+// Form validation before submission
+document.addEventListener('DOMContentLoaded', function() {
+    const checkoutForm = document.getElementById('checkoutForm');
+    if (checkoutForm) {
+        checkoutForm.addEventListener('submit', function(e) {
+            const deliveryAddress = document.getElementById('delivery_address');
+            if (!deliveryAddress || !deliveryAddress.value.trim()) {
+                e.preventDefault();
+                showAddressUpdateMessage('Please provide a delivery address before placing your order.', 'error');
+                toggleAddressEdit();
+                return false;
+            }
+        });
+    }
+});
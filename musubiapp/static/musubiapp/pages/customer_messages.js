@@ -0,0 +1,41 @@
+    // Scroll to bottom of messages
+    function scrollToBottom() {
+        const messagesArea = document.getElementById('messagesArea');
+        if (messagesArea) {
+            messagesArea.scrollTop = messagesArea.scrollHeight;
+        }
+    }
+    
+    // Scroll on page load
+    window.addEventListener('load', scrollToBottom);
+    
+    // Compose modal functions
+    function openComposeModal() {
+        document.getElementById('composeModal').classList.add('active');
+    }
+    
+    function closeComposeModal() {
+        document.getElementById('composeModal').classList.remove('active');
+    }
+    
+    // Close modal on ESC key
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            closeComposeModal();
+        }
+    });
+    
+    // Close modal on outside click
+    document.getElementById('composeModal').addEventListener('click', (e) => {
+        if (e.target.id === 'composeModal') {
+            closeComposeModal();
+        }
+    });
+    
+    // Auto-submit on Enter (optional)
+    document.querySelector('.message-input').addEventListener('keypress', (e) => {
+        if (e.key === 'Enter' && !e.shiftKey) {
+            e.preventDefault();
+            document.getElementById('messageForm').submit();
+        }
+    });
@@ -0,0 +1,35 @@
+    function showTab(tabName) {
+        // Hide all tabs
+        document.querySelectorAll('.tab-content').forEach(tab => {
+            tab.classList.remove('active');
+        });
+        document.querySelectorAll('.tab').forEach(tab => {
+            tab.classList.remove('active');
+        });
+        
+        // Show selected tab
+        document.getElementById(tabName).classList.add('active');
+        event.target.classList.add('active');
+    }
+    
+    function openComposeModal() {
+        document.getElementById('composeModal').classList.add('active');
+    }
+    
+    function closeComposeModal() {
+        document.getElementById('composeModal').classList.remove('active');
+    }
+    
+    // Close modal on ESC key
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            closeComposeModal();
+        }
+    });
+    
+    // Close modal on outside click
+    document.getElementById('composeModal').addEventListener('click', (e) => {
+        if (e.target.id === 'composeModal') {
+            closeComposeModal();
+        }
+    });
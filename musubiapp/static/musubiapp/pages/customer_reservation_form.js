@@ -0,0 +1,183 @@
+        // Set date restrictions (today to 30 days ahead)
+        const today = new Date();
+        const maxDate = new Date();
+        maxDate.setDate(today.getDate() + 30);
+        
+        const todayStr = today.toISOString().split('T')[0];
+        const maxDateStr = maxDate.toISOString().split('T')[0];
+        
+        const dateInput = document.getElementById('reservation_date');
+        dateInput.setAttribute('min', todayStr);
+        dateInput.setAttribute('max', maxDateStr);
+
+        // Product selection functionality
+        const productsDataElement = document.getElementById('products-data');
+        const products = productsDataElement ? JSON.parse(productsDataElement.textContent) : [];
+        let orderTotal = 0;
+
+        function updateQuantity(productId, change) {
+            const qtyInput = document.getElementById('qty_' + productId);
+            const currentQty = parseInt(qtyInput.value) || 0;
+            const newQty = Math.max(0, Math.min(currentQty + change, parseInt(qtyInput.max)));
+            
+            qtyInput.value = newQty;
+            updateOrderSummary();
+        }
+
+        function updateOrderSummary() {
+            const summaryDiv = document.getElementById('order-summary');
+            const summaryItems = document.getElementById('summary-items');
+            const totalPrice = document.getElementById('total-price');
+            
+            summaryItems.innerHTML = '';
+            orderTotal = 0;
+            let hasItems = false;
+
+            products.forEach(product => {
+                const qtyInput = document.getElementById('qty_' + product.id);
+                const qty = parseInt(qtyInput.value) || 0;
+                
+                if (qty > 0) {
+                    hasItems = true;
+                    const itemTotal = qty * parseFloat(product.price);
+                    orderTotal += itemTotal;
+                    
+                    const summaryItem = document.createElement('div');
+                    summaryItem.className = 'summary-item';
+                    summaryItem.innerHTML = `
+                        <span>${product.name} x${qty}</span>
+                        <span>₱${itemTotal.toFixed(2)}</span>
+                    `;
+                    summaryItems.appendChild(summaryItem);
+                }
+            });
+
+            if (hasItems) {
+                summaryDiv.style.display = 'block';
+                totalPrice.textContent = orderTotal.toFixed(2);
+            } else {
+                summaryDiv.style.display = 'none';
+            }
+        }
+
+        // Add event listeners to quantity inputs
+        document.addEventListener('DOMContentLoaded', function() {
+            products.forEach(product => {
+                const qtyInput = document.getElementById('qty_' + product.id);
+                if (qtyInput) {
+                    qtyInput.addEventListener('input', updateOrderSummary);
+                }
+            });
+        });
+
+        // Date validation
+        dateInput.addEventListener('change', function() {
+            const selectedDate = new Date(this.value);
+            const today = new Date();
+            const maxDate = new Date();
+            maxDate.setDate(today.getDate() + 30);
+            
+            if (selectedDate < today) {
+                alert('Reservation date cannot be in the past.');
+                this.value = '';
+            } else if (selectedDate > maxDate) {
+                alert('Reservations can only be made up to 30 days in advance.');
+                this.value = '';
+            }
+        });
+
+        // Clear form when page loads if there's no existing data
+        document.addEventListener('DOMContentLoaded', function() {
+            const form = document.querySelector('form');
+            if (form && !form.dataset.hasData) {
+                form.reset();
+                updateOrderSummary();
+            }
+        });
+
+        // Prevent form submission with empty required fields
+        document.querySelector('form').addEventListener('submit', function(e) {
+            const requiredFields = this.querySelectorAll('[required]');
+            for (let field of requiredFields) {
+                if (!field.value.trim()) {
+                    e.preventDefault();
+                    field.focus();
+                    alert('Please fill in all required fields.');
+                    return false;
+                }
+            }
+        });
+
+        // Auto-clear placeholder text on focus
+        document.querySelectorAll('input, textarea').forEach(function(element) {
+            element.addEventListener('focus', function() {
+                if (this.value === this.placeholder) {
+                    this.value = '';
+                }
+            });
+        });
+
+        // Address editing functionality
+        function editAddress() {
+            const currentAddress = document.getElementById('delivery_address').value;
+            const newAddress = prompt('Edit your delivery address:', currentAddress);
+            
+            if (newAddress !== null && newAddress.trim() !== '') {
+                document.getElementById('delivery_address').value = newAddress.trim();
+                
+                // Update customer profile address via AJAX
+                updateCustomerAddress(newAddress.trim());
+            }
+        }
+
+        function updateCustomerAddress(newAddress) {
+            fetch('/profile/update-address/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify({
+                    'address': newAddress
+                })
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    // Show success message
+                    showMessage('Address updated successfully!', 'success');
+                } else {
+                    showMessage('Failed to update address in profile.', 'error');
+                }
+            })
+            .catch(error => {
+                console.error('Error updating address:', error);
+                showMessage('Error updating address.', 'error');
+            });
+        }
+
+        function showMessage(message, type) {
+            // Create and show a temporary message
+            const messageDiv = document.createElement('div');
+            messageDiv.className = `alert alert-${type}`;
+            messageDiv.textContent = message;
+            messageDiv.style.cssText = `
+                position: fixed;
+                top: 20px;
+                right: 20px;
+                z-index: 1000;
+                padding: 12px 20px;
+                border-radius: 8px;
+                color: white;
+                background: ${type === 'success' ? '#28a745' : '#dc3545'};
+                box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+            `;
+            
+            document.body.appendChild(messageDiv);
+            
+            // Remove message after 3 seconds
+            setTimeout(() => {
+                messageDiv.remove();
+            }, 3000);
+        }
+    
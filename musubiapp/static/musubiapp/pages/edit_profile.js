@@ -0,0 +1,24 @@
+  function previewImage(event) {
+    const file = event.target.files[0];
+    const previewImage = document.getElementById('preview-image');
+    const avatarPlaceholder = document.getElementById('avatar-placeholder');
+    const fileNameDisplay = document.getElementById('file-name');
+    
+    if (file) {
+      // Display file name
+      fileNameDisplay.textContent = `Selected: ${file.name}`;
+      
+      // Create image preview
+      const reader = new FileReader();
+      reader.onload = function(e) {
+        previewImage.src = e.target.result;
+        previewImage.style.display = 'block';
+        if (avatarPlaceholder) {
+          avatarPlaceholder.style.display = 'none';
+        }
+      };
+      reader.readAsDataURL(file);
+    } else {
+      fileNameDisplay.textContent = '';
+    }
+  }
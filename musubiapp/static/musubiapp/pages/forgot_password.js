@@ -0,0 +1,18 @@
+        document.addEventListener('DOMContentLoaded', function() {
+            const forgotForm = document.getElementById('forgotForm');
+            const resetBtn = document.getElementById('resetBtn');
+            
+            // Form submission enhancement
+            forgotForm.addEventListener('submit', function(e) {
+                const originalText = resetBtn.innerHTML;
+                resetBtn.innerHTML = '⏳ Sending...';
+                resetBtn.disabled = true;
+                
+                // Re-enable after 3 seconds if there's an error
+                setTimeout(() => {
+                    resetBtn.innerHTML = originalText;
+                    resetBtn.disabled = false;
+                }, 3000);
+            });
+        });
+    
@@ -0,0 +1,86 @@
+        // Simplified home page functionality
+        document.addEventListener('DOMContentLoaded', function() {
+            // Load initial cart count for navigation
+            updateCartCount(Number(document.getElementById('cartBadge')?.textContent) || 0);
+        });
+
+        function updateCartCount(count = 0) {
+            const cartBadges = document.querySelectorAll('.cart-badge');
+            cartBadges.forEach(badge => {
+                if (count > 0) {
+                    badge.textContent = count;
+                    badge.style.display = 'inline-block';
+                } else {
+                    badge.style.display = 'none';
+                }
+            });
+        }
+
+        function getCookie(name) {
+            let cookieValue = null;
+            if (document.cookie && document.cookie !== '') {
+                const cookies = document.cookie.split(';');
+                for (let i = 0; i < cookies.length; i++) {
+                    const cookie = cookies[i].trim();
+                    if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                        break;
+                    }
+                }
+            }
+            return cookieValue;
+        }
+
+        // Profile Dropdown Functionality
+        const profileBtn = document.getElementById('profileBtn');
+        const dropdownMenu = document.getElementById('dropdownMenu');
+
+        if (profileBtn && dropdownMenu) {
+            profileBtn.addEventListener('click', function(e) {
+                e.stopPropagation();
+                dropdownMenu.classList.toggle('active');
+            });
+
+            // Close dropdown when clicking outside
+            document.addEventListener('click', function(e) {
+                if (!profileBtn.contains(e.target) && !dropdownMenu.contains(e.target)) {
+                    dropdownMenu.classList.remove('active');
+                }
+            });
+
+            // Close dropdown on escape key
+            document.addEventListener('keydown', function(e) {
+                if (e.key === 'Escape') {
+                    dropdownMenu.classList.remove('active');
+                }
+            });
+        }
+
+        // Sidebar functionality removed for clean landing page
+
+        // Auth Modal Functionality (for non-authenticated users)
+        const authModal = document.getElementById('authModal');
+        const closeModal = document.getElementById('closeModal');
+
+        if (authModal && closeModal) {
+            if (closeModal) {
+                closeModal.addEventListener('click', () => {
+                    authModal.classList.remove('active');
+                });
+            }
+
+            // Close modal when clicking outside
+            authModal.addEventListener('click', (e) => {
+                if (e.target === authModal) {
+                    authModal.classList.remove('active');
+                }
+            });
+
+            // Close modal on escape key
+            document.addEventListener('keydown', (e) => {
+                if (e.key === 'Escape' && authModal.classList.contains('active')) {
+                    authModal.classList.remove('active');
+                }
+            });
+        }
+    
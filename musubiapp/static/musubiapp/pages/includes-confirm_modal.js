@@ -0,0 +1,50 @@
+    let confirmCallback = null;
+
+    function showConfirmModal(message, callback) {
+        const modal = document.getElementById('confirmModal');
+        const messageEl = document.getElementById('confirmModalMessage');
+        const confirmBtn = document.getElementById('confirmModalBtn');
+
+        messageEl.textContent = message;
+        confirmCallback = callback;
+        modal.style.display = 'flex';
+
+        // Close on ESC key
+        document.addEventListener('keydown', handleEscKey);
+    }
+
+    function closeConfirmModal() {
+        const modal = document.getElementById('confirmModal');
+        modal.style.display = 'none';
+        confirmCallback = null;
+        document.removeEventListener('keydown', handleEscKey);
+    }
+
+    function handleEscKey(e) {
+        if (e.key === 'Escape') {
+            closeConfirmModal();
+        }
+    }
+
+    // Handle confirm button click
+    document.addEventListener('DOMContentLoaded', function() {
+        const confirmBtn = document.getElementById('confirmModalBtn');
+        if (confirmBtn) {
+            confirmBtn.addEventListener('click', function() {
+                if (confirmCallback) {
+                    confirmCallback();
+                }
+                closeConfirmModal();
+            });
+        }
+
+        // Close modal when clicking outside
+        const modal = document.getElementById('confirmModal');
+        if (modal) {
+            modal.addEventListener('click', function(e) {
+                if (e.target === modal) {
+                    closeConfirmModal();
+                }
+            });
+        }
+    });
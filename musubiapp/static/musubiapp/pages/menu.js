@@ -0,0 +1,171 @@
+// Enhanced Search and Filter functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const searchInput = document.getElementById('searchInput');
+    const categoryFilter = document.getElementById('categoryFilter');
+    const productCards = document.querySelectorAll('.product-card');
+    
+    function filterProducts() {
+        const searchTerm = searchInput.value.toLowerCase().trim();
+        const category = categoryFilter.value.toLowerCase();
+        
+        let visibleCount = 0;
+        
+        productCards.forEach(card => {
+            const productName = card.getAttribute('data-name');
+            const productCategory = card.getAttribute('data-category');
+            
+            const matchesSearch = productName.includes(searchTerm) || searchTerm === '';
+            const matchesCategory = !category || productCategory.includes(category);
+            
+            if (matchesSearch && matchesCategory) {
+                card.style.display = 'block';
+                visibleCount++;
+                setTimeout(() => {
+                    card.style.opacity = '1';
+                    card.style.transform = 'scale(1)';
+                }, 50);
+            } else {
+                card.style.opacity = '0';
+                card.style.transform = 'scale(0.8)';
+                setTimeout(() => {
+                    card.style.display = 'none';
+                }, 300);
+            }
+        });
+        
+        // Show/hide empty state
+        const emptyState = document.querySelector('.empty-state');
+        if (emptyState) {
+            if (visibleCount === 0 && productCards.length > 0) {
+                emptyState.style.display = 'block';
+            } else {
+                emptyState.style.display = 'none';
+            }
+        }
+    }
+    
+    // Debounce search input
+    let searchTimeout;
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(filterProducts, 300);
+    });
+    
+    categoryFilter.addEventListener('change', filterProducts);
+    
+    // Add to cart functionality
+    document.querySelectorAll('.add-to-cart-btn').forEach(button => {
+        button.addEventListener('click', function() {
+            const productId = this.getAttribute('data-product-id');
+            addToCart(productId, this);
+        });
+    });
+    
+    // Initialize filter
+    filterProducts();
+});
+
+function addToCart(productId, button) {
+    // Show loading state
+    const originalText = button.innerHTML;
+    button.innerHTML = '⏳ Adding...';
+    button.disabled = true;
+    
+    fetch(`/add-to-cart/${productId}/`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': getCookie('csrftoken'),
+            'Content-Type': 'application/json',
+        },
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showAlert('🎉 Product added to cart successfully!', 'success');
+            updateCartCount(data.cart_count);
+            
+            // Show success state
+            button.innerHTML = '✅ Added!';
+            setTimeout(() => {
+                button.innerHTML = originalText;
+                button.disabled = false;
+            }, 2000);
+        } else {
+            showAlert('❌ ' + (data.error || 'Error adding product to cart'), 'error');
+            button.innerHTML = originalText;
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showAlert('❌ Network error. Please try again.', 'error');
+        button.innerHTML = originalText;
+        button.disabled = false;
+    });
+}
+
+function showAlert(message, type) {
+    // Remove existing alerts
+    const existingAlerts = document.querySelectorAll('.custom-alert');
+    existingAlerts.forEach(alert => alert.remove());
+    
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `custom-alert alert alert-${type}`;
+    alertDiv.style.cssText = `
+        position: fixed;
+        top: 120px;
+        right: 20px;
+        z-index: 9999;
+        min-width: 300px;
+        max-width: 400px;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+        border-radius: 10px;
+        padding: 15px 20px;
+        font-weight: 500;
+        border: none;
+        border-left: 4px solid ${type === 'success' ? '#28a745' : '#dc3545'};
+        background: ${type === 'success' ? '#d4edda' : '#f8d7da'};
+        color: ${type === 'success' ? '#155724' : '#721c24'};
+    `;
+    alertDiv.innerHTML = `
+        <div class="alert-content">
+            <strong>${message}</strong>
+        </div>
+    `;
+    
+    document.body.appendChild(alertDiv);
+    
+    // Auto remove after 4 seconds
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 4000);
+}
+
+function updateCartCount(count = 0) {
+    const cartBadges = document.querySelectorAll('.cart-badge');
+    cartBadges.forEach(badge => {
+        if (count > 0) {
+            badge.textContent = count;
+            badge.style.display = 'inline-block';
+        } else {
+            badge.style.display = 'none';
+        }
+    });
+}
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
@@ -0,0 +1,31 @@
+        // Password confirmation validation
+        document.addEventListener('DOMContentLoaded', function() {
+            const password = document.getElementById('password');
+            const passwordConfirm = document.getElementById('password_confirm');
+            const form = document.getElementById('registerForm');
+
+            function validatePassword() {
+                if (password.value !== passwordConfirm.value) {
+                    passwordConfirm.setCustomValidity("Passwords don't match");
+                } else {
+                    passwordConfirm.setCustomValidity('');
+                }
+            }
+
+            password.addEventListener('change', validatePassword);
+            passwordConfirm.addEventListener('keyup', validatePassword);
+
+            // Form submission enhancement
+            form.addEventListener('submit', function(e) {
+                const submitBtn = this.querySelector('button[type="submit"]');
+                submitBtn.innerHTML = '⏳ Creating Account...';
+                submitBtn.disabled = true;
+                
+                // Re-enable after 3 seconds if there's an error
+                setTimeout(() => {
+                    submitBtn.innerHTML = '👤 Create My Account';
+                    submitBtn.disabled = false;
+                }, 3000);
+            });
+        });
+    
@@ -0,0 +1,121 @@
+        // Password visibility toggle
+        function togglePassword(fieldId, iconId) {
+            const passwordInput = document.getElementById(fieldId);
+            const toggleIcon = document.getElementById(iconId);
+            
+            if (passwordInput.type === 'password') {
+                passwordInput.type = 'text';
+                toggleIcon.textContent = '🙈';
+            } else {
+                passwordInput.type = 'password';
+                toggleIcon.textContent = '👁️';
+            }
+        }
+        
+        // Password strength checker
+        function checkPasswordStrength() {
+            const password = document.getElementById('password').value;
+            const strengthBar = document.getElementById('strengthBar');
+            const strengthText = document.getElementById('strengthText');
+            
+            if (password.length === 0) {
+                strengthBar.className = 'strength-bar';
+                strengthText.textContent = '';
+                return;
+            }
+            
+            let strength = 0;
+            
+            // Check length
+            if (password.length >= 8) strength++;
+            if (password.length >= 12) strength++;
+            
+            // Check for mixed case
+            if (/[a-z]/.test(password) && /[A-Z]/.test(password)) strength++;
+            
+            // Check for numbers
+            if (/\d/.test(password)) strength++;
+            
+            // Check for special characters
+            if (/[^a-zA-Z0-9]/.test(password)) strength++;
+            
+            // Update UI
+            strengthBar.className = 'strength-bar';
+            strengthText.className = 'strength-text';
+            
+            if (strength <= 2) {
+                strengthBar.classList.add('strength-weak');
+                strengthText.classList.add('weak');
+                strengthText.textContent = '⚠️ Weak password';
+            } else if (strength <= 4) {
+                strengthBar.classList.add('strength-medium');
+                strengthText.classList.add('medium');
+                strengthText.textContent = '⚡ Medium strength';
+            } else {
+                strengthBar.classList.add('strength-strong');
+                strengthText.classList.add('strong');
+                strengthText.textContent = '✅ Strong password';
+            }
+            
+            checkPasswordMatch();
+        }
+        
+        // Password match checker
+        function checkPasswordMatch() {
+            const password = document.getElementById('password').value;
+            const confirmPassword = document.getElementById('password_confirm').value;
+            const matchText = document.getElementById('passwordMatch');
+            const submitBtn = document.getElementById('resetBtn');
+            
+            if (confirmPassword.length === 0) {
+                matchText.textContent = '';
+                submitBtn.disabled = false;
+                return;
+            }
+            
+            if (password === confirmPassword) {
+                matchText.className = 'password-match match';
+                matchText.textContent = '✅ Passwords match';
+                submitBtn.disabled = false;
+            } else {
+                matchText.className = 'password-match no-match';
+                matchText.textContent = '❌ Passwords do not match';
+                submitBtn.disabled = true;
+            }
+        }
+        
+        document.addEventListener('DOMContentLoaded', function() {
+            const resetForm = document.getElementById('resetForm');
+            const resetBtn = document.getElementById('resetBtn');
+            
+            if (resetForm) {
+                // Form submission enhancement
+                resetForm.addEventListener('submit', function(e) {
+                    const password = document.getElementById('password').value;
+                    const confirmPassword = document.getElementById('password_confirm').value;
+                    
+                    if (password !== confirmPassword) {
+                        e.preventDefault();
+                        alert('Passwords do not match!');
+                        return;
+                    }
+                    
+                    if (password.length < 8) {
+                        e.preventDefault();
+                        alert('Password must be at least 8 characters long!');
+                        return;
+                    }
+                    
+                    const originalText = resetBtn.innerHTML;
+                    resetBtn.innerHTML = '⏳ Resetting...';
+                    resetBtn.disabled = true;
+                    
+                    // Re-enable after 3 seconds if there's an error
+                    setTimeout(() => {
+                        resetBtn.innerHTML = originalText;
+                        resetBtn.disabled = false;
+                    }, 3000);
+                });
+            }
+        });
+    
@@ -0,0 +1,80 @@
+# musubiapp/tasks.py
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .jobs import task
+from .models import ActivityLog, Order
+from .notifications import ADMINS, notify
+
+# Tasks run by the job queue (musubiapp.jobs). A job may run more than once
+# when an attempt fails part way, so each task either is safe to repeat or
+# checks what an earlier attempt already did.
+
+
+@task('send_email')
+def send_email(subject, message, recipient_list, from_email=None):
+    send_mail(subject, message, from_email or settings.DEFAULT_FROM_EMAIL, recipient_list, fail_silently=False)
+
+
+@task('password_reset_email')
+def password_reset_email(user_id, base_url):
+    """Email a user a link to reset their password"""
+    user = User.objects.filter(id=user_id).first()
+    if user is None or not user.email:
+        return
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    reset_link = f"{base_url.rstrip('/')}/reset-password/{uid}/{token}/"
+    message = f'''
+Hello {user.username},
+
+You requested to reset your password for your Spamlicious Musubi account.
+
+Click the link below to reset your password:
+{reset_link}
+
+This link will expire in 24 hours.
+
+If you didn't request this, please ignore this email.
+
+Best regards,
+Spamlicious Musubi Team
+'''
+    send_email('Password Reset Request - Spamlicious Musubi', message, [user.email])
+
+
+@task('order_placed')
+def order_placed(order_id, user_id, ip_address=None, user_agent=None):
+    """Tell the admins about a new order and log it as the customer's activity"""
+    order = Order.objects.filter(id=order_id).first()
+    user = User.objects.filter(id=user_id).first()
+    if order is None or user is None:
+        # Deleted before the job ran
+        return
+    with transaction.atomic():
+        # The log entry is always written, so it marks the job done. It is
+        # saved directly rather than through log_activity, whose buffer
+        # would hide it from a retry.
+        if ActivityLog.objects.filter(entity_type='order', entity_id=order.id, action='create').exists():
+            return
+        ActivityLog.objects.create(
+            user=user,
+            action='create',
+            entity_type='order',
+            entity_id=order.id,
+            description=f'Customer placed order #{order.id} - Total: ₱{order.total_amount}',
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        notify(
+            ADMINS,
+            notification_type='new_order',
+            title='New Order Received',
+            message=f'New order #{order.id} from {user.username}. Total: ₱{order.total_amount}',
+            order=order
+        )
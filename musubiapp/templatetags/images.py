@@ -0,0 +1,71 @@
+# musubiapp/templatetags/images.py
+from django import template
+from django.utils.html import format_html
+
+from ..images import current_derivatives, derivative_name
+
+register = template.Library()
+
+# Width the <img> fallback src is picked for when srcset is not supported
+FALLBACK_WIDTH = 640
+
+
+def _srcset(fieldfile, digest, widths, ext):
+    return ', '.join(
+        f'{fieldfile.storage.url(derivative_name(fieldfile.name, digest, width, ext))} {width}w'
+        for width in widths
+    )
+
+
+@register.simple_tag
+def image_srcset(image, derivatives, ext='webp'):
+    """
+    srcset value listing the resized copies of an image.
+
+    Usage: <img srcset="{% image_srcset product.image product.image_derivatives %}">
+
+    Empty until the copies have been made.
+    """
+    current = current_derivatives(image, derivatives)
+    if current is None:
+        return ''
+    return _srcset(image, *current, ext)
+
+
+@register.simple_tag
+def image_url(image, derivatives, width):
+    """
+    URL of the smallest JPEG copy at least width pixels wide, or of the
+    original image when there is none.
+    """
+    if not image:
+        return ''
+    current = current_derivatives(image, derivatives)
+    if current is None:
+        return image.url
+    digest, widths = current
+    chosen = next((w for w in widths if w >= int(width)), widths[-1])
+    return image.storage.url(derivative_name(image.name, digest, chosen, 'jpg'))
+
+
+@register.simple_tag
+def responsive_image(image, derivatives, alt='', css_class='', sizes='100vw'):
+    """
+    <picture> offering the WebP copies of an image with JPEG copies as the
+    fallback, or a plain <img> of the original until the copies exist.
+
+    Usage: {% responsive_image product.image product.image_derivatives alt=product.name css_class="product-image" sizes="(max-width: 768px) 100vw, 420px" %}
+    """
+    current = current_derivatives(image, derivatives)
+    if current is None:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', image.url, alt, css_class)
+    digest, widths = current
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="lazy">'
+        '</picture>',
+        _srcset(image, digest, widths, 'webp'), sizes,
+        image_url(image, derivatives, FALLBACK_WIDTH), _srcset(image, digest, widths, 'jpg'), sizes,
+        alt, css_class,
+    )
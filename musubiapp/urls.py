@@ -1,9 +1,11 @@
 """URL configuration for musubiapp."""
 
-from django.urls import path
+import re
+
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from . import views
+from .media_views import serve_media, serve_static
 
 
 urlpatterns = [
@@ -100,6 +102,7 @@ urlpatterns = [
     path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('notifications/delete/<int:notification_id>/', views.delete_notification, name='delete_notification'),
     path('api/notifications/unread-count/', views.get_unread_notifications_count, name='get_unread_notifications_count'),
+    path('api/notifications/stream/', views.notification_stream, name='notification_stream'),
     
     # Admin Notifications
     path('admin/notifications/', views.admin_notifications, name='admin_notifications'),
@@ -108,6 +111,9 @@ urlpatterns = [
     # Activity Log
     path('admin/activity-log/', views.admin_activity_log, name='admin_activity_log'),
     
+    # Exports (CSV / JSON Lines) of the order, inventory log and activity log lists
+    path('admin/export/<slug:dataset>/', views.admin_export, name='admin_export'),
+    
     # Reviews and Ratings
     path('product/<int:product_id>/review/', views.add_review, name='add_review'),
     path('admin/reviews/', views.admin_reviews_list, name='admin_reviews_list'),
@@ -131,6 +137,17 @@ urlpatterns = [
     # path('staff/products/', views.staff_product_list, name='staff_products'),
 ]
 
-if settings.DEBUG:
-    # Serve media files (uploaded images) during development
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if getattr(settings, 'SERVE_MEDIA', True) and settings.MEDIA_URL.startswith('/'):
+    # Serve uploaded images from MEDIA_ROOT, with or without DEBUG. Turn off
+    # SERVE_MEDIA when the web server or a CDN serves MEDIA_URL instead.
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='serve_media'),
+    ]
+
+if getattr(settings, 'SERVE_STATIC', True) and settings.STATIC_URL.startswith('/'):
+    # Serve collected static files from STATIC_ROOT when DEBUG is off (with
+    # DEBUG on, runserver serves them from the apps). Turn off SERVE_STATIC
+    # when the web server or a CDN serves STATIC_URL instead.
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static, name='serve_static'),
+    ]
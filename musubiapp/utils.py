@@ -1,10 +1,125 @@
 # musubiapp/utils.py
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, connection, transaction
+from django.dispatch import receiver
+
 from .models import ActivityLog
 
-def log_activity(user, action, entity_type, entity_id=None, description='', request=None):
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogBuffer:
+    """
+    In-process queue of unsaved ActivityLog rows written with bulk_create.
+
+    The buffer is flushed once it holds ``max_size`` entries or its oldest
+    entry is older than ``flush_interval`` seconds. The age check also runs
+    when a request finishes, and whatever is left is written at process exit.
+    """
+
+    def __init__(self, max_size=100, flush_interval=5.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            if not self._entries:
+                self._oldest = time.monotonic()
+            self._entries.append(entry)
+        if len(self._entries) >= self.max_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        oldest = self._oldest
+        if oldest is not None and time.monotonic() - oldest >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered entries and return how many were written
+
+        Inside a transaction the write waits until it commits, so a failed
+        insert can't break the caller's transaction. If the batch insert
+        fails, entries are saved one at a time and only the bad ones are
+        dropped.
+        """
+        if connection.in_atomic_block:
+            transaction.on_commit(self.flush)
+            return 0
+        with self._lock:
+            entries, self._entries, self._oldest = self._entries, [], None
+        if not entries:
+            return 0
+        try:
+            with transaction.atomic():
+                ActivityLog.objects.bulk_create(entries, batch_size=self.max_size)
+        except DatabaseError:
+            return self._save_each(entries)
+        return len(entries)
+
+    def _save_each(self, entries):
+        saved = 0
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+            except DatabaseError:
+                logger.exception('Dropped activity log entry: %s %s', entry.action, entry.description)
+            else:
+                saved += 1
+        return saved
+
+
+activity_log_buffer = ActivityLogBuffer(
+    max_size=getattr(settings, 'ACTIVITY_LOG_BUFFER_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5.0),
+)
+
+
+@receiver(request_finished)
+def flush_activity_log_if_due(sender, **kwargs):
+    activity_log_buffer.flush_if_due()
+
+
+@atexit.register
+def flush_activity_log():
+    """Write any buffered activity log entries now"""
+    return activity_log_buffer.flush()
+
+
+def client_details(request):
+    """Return the client's IP address and user agent as log_activity records them"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip_address = x_forwarded_for.split(',')[0]
+    else:
+        ip_address = request.META.get('REMOTE_ADDR')
+    return ip_address, request.META.get('HTTP_USER_AGENT', '')
+
+
+def log_activity(user, action, entity_type, entity_id=None, description='', request=None,
+                 ip_address=None, user_agent=None):
     """
     Helper function to log user activities
     
+    Entries are written right away unless ACTIVITY_LOG_BUFFERED is enabled,
+    in which case they are queued and written in batches by
+    activity_log_buffer.
+    
     Args:
         user: User object
         action: Action type (create, update, delete, login, logout, view)
@@ -12,22 +127,13 @@ def log_activity(user, action, entity_type, entity_id=None, description='', requ
         entity_id: ID of the entity (optional)
         description: Description of the activity
         request: HTTP request object (optional, for IP and user agent)
+        ip_address, user_agent: Recorded when there is no request, e.g. by
+            a background job acting for one
     """
-    ip_address = None
-    user_agent = None
-    
     if request:
-        # Get IP address
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
-        else:
-            ip_address = request.META.get('REMOTE_ADDR')
-        
-        # Get user agent
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        ip_address, user_agent = client_details(request)
     
-    ActivityLog.objects.create(
+    entry = ActivityLog(
         user=user,
         action=action,
         entity_type=entity_type,
@@ -36,3 +142,8 @@ def log_activity(user, action, entity_type, entity_id=None, description='', requ
         ip_address=ip_address,
         user_agent=user_agent
     )
+    
+    if getattr(settings, 'ACTIVITY_LOG_BUFFERED', False):
+        activity_log_buffer.add(entry)
+    else:
+        entry.save()
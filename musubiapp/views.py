@@ -4,13 +4,30 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.cache import cache
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Customer, Product, Cart, CartItem, Order, OrderItem, InventoryLog, Reservation, ReservationItem, Message, Notification, ActivityLog, Review, Feedback
-from .utils import log_activity
+from .utils import client_details, log_activity
+from .jobs import enqueue
+from .notifications import notify, ADMINS
+from .counters import NOTIFICATIONS, MESSAGES, adjust_unread, reset_unread, unread_message_count, unread_notification_count, counter_key
+from .checkout import place_order, find_order_for_token, new_checkout_token, InsufficientStock
+from .search import search_products
+from .catalog import catalog_cache, cart_count
+from .middleware import no_transform
+from .ratings import count_review, set_review_approval
+from .dashboard import dashboard_stats
+from .rollups import record_new_order, recording_sales, order_totals, product_sales
+from .images import queue_derivatives
+from .pagination import KeysetPaginator
+from .filters import filter_activity_logs, filter_inventory_logs, filter_orders
+from .exports import EXPORTS, FORMATS
 from django.db import transaction
-from django.db.models import Sum, Count, Avg, Q
+from django.db.models import Sum, Count, Q, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from datetime import date, timedelta
 from django.utils import timezone
 from django.db import models
@@ -18,10 +35,11 @@ from decimal import Decimal
 from django.core.files.storage import FileSystemStorage
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.tokens import default_token_generator
+import asyncio
 import json
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
+from asgiref.sync import sync_to_async
+from django.utils.http import urlsafe_base64_decode
+from django.utils.encoding import force_str
 from django.conf import settings
 from .debug_views import debug_media
 from .test_views import test_images
@@ -193,49 +211,11 @@ def forgot_password(request):
         try:
             user = User.objects.get(email=email)
             
-            # Generate password reset token
-            token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            
-            # Build reset link
-            reset_link = request.build_absolute_uri(
-                f'/reset-password/{uid}/{token}/'
-            )
-            
-            # Send email (for now, we'll just show the link in console)
-            # In production, configure email settings to send actual emails
-            subject = 'Password Reset Request - Spamlicious Musubi'
-            message = f'''
-Hello {user.username},
-
-You requested to reset your password for your Spamlicious Musubi account.
-
-Click the link below to reset your password:
-{reset_link}
-
-This link will expire in 24 hours.
-
-If you didn't request this, please ignore this email.
-
-Best regards,
-Spamlicious Musubi Team
-            '''
-            
-            try:
-                # Try to send email
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@spamlicious.com',
-                    [email],
-                    fail_silently=False,
-                )
-                messages.success(request, 'Password reset link has been sent to your email.')
-            except Exception as e:
-                # If email fails, show the link directly (for development)
-                print(f"Email sending failed: {e}")
-                print(f"Reset link: {reset_link}")
-                messages.success(request, f'Password reset link: {reset_link}')
+            # Sent by the job queue, which retries if the mail server fails.
+            # The job only holds the user ID; the link is made when it runs,
+            # so no live reset token is stored in the queue.
+            enqueue('password_reset_email', user_id=user.pk, base_url=request.build_absolute_uri('/'))
+            messages.success(request, 'Password reset link has been sent to your email.')
             
             # Log activity
             log_activity(
@@ -298,19 +278,22 @@ def reset_password(request, uidb64, token):
 # Public Views
 def home(request):
     """Home page - accessible to all users"""
+    # Only queried when the cached grid has expired, see musubiapp.catalog
     featured_products = Product.objects.filter(is_active=True, stock__gt=0)[:6]
     return render(request, 'musubiapp/home.html', {
-        'featured_products': featured_products
+        'featured_products': featured_products,
+        'cart_count': cart_count(request),
+        **catalog_cache(request),
     })
 
 @login_required
 def product_list(request):
-    products = Product.objects.filter(is_active=True).annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews', filter=models.Q(reviews__is_approved=True))
-    )
+    # Ratings come from the summary columns on Product, see musubiapp.ratings
+    products = Product.objects.filter(is_active=True)
     return render(request, 'musubiapp/product_list.html', {
-        'products': products
+        'products': products,
+        'cart_count': cart_count(request),
+        **catalog_cache(request),
     })
 
 @login_required
@@ -318,11 +301,9 @@ def product_detail(request, product_id):
     try:
         product = Product.objects.get(id=product_id, is_active=True)
         reviews = Review.objects.filter(product=product, is_approved=True).select_related('customer__user').order_by('-created_at')
-        avg_rating = reviews.aggregate(Avg('rating'))['rating__avg']
-        review_count = reviews.count()
         
         # Check if current user has purchased this product
-        customer = request.user.customer
+        customer = request.customer
         has_purchased = OrderItem.objects.filter(
             order__customer=customer,
             product=product,
@@ -335,8 +316,8 @@ def product_detail(request, product_id):
         return render(request, 'musubiapp/product_detail.html', {
             'product': product,
             'reviews': reviews,
-            'avg_rating': avg_rating,
-            'review_count': review_count,
+            'avg_rating': product.avg_rating,
+            'review_count': product.review_count,
             'has_purchased': has_purchased,
             'user_review': user_review
         })
@@ -350,7 +331,7 @@ def add_to_cart(request, product_id):
     if request.method == 'POST':
         try:
             product = Product.objects.get(id=product_id, is_active=True, stock__gt=0)
-            cart, created = Cart.objects.get_or_create(customer=request.user.customer)
+            cart, created = Cart.objects.get_or_create(customer=request.customer)
             
             cart_item, created = CartItem.objects.get_or_create(
                 cart=cart,
@@ -386,12 +367,13 @@ def add_to_cart(request, product_id):
 
 @customer_required
 def view_cart(request):
-    customer = request.user.customer
+    customer = request.customer
     cart, created = Cart.objects.get_or_create(customer=customer)
     cart_items = CartItem.objects.filter(cart=cart)
     total = sum(item.get_total() for item in cart_items)
     
     return render(request, 'musubiapp/cart.html', {
+        'checkout_token': new_checkout_token(),
         'cart_items': cart_items,
         'total': total,
         'customer_address': customer.address or ''
@@ -401,7 +383,7 @@ def view_cart(request):
 def update_cart(request, cart_item_id):
     if request.method == 'POST':
         try:
-            cart_item = CartItem.objects.get(id=cart_item_id, cart__customer=request.user.customer)
+            cart_item = CartItem.objects.get(id=cart_item_id, cart__customer=request.customer)
             action = request.POST.get('action')
             
             if action == 'update':
@@ -423,18 +405,31 @@ def update_cart(request, cart_item_id):
 @customer_required
 def clear_cart(request):
     if request.method == 'POST':
-        cart = Cart.objects.get(customer=request.user.customer)
+        cart = Cart.objects.get(customer=request.customer)
         CartItem.objects.filter(cart=cart).delete()
         messages.success(request, 'Cart cleared successfully!')
     
     return redirect('view_cart')
 
+def order_placed_message(order):
+    return f"Order placed successfully! Order #{order.id} - Payment: Cash on Delivery. Please have the exact amount (₱{order.total_amount}) ready when your order arrives."
+
 @customer_required
 def checkout(request):
     try:
-        customer = request.user.customer
+        customer = request.customer
         cart = Cart.objects.get(customer=customer)
-        cart_items = CartItem.objects.filter(cart=cart)
+        cart_items = list(CartItem.objects.filter(cart=cart).select_related('product'))
+        
+        # A replayed submission (double tap, client retry) gets the order that
+        # was already placed instead of running the write path again. The cart
+        # is read first so a replay racing the original request sees either
+        # the cart items or the finished order.
+        if request.method == 'POST':
+            order = find_order_for_token(customer, request.POST.get('checkout_token'))
+            if order:
+                messages.success(request, order_placed_message(order))
+                return redirect('home')
         
         if not cart_items:
             messages.error(request, "Your cart is empty!")
@@ -448,7 +443,7 @@ def checkout(request):
         discount_amount = Decimal('0.00')
         discount_details = ''
         from .models import Order  # local import to avoid circular issues
-        is_first_order = not Order.objects.filter(customer=request.user.customer, status='completed').exists()
+        is_first_order = not Order.objects.filter(customer=request.customer, status='completed').exists()
         
         if is_first_order and subtotal > 0:
             raw_discount = (subtotal * Decimal('0.10')).quantize(Decimal('0.01'))
@@ -464,70 +459,33 @@ def checkout(request):
             notes = request.POST.get('notes', '')
             payment_method = request.POST.get('payment_method', 'cod')  # Default to COD
             
-            # Create order
-            order = Order.objects.create(
-                customer=request.user.customer,
-                total_amount=grand_total,
-                discount_amount=discount_amount,
-                discount_details=discount_details,
-                delivery_address=delivery_address,
-                notes=notes,
-                payment_method=payment_method,
-                payment_status='pending'  # COD payment is pending until delivery
-            )
-            
-            # Create order items and update inventory
-            for cart_item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price
-                )
-                
-                # Update product stock
-                cart_item.product.stock -= cart_item.quantity
-                cart_item.product.save()
-                
-                # Log inventory change
-                InventoryLog.objects.create(
-                    product=cart_item.product,
-                    action='sold',
-                    quantity=cart_item.quantity,
-                    previous_stock=cart_item.product.stock + cart_item.quantity,
-                    new_stock=cart_item.product.stock,
-                    notes=f"Sold via order #{order.id}",
-                    created_by=request.user
-                )
-            
-            # Clear the cart
-            cart_items.delete()
-            
-            # Create notification for all admins about new order
-            admin_users = User.objects.filter(customer__role='admin')
-            for admin_user in admin_users:
-                Notification.objects.create(
-                    user=admin_user,
-                    notification_type='new_order',
-                    title='New Order Received',
-                    message=f'New order #{order.id} from {request.user.username}. Total: ₱{order.total_amount}',
-                    order=order
+            # Create order, order items, inventory logs and the job that
+            # notifies the admins and logs the order in one transaction
+            ip_address, user_agent = client_details(request)
+            try:
+                order, _ = place_order(
+                    request.user,
+                    customer,
+                    cart_items,
+                    checkout_token=request.POST.get('checkout_token') or None,
+                    total_amount=grand_total,
+                    discount_amount=discount_amount,
+                    discount_details=discount_details,
+                    delivery_address=delivery_address,
+                    notes=notes,
+                    payment_method=payment_method,
+                    payment_status='pending',  # COD payment is pending until delivery
+                    job_payload={'user_id': request.user.pk, 'ip_address': ip_address, 'user_agent': user_agent},
                 )
+            except InsufficientStock as e:
+                messages.error(request, str(e))
+                return redirect('view_cart')
             
-            # Log order creation activity
-            log_activity(
-                user=request.user,
-                action='create',
-                entity_type='order',
-                entity_id=order.id,
-                description=f'Customer placed order #{order.id} - Total: ₱{order.total_amount}',
-                request=request
-            )
-            
-            messages.success(request, f"Order placed successfully! Order #{order.id} - Payment: Cash on Delivery. Please have the exact amount (₱{order.total_amount}) ready when your order arrives.")
+            messages.success(request, order_placed_message(order))
             return redirect('home')
         
         return render(request, 'musubiapp/checkout.html', {
+            'checkout_token': new_checkout_token(),
             'cart_items': cart_items,
             'subtotal': subtotal,
             'discount_amount': discount_amount,
@@ -549,24 +507,18 @@ def profile_view(request):
     # Check if user is admin and render admin profile template
     if customer.role == 'admin':
         # Get admin statistics
-        total_orders = Order.objects.count()
-        total_customers = Customer.objects.filter(role='customer').count()
-        total_products = Product.objects.filter(is_active=True).count()
-        pending_orders = Order.objects.filter(status='pending').count()
+        stats = dashboard_stats()
         
         # Get unread notifications count
-        unread_notifications_count = Notification.objects.filter(
-            user=user,
-            is_read=False
-        ).count()
+        unread_notifications_count = unread_notification_count(user.pk)
         
         return render(request, 'musubiapp/admin_profile.html', {
             'user': user,
             'customer': customer,
-            'total_orders': total_orders,
-            'total_customers': total_customers,
-            'total_products': total_products,
-            'pending_orders': pending_orders,
+            'total_orders': stats['total_orders'],
+            'total_customers': stats['total_customers'],
+            'total_products': stats['active_products'],
+            'pending_orders': stats['pending_orders'],
             'unread_notifications_count': unread_notifications_count,
         })
     
@@ -592,7 +544,7 @@ def profile_view(request):
 @login_required
 def edit_profile(request):
     """Edit customer profile"""
-    customer = request.user.customer
+    customer = request.customer
     
     if request.method == 'POST':
         # Update user info
@@ -610,6 +562,8 @@ def edit_profile(request):
             customer.profile_picture = request.FILES['profile_picture']
         
         customer.save()
+        if 'profile_picture' in request.FILES:
+            queue_derivatives(customer, 'profile_picture')
         
         messages.success(request, 'Profile updated successfully!')
         return redirect('profile')
@@ -629,7 +583,7 @@ def update_address(request):
             new_address = data.get('address', '').strip()
             
             if new_address:
-                customer = request.user.customer
+                customer = request.customer
                 customer.address = new_address
                 customer.save()
                 
@@ -676,7 +630,7 @@ def change_password(request):
 @customer_required
 def customer_reservations(request):
     """View customer's reservations"""
-    customer = request.user.customer
+    customer = request.customer
     reservations = Reservation.objects.filter(customer=customer).order_by('-reservation_date', '-reservation_time')
     
     return render(request, 'musubiapp/customer_reservations.html', {
@@ -710,7 +664,7 @@ def customer_reservation_create(request):
                 raise ValueError('Invalid date')
             
             reservation = Reservation.objects.create(
-                customer=request.user.customer,
+                customer=request.customer,
                 reservation_date=reservation_date,
                 reservation_time=reservation_time,
                 number_of_guests=number_of_guests,
@@ -756,19 +710,17 @@ def customer_reservation_create(request):
             )
             
             # Notify all admins about new reservation
-            admin_users = User.objects.filter(customer__role='admin')
             notification_message = f'New reservation from {request.user.username} for {reservation_date} at {reservation_time} - {number_of_guests} guests'
             if total_amount > 0:
                 notification_message += f' - Pre-order total: ₱{total_amount:.2f}'
             
-            for admin_user in admin_users:
-                Notification.objects.create(
-                    user=admin_user,
-                    notification_type='new_reservation',
-                    title='New Reservation',
-                    message=notification_message,
-                    reservation=reservation
-                )
+            notify(
+                ADMINS,
+                notification_type='new_reservation',
+                title='New Reservation',
+                message=notification_message,
+                reservation=reservation
+            )
             
             success_message = f'Reservation created successfully! Reservation #{reservation.id}'
             if total_amount > 0:
@@ -798,7 +750,7 @@ def customer_reservation_create(request):
 @customer_required
 def customer_reservation_detail(request, reservation_id):
     """View reservation details"""
-    customer = request.user.customer
+    customer = request.customer
     reservation = get_object_or_404(Reservation, id=reservation_id, customer=customer)
     
     return render(request, 'musubiapp/customer_reservation_detail.html', {
@@ -808,7 +760,7 @@ def customer_reservation_detail(request, reservation_id):
 @customer_required
 def customer_reservation_cancel(request, reservation_id):
     """Cancel a reservation"""
-    customer = request.user.customer
+    customer = request.customer
     reservation = get_object_or_404(Reservation, id=reservation_id, customer=customer)
     
     if request.method == 'POST':
@@ -840,39 +792,25 @@ def customer_reservation_cancel(request, reservation_id):
 # Admin CRUD Views
 @admin_required
 def admin_dashboard(request):
-    total_products = Product.objects.count()
-    out_of_stock = Product.objects.filter(stock=0).count()
-    low_stock = Product.objects.filter(stock__lte=10, stock__gt=0).count()
-    
-    total_orders = Order.objects.count()
-    pending_orders = Order.objects.filter(status='pending').count()
-    completed_orders = Order.objects.filter(status='completed').count()
-    processing_orders = Order.objects.filter(status='processing').count()
-    
-    total_customers = Customer.objects.filter(role='customer').count()
-    total_revenue = Order.objects.filter(status='completed').aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+    # Product, order and customer counters, cached briefly
+    stats = dashboard_stats()
     
-    # Today's stats
-    today = date.today()
-    today_orders = Order.objects.filter(created_at__date=today).count()
-    today_revenue = Order.objects.filter(created_at__date=today, status='completed').aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    
-    recent_orders = Order.objects.all().order_by('-created_at')[:5]
-    recent_reservations = Reservation.objects.all().order_by('-created_at')[:5]
+    recent_orders = Order.objects.select_related('customer__user').order_by('-created_at')[:5]
+    recent_reservations = Reservation.objects.select_related('customer__user').order_by('-created_at')[:5]
     low_stock_products = Product.objects.filter(stock__lte=10, stock__gt=0).order_by('stock')[:5]
     
     return render(request, 'musubiapp/admin_dashboard.html', {
-        'total_products': total_products,
-        'out_of_stock': out_of_stock,
-        'low_stock': low_stock,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'completed_orders': completed_orders,
-        'processing_orders': processing_orders,
-        'total_customers': total_customers,
-        'total_revenue': total_revenue,
-        'today_orders': today_orders,
-        'today_revenue': today_revenue,
+        'total_products': stats['total_products'],
+        'out_of_stock': stats['out_of_stock'],
+        'low_stock': stats['low_stock'],
+        'total_orders': stats['total_orders'],
+        'pending_orders': stats['pending_orders'],
+        'completed_orders': stats['completed_orders'],
+        'processing_orders': stats['processing_orders'],
+        'total_customers': stats['total_customers'],
+        'total_revenue': stats['total_revenue'],
+        'today_orders': stats['today_orders'],
+        'today_revenue': stats['today_revenue'],
         'recent_orders': recent_orders,
         'recent_reservations': recent_reservations,
         'low_stock_products': low_stock_products,
@@ -883,12 +821,8 @@ def admin_product_list(request):
     search_query = request.GET.get('search', '').strip()
     
     if search_query:
-        # Search in product name, description, and category
-        products = Product.objects.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(category__icontains=search_query)
-        ).order_by('-created_at')
+        # Search in product name, description, and category, best match first
+        products = search_products(Product.objects.all(), search_query).order_by('search_rank', '-created_at')
     else:
         products = Product.objects.all().order_by('-created_at')
     
@@ -923,6 +857,7 @@ def admin_product_add(request):
             if 'image' in request.FILES:
                 product.image = request.FILES['image']
                 product.save()
+                queue_derivatives(product, 'image')
             
             # Log product creation activity
             log_activity(
@@ -963,6 +898,8 @@ def admin_product_edit(request, product_id):
                 product.image = request.FILES['image']
             
             product.save()
+            if 'image' in request.FILES:
+                queue_derivatives(product, 'image')
             
             # Log product update activity
             log_activity(
@@ -1011,9 +948,17 @@ def admin_product_delete(request, product_id):
 
 @admin_required
 def admin_order_list(request):
-    orders = Order.objects.all().order_by('-created_at')
+    # Items per order in the same query, read by Order.item_count
+    quantities = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum('quantity')).values('total')
+    orders = Order.objects.select_related('customer__user').annotate(item_quantity=Coalesce(Subquery(quantities), 0))
+    orders = filter_orders(orders, request.GET)
+    status_filter = request.GET.get('status', '')
+    page_obj = KeysetPaginator(orders, per_page=50, count_limit=1000).get_page(request)
     return render(request, 'musubiapp/admin_orders.html', {
-        'orders': orders
+        'page_obj': page_obj,
+        'orders': page_obj.object_list,
+        'status_filter': status_filter,
     })
 
 @admin_required
@@ -1028,37 +973,38 @@ def admin_order_detail(request, order_id):
     if request.method == 'POST':
         old_status = order.status
         new_status = request.POST.get('status')
-        order.status = new_status
-        order.save()
+        with recording_sales(order.id):
+            order.status = new_status
+            order.save()
         
         # Create notification for customer when status changes to preparing or shipping
         if new_status == 'preparing' and old_status != 'preparing':
-            Notification.objects.create(
-                user=order.customer.user,
+            notify(
+                order.customer.user,
                 notification_type='order_preparing',
                 title='Order is Being Prepared',
                 message=f'Your order #{order.id} is now being prepared! We\'ll notify you when it\'s ready for shipping.',
                 order=order
             )
         elif new_status == 'shipping' and old_status != 'shipping':
-            Notification.objects.create(
-                user=order.customer.user,
+            notify(
+                order.customer.user,
                 notification_type='order_shipping',
                 title='Order is On The Way',
                 message=f'Your order #{order.id} is now out for delivery! It should arrive soon.',
                 order=order
             )
         elif new_status == 'completed' and old_status != 'completed':
-            Notification.objects.create(
-                user=order.customer.user,
+            notify(
+                order.customer.user,
                 notification_type='order_completed',
                 title='Order Completed',
                 message=f'Your order #{order.id} has been completed. Thank you for your purchase!',
                 order=order
             )
         elif new_status == 'cancelled' and old_status != 'cancelled':
-            Notification.objects.create(
-                user=order.customer.user,
+            notify(
+                order.customer.user,
                 notification_type='order_cancelled',
                 title='Order Cancelled',
                 message=f'Your order #{order.id} has been cancelled. Please contact us if you have any questions.',
@@ -1102,13 +1048,15 @@ def admin_order_add(request):
             customer = get_object_or_404(Customer, id=customer_id)
             
             # Create order with initial total of 0
-            order = Order.objects.create(
-                customer=customer,
-                total_amount=0,
-                delivery_address=delivery_address,
-                notes=notes,
-                status=status
-            )
+            with transaction.atomic():
+                order = Order.objects.create(
+                    customer=customer,
+                    total_amount=0,
+                    delivery_address=delivery_address,
+                    notes=notes,
+                    status=status
+                )
+                record_new_order(order.id)
             
             messages.success(request, f'Order #{order.id} created successfully! Now add items to the order.')
             return redirect('admin_order_edit', order_id=order.id)
@@ -1135,8 +1083,9 @@ def admin_order_edit(request, order_id):
             try:
                 order.delivery_address = request.POST.get('delivery_address')
                 order.notes = request.POST.get('notes', '')
-                order.status = request.POST.get('status')
-                order.save()
+                with recording_sales(order.id):
+                    order.status = request.POST.get('status')
+                    order.save()
                 messages.success(request, f'Order #{order.id} updated successfully!')
                 return redirect('admin_order_edit', order_id=order_id)
             except Exception as e:
@@ -1149,20 +1098,21 @@ def admin_order_edit(request, order_id):
                 
                 product = get_object_or_404(Product, id=product_id)
                 
-                # Check if item already exists in order
-                order_item, created = OrderItem.objects.get_or_create(
-                    order=order,
-                    product=product,
-                    defaults={'quantity': quantity, 'price': product.price}
-                )
-                
-                if not created:
-                    order_item.quantity += quantity
-                    order_item.save()
-                
-                # Recalculate order total
-                order.total_amount = sum(item.get_total() for item in order.orderitem_set.all())
-                order.save()
+                with recording_sales(order.id):
+                    # Check if item already exists in order
+                    order_item, created = OrderItem.objects.get_or_create(
+                        order=order,
+                        product=product,
+                        defaults={'quantity': quantity, 'price': product.price}
+                    )
+                    
+                    if not created:
+                        order_item.quantity += quantity
+                        order_item.save()
+                    
+                    # Recalculate order total
+                    order.total_amount = sum(item.get_total() for item in order.orderitem_set.all())
+                    order.save()
                 
                 messages.success(request, f'Added {quantity}x {product.name} to order')
                 return redirect('admin_order_edit', order_id=order_id)
@@ -1173,11 +1123,12 @@ def admin_order_edit(request, order_id):
             try:
                 item_id = request.POST.get('item_id')
                 order_item = get_object_or_404(OrderItem, id=item_id, order=order)
-                order_item.delete()
-                
-                # Recalculate order total
-                order.total_amount = sum(item.get_total() for item in order.orderitem_set.all())
-                order.save()
+                with recording_sales(order.id):
+                    order_item.delete()
+                    
+                    # Recalculate order total
+                    order.total_amount = sum(item.get_total() for item in order.orderitem_set.all())
+                    order.save()
                 
                 messages.success(request, 'Item removed from order')
                 return redirect('admin_order_edit', order_id=order_id)
@@ -1240,7 +1191,7 @@ def admin_inventory(request):
 
 @admin_required
 def admin_customer_list(request):
-    customers = Customer.objects.select_related('user').all().order_by('-created_at')
+    customers = Customer.objects.select_related('user').annotate(order_count=Count('order')).order_by('-created_at')
     return render(request, 'musubiapp/admin_customers.html', {
         'customers': customers
     })
@@ -1363,7 +1314,19 @@ def admin_customer_list(request):
 # Admin Reservation CRUD Views
 @admin_required
 def admin_reservation_list(request):
-    reservations = Reservation.objects.select_related('customer__user').prefetch_related('reservationitem_set__product').all().order_by('-reservation_date', '-reservation_time')
+    # Item counts and totals in the same query, read by the template and
+    # Reservation.get_total_amount; the items themselves are prefetched
+    # for the details modal
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    items = ReservationItem.objects.filter(reservation=OuterRef('pk')).order_by().values('reservation')
+    lines = items.annotate(lines=Count('id')).values('lines')
+    totals = items.annotate(total=Sum(F('quantity') * F('price'), output_field=amount)).values('total')
+    reservations = Reservation.objects.select_related('customer__user').prefetch_related(
+        'reservationitem_set__product'
+    ).annotate(
+        item_lines=Coalesce(Subquery(lines), 0),
+        items_total=Coalesce(Subquery(totals), Value(Decimal('0')), output_field=amount),
+    ).order_by('-reservation_date', '-reservation_time')
     return render(request, 'musubiapp/admin_reservations.html', {
         'reservations': reservations
     })
@@ -1399,24 +1362,24 @@ def admin_reservation_detail(request, reservation_id):
             customer_user = reservation.customer.user
             
             if new_status == 'confirmed':
-                Notification.objects.create(
-                    user=customer_user,
+                notify(
+                    customer_user,
                     notification_type='reservation_confirmed',
                     title='Reservation Confirmed',
                     message=f'Your reservation #{reservation.id} for {reservation.reservation_date} at {reservation.reservation_time} has been confirmed!',
                     reservation=reservation
                 )
             elif new_status == 'cancelled':
-                Notification.objects.create(
-                    user=customer_user,
+                notify(
+                    customer_user,
                     notification_type='reservation_cancelled',
                     title='Reservation Cancelled',
                     message=f'Your reservation #{reservation.id} for {reservation.reservation_date} at {reservation.reservation_time} has been cancelled.',
                     reservation=reservation
                 )
             elif new_status == 'completed':
-                Notification.objects.create(
-                    user=customer_user,
+                notify(
+                    customer_user,
                     notification_type='reservation_confirmed',
                     title='Reservation Completed',
                     message=f'Your reservation #{reservation.id} has been completed. Thank you for dining with us!',
@@ -1516,24 +1479,24 @@ def admin_reservation_edit(request, reservation_id):
                 customer_user = reservation.customer.user
                 
                 if new_status == 'confirmed':
-                    Notification.objects.create(
-                        user=customer_user,
+                    notify(
+                        customer_user,
                         notification_type='reservation_confirmed',
                         title='Reservation Confirmed',
                         message=f'Your reservation #{reservation.id} for {reservation.reservation_date} at {reservation.reservation_time} has been confirmed!',
                         reservation=reservation
                     )
                 elif new_status == 'cancelled':
-                    Notification.objects.create(
-                        user=customer_user,
+                    notify(
+                        customer_user,
                         notification_type='reservation_cancelled',
                         title='Reservation Cancelled',
                         message=f'Your reservation #{reservation.id} for {reservation.reservation_date} at {reservation.reservation_time} has been cancelled.',
                         reservation=reservation
                     )
                 elif new_status == 'completed':
-                    Notification.objects.create(
-                        user=customer_user,
+                    notify(
+                        customer_user,
                         notification_type='reservation_confirmed',
                         title='Reservation Completed',
                         message=f'Your reservation #{reservation.id} has been marked as completed. Thank you for dining with us!',
@@ -1712,7 +1675,7 @@ def admin_customer_delete(request, customer_id):
 def admin_customer_detail(request, customer_id):
     """View detailed information about a customer"""
     customer = get_object_or_404(Customer, id=customer_id)
-    orders = customer.order_set.all().order_by('-created_at')
+    orders = customer.order_set.prefetch_related('orderitem_set').order_by('-created_at')
     
     # Calculate statistics
     total_orders = orders.count()
@@ -1748,22 +1711,16 @@ def admin_order_delete(request, order_id):
 @admin_required
 def admin_inventory_log_list(request):
     """View all inventory logs with filtering options"""
-    logs = InventoryLog.objects.select_related('product', 'created_by').all().order_by('-created_at')
-    
-    # Filter by product if specified
+    logs = filter_inventory_logs(InventoryLog.objects.select_related('product', 'created_by'), request.GET)
     product_id = request.GET.get('product')
-    if product_id:
-        logs = logs.filter(product_id=product_id)
-    
-    # Filter by action type if specified
     action = request.GET.get('action')
-    if action:
-        logs = logs.filter(action=action)
     
     products = Product.objects.all().order_by('name')
+    page_obj = KeysetPaginator(logs, per_page=50, count_limit=1000).get_page(request)
     
     return render(request, 'musubiapp/admin_inventory_logs.html', {
-        'logs': logs,
+        'page_obj': page_obj,
+        'logs': page_obj.object_list,
         'products': products,
         'selected_product': product_id,
         'selected_action': action
@@ -1798,18 +1755,20 @@ def admin_inventory_log_delete(request, log_id):
 @customer_required
 def customer_messages(request):
     """View all messages for customer"""
-    received_messages = Message.objects.filter(recipient=request.user).order_by('-created_at')
-    sent_messages = Message.objects.filter(sender=request.user).order_by('-created_at')
+    # One conversation, newest page first; the template shows it oldest first
+    conversation = Message.objects.filter(Q(recipient=request.user) | Q(sender=request.user))
+    page_obj = KeysetPaginator(conversation, per_page=50).get_page(request)
     
     # Get admin users to send messages to
     admin_users = User.objects.filter(customer__role='admin')
     
     # Count unread messages
-    unread_count = received_messages.filter(is_read=False).count()
+    unread_count = unread_message_count(request.user.pk)
     
     return render(request, 'musubiapp/customer_messages.html', {
-        'received_messages': received_messages,
-        'sent_messages': sent_messages,
+        'page_obj': page_obj,
+        'received_messages': [msg for msg in page_obj if msg.recipient_id == request.user.pk],
+        'sent_messages': [msg for msg in page_obj if msg.sender_id == request.user.pk],
         'admin_users': admin_users,
         'unread_count': unread_count
     })
@@ -1863,6 +1822,7 @@ def view_message(request, message_id):
     if message.recipient == request.user and not message.is_read:
         message.is_read = True
         message.save()
+        adjust_unread(MESSAGES, request.user.pk, -1)
         
         # Log message view activity
         log_activity(
@@ -1909,18 +1869,27 @@ def delete_message(request, message_id):
 @admin_required
 def admin_messages(request):
     """View all messages for admin"""
-    received_messages = Message.objects.filter(recipient=request.user).order_by('-created_at')
-    sent_messages = Message.objects.filter(sender=request.user).order_by('-created_at')
+    # Inbox and sent items page independently
+    received_page = KeysetPaginator(
+        Message.objects.filter(recipient=request.user).select_related('sender'),
+        per_page=50, cursor_param='inbox', count_limit=1000,
+    ).get_page(request)
+    sent_page = KeysetPaginator(
+        Message.objects.filter(sender=request.user).select_related('recipient'),
+        per_page=50, cursor_param='sent', count_limit=1000,
+    ).get_page(request)
     
     # Get all customers to send messages to
     customers = User.objects.filter(customer__role='customer')
     
     # Count unread messages
-    unread_count = received_messages.filter(is_read=False).count()
+    unread_count = unread_message_count(request.user.pk)
     
     return render(request, 'musubiapp/admin_messages.html', {
-        'received_messages': received_messages,
-        'sent_messages': sent_messages,
+        'received_page': received_page,
+        'sent_page': sent_page,
+        'received_messages': received_page.object_list,
+        'sent_messages': sent_page.object_list,
         'customers': customers,
         'unread_count': unread_count
     })
@@ -1974,6 +1943,7 @@ def admin_view_message(request, message_id):
     if message.recipient == request.user and not message.is_read:
         message.is_read = True
         message.save()
+        adjust_unread(MESSAGES, request.user.pk, -1)
         
         # Log admin message view activity
         log_activity(
@@ -2020,7 +1990,7 @@ def admin_delete_message(request, message_id):
 @customer_required
 def customer_order_history(request):
     """View customer's order history"""
-    customer = request.user.customer
+    customer = request.customer
     orders = Order.objects.filter(customer=customer).order_by('-created_at')
     
     return render(request, 'musubiapp/order_history.html', {
@@ -2030,7 +2000,7 @@ def customer_order_history(request):
 @customer_required
 def customer_order_detail(request, order_id):
     """View detailed information about a specific order"""
-    customer = request.user.customer
+    customer = request.customer
     order = get_object_or_404(Order, id=order_id, customer=customer)
     order_items = OrderItem.objects.filter(order=order)
     
@@ -2046,13 +2016,13 @@ def product_search(request):
     category = request.GET.get('category', '')
     min_price = request.GET.get('min_price', '')
     max_price = request.GET.get('max_price', '')
-    sort_by = request.GET.get('sort', 'name')
+    sort_by = request.GET.get('sort', 'relevance' if query else 'name')
     
     products = Product.objects.filter(is_active=True)
     
-    # Search by name or description
+    # Full-text search over name, description and category
     if query:
-        products = products.filter(name__icontains=query) | products.filter(description__icontains=query)
+        products = search_products(products, query)
     
     # Filter by category
     if category:
@@ -2071,6 +2041,8 @@ def product_search(request):
         products = products.order_by('-price')
     elif sort_by == 'newest':
         products = products.order_by('-created_at')
+    elif sort_by == 'relevance' and query:
+        products = products.order_by('search_rank', 'name')
     else:
         products = products.order_by('name')
     
@@ -2082,7 +2054,9 @@ def product_search(request):
         'categories': categories,
         'query': query,
         'selected_category': category,
-        'sort_by': sort_by
+        'sort_by': sort_by,
+        'cart_count': cart_count(request),
+        **catalog_cache(request, query, category, min_price, max_price, sort_by),
     })
 
 # Sales Analytics
@@ -2093,35 +2067,28 @@ def admin_sales_analytics(request):
     days = int(request.GET.get('days', 30))
     start_date = date.today() - timedelta(days=days)
     
+    # Sales figures come from the daily rollup (see musubiapp.rollups)
+    totals = order_totals(start_date)
+    completed_totals = totals.filter(status='completed')
+    
     # Total sales
-    total_sales = Order.objects.filter(
-        status='completed',
-        created_at__gte=start_date
-    ).aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+    total_sales = completed_totals.aggregate(total=Sum('sales_amount'))['total'] or 0
     
     # Orders by status
-    orders_by_status = Order.objects.filter(
-        created_at__gte=start_date
-    ).values('status').annotate(count=Count('id'))
+    orders_by_status = totals.values('status').annotate(count=Sum('order_count')).order_by('status')
     
     # Top selling products
-    top_products = OrderItem.objects.filter(
-        order__status='completed',
-        order__created_at__gte=start_date
+    top_products = product_sales(start_date).filter(
+        status='completed'
     ).values('product__name').annotate(
         total_quantity=Sum('quantity'),
-        total_revenue=Sum('price')
+        total_revenue=Sum('sales_amount')
     ).order_by('-total_quantity')[:10]
     
     # Daily sales
-    daily_sales = Order.objects.filter(
-        status='completed',
-        created_at__gte=start_date
-    ).extra(
-        select={'day': 'DATE(created_at)'}
-    ).values('day').annotate(
-        total=Sum('total_amount'),
-        count=Count('id')
+    daily_sales = completed_totals.values('day').annotate(
+        total=Sum('sales_amount'),
+        count=Sum('order_count')
     ).order_by('day')
     
     # Customer statistics
@@ -2147,7 +2114,7 @@ def admin_sales_analytics(request):
 def customer_notifications(request):
     """View customer notifications"""
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_count = notifications.filter(is_read=False).count()
+    unread_count = unread_notification_count(request.user.pk)
     
     return render(request, 'musubiapp/notifications.html', {
         'notifications': notifications,
@@ -2158,8 +2125,10 @@ def customer_notifications(request):
 def mark_notification_read(request, notification_id):
     """Mark a notification as read"""
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notification.is_read = True
-    notification.save()
+    if not notification.is_read:
+        notification.is_read = True
+        notification.save()
+        adjust_unread(NOTIFICATIONS, request.user.pk, -1)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'success'})
@@ -2170,6 +2139,7 @@ def mark_notification_read(request, notification_id):
 def mark_all_notifications_read(request):
     """Mark all notifications as read"""
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    reset_unread(NOTIFICATIONS, request.user.pk)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'success'})
@@ -2190,14 +2160,54 @@ def delete_notification(request, notification_id):
 @login_required
 def get_unread_notifications_count(request):
     """Get unread notifications count (AJAX)"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
+    count = unread_notification_count(request.user.pk)
     return JsonResponse({'count': count})
 
+@login_required
+@no_transform
+async def notification_stream(request):
+    """Push unread notifications count changes as Server-Sent Events"""
+    if not isinstance(request, ASGIRequest):
+        # Holding a WSGI worker open for every tab is worse than polling;
+        # 204 tells EventSource to stop and the page falls back to polling
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    count_key = counter_key(NOTIFICATIONS, user.pk)
+    check_interval = getattr(settings, 'NOTIFICATION_STREAM_CHECK_INTERVAL', 1.0)
+    heartbeat_interval = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15.0)
+    lifetime = getattr(settings, 'NOTIFICATION_STREAM_LIFETIME', 300.0)
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        started = last_sent = loop.time()
+        last_count = None
+        while True:
+            count = await cache.aget(count_key)
+            if count is None:
+                count = await sync_to_async(unread_notification_count)(user.pk)
+            if count != last_count:
+                last_count = count
+                yield f'event: unread\ndata: {json.dumps({"count": count})}\n\n'
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= heartbeat_interval:
+                yield ': keepalive\n\n'
+                last_sent = loop.time()
+            if loop.time() - started >= lifetime:
+                # Let the browser reconnect so long-lived connections get recycled
+                return
+            await asyncio.sleep(check_interval)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @admin_required
 def admin_notifications(request):
     """View admin notifications with order management"""
     notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_count = notifications.filter(is_read=False).count()
+    unread_count = unread_notification_count(request.user.pk)
     
     return render(request, 'musubiapp/admin_notifications.html', {
         'notifications': notifications,
@@ -2212,12 +2222,13 @@ def accept_order(request, order_id):
     if request.method == 'POST':
         if order.status == 'pending':
             # Update order status to preparing
-            order.status = 'preparing'
-            order.save()
+            with recording_sales(order.id):
+                order.status = 'preparing'
+                order.save()
             
             # Create notification for customer
-            Notification.objects.create(
-                user=order.customer.user,
+            notify(
+                order.customer.user,
                 notification_type='order_preparing',
                 title='Order is Being Prepared',
                 message=f'Your order #{order.id} has been accepted and is now being prepared!',
@@ -2225,12 +2236,13 @@ def accept_order(request, order_id):
             )
             
             # Mark the admin's notification as read
-            Notification.objects.filter(
+            marked_read = Notification.objects.filter(
                 user=request.user,
                 order=order,
                 notification_type='new_order',
                 is_read=False
             ).update(is_read=True)
+            adjust_unread(NOTIFICATIONS, request.user.pk, -marked_read)
             
             messages.success(request, f'Order #{order.id} has been accepted and is now being prepared!')
         else:
@@ -2242,7 +2254,7 @@ def accept_order(request, order_id):
 @admin_required
 def admin_activity_log(request):
     """View activity logs with filtering"""
-    logs = ActivityLog.objects.select_related('user').all()
+    logs = filter_activity_logs(ActivityLog.objects.select_related('user'), request.GET)
     
     # Get filter parameters
     action_filter = request.GET.get('action', '')
@@ -2251,30 +2263,11 @@ def admin_activity_log(request):
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
     
-    # Apply filters
-    if action_filter:
-        logs = logs.filter(action=action_filter)
-    
-    if entity_filter:
-        logs = logs.filter(entity_type=entity_filter)
-    
-    if user_filter:
-        logs = logs.filter(user__username__icontains=user_filter)
-    
-    if date_from:
-        logs = logs.filter(created_at__date__gte=date_from)
-    
-    if date_to:
-        logs = logs.filter(created_at__date__lte=date_to)
-    
     # Get unique users for filter dropdown
     users = User.objects.filter(activity_logs__isnull=False).distinct()
     
-    # Pagination (show 50 per page)
-    from django.core.paginator import Paginator
-    paginator = Paginator(logs, 50)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Pagination (show 50 per page), continuing from the last entry shown
+    page_obj = KeysetPaginator(logs, per_page=50, count_limit=1000).get_page(request)
     
     return render(request, 'musubiapp/admin_activity_log.html', {
         'page_obj': page_obj,
@@ -2289,13 +2282,29 @@ def admin_activity_log(request):
         'entity_choices': ActivityLog.ENTITY_TYPES,
     })
 
+# Exports
+@admin_required
+def admin_export(request, dataset):
+    """
+    Stream a list as CSV (?format=csv, the default) or JSON Lines
+    (?format=jsonl), filtered by the same parameters as its page
+    """
+    export = EXPORTS.get(dataset)
+    fmt = request.GET.get('format', 'csv')
+    if export is None or fmt not in FORMATS:
+        raise Http404('No such export')
+    
+    response = StreamingHttpResponse(export.stream(request.GET, fmt), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{dataset}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
+
 # Analytics Report Views
 @admin_required
 def admin_analytics(request):
     """View analytics report with filtering"""
     from datetime import datetime, timedelta
-    from django.db.models import Sum, Count, Avg, F
-    from django.db.models.functions import TruncDate, TruncMonth
+    from django.db.models import Sum, Count, F
+    from django.db.models.functions import TruncMonth
     
     # Get filter parameters
     date_from = request.GET.get('date_from', '')
@@ -2312,30 +2321,34 @@ def admin_analytics(request):
     start_date = datetime.strptime(date_from, '%Y-%m-%d')
     end_date = datetime.strptime(date_to, '%Y-%m-%d')
     
-    # Base querysets with date filter
-    orders = Order.objects.filter(created_at__date__gte=start_date, created_at__date__lte=end_date)
+    # Base querysets with date filter; order and product figures come from
+    # the daily rollup (see musubiapp.rollups)
+    orders = Order.objects.filter(
+        created_at__gte=timezone.make_aware(start_date),
+        created_at__lt=timezone.make_aware(end_date + timedelta(days=1)),
+    )
+    totals = order_totals(start_date.date(), end_date.date())
+    sales = product_sales(start_date.date(), end_date.date())
     
     # Overview Statistics
-    total_orders = orders.count()
-    total_revenue = orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    avg_order_value = orders.aggregate(avg=Avg('total_amount'))['avg'] or 0
+    overview = totals.aggregate(orders=Sum('order_count'), revenue=Sum('sales_amount'))
+    total_orders = overview['orders'] or 0
+    total_revenue = overview['revenue'] or 0
+    avg_order_value = total_revenue / total_orders if total_orders else 0
     
     # Order Status Breakdown
-    status_breakdown = orders.values('status').annotate(count=Count('id')).order_by('status')
+    status_breakdown = totals.values('status').annotate(count=Sum('order_count')).order_by('status')
     
     # Revenue by Date
-    revenue_by_date = orders.annotate(date=TruncDate('created_at')).values('date').annotate(
-        revenue=Sum('total_amount'),
-        orders=Count('id')
+    revenue_by_date = totals.values(date=F('day')).annotate(
+        revenue=Sum('sales_amount'),
+        orders=Sum('order_count')
     ).order_by('date')
     
     # Top Products
-    top_products = OrderItem.objects.filter(
-        order__created_at__date__gte=start_date,
-        order__created_at__date__lte=end_date
-    ).values('product__name').annotate(
+    top_products = sales.values('product__name').annotate(
         quantity_sold=Sum('quantity'),
-        revenue=Sum(F('quantity') * F('price'))
+        revenue=Sum('sales_amount')
     ).order_by('-quantity_sold')[:10]
     
     # Top Customers
@@ -2349,12 +2362,9 @@ def admin_analytics(request):
     ).order_by('-total_spent')[:10]
     
     # Product Category Performance
-    category_performance = OrderItem.objects.filter(
-        order__created_at__date__gte=start_date,
-        order__created_at__date__lte=end_date
-    ).values('product__category').annotate(
+    category_performance = sales.values('category').annotate(
         quantity_sold=Sum('quantity'),
-        revenue=Sum(F('quantity') * F('price'))
+        revenue=Sum('sales_amount')
     ).order_by('-revenue')
     
     # New Customers
@@ -2364,33 +2374,34 @@ def admin_analytics(request):
     ).count()
     
     # Inventory Status
-    total_products = Product.objects.count()
-    out_of_stock = Product.objects.filter(stock=0).count()
-    low_stock = Product.objects.filter(stock__lte=10, stock__gt=0).count()
+    stats = dashboard_stats()
+    total_products = stats['total_products']
+    out_of_stock = stats['out_of_stock']
+    low_stock = stats['low_stock']
     
     # Daily Orders Chart Data
-    daily_orders = orders.annotate(date=TruncDate('created_at')).values('date').annotate(
-        count=Count('id')
+    daily_orders = totals.values(date=F('day')).annotate(
+        count=Sum('order_count')
     ).order_by('date')
     
     # Monthly Revenue (if date range > 60 days)
     date_diff = (end_date - start_date).days
     if date_diff > 60:
-        monthly_revenue = orders.annotate(month=TruncMonth('created_at')).values('month').annotate(
-            revenue=Sum('total_amount'),
-            orders=Count('id')
+        monthly_revenue = totals.annotate(month=TruncMonth('day')).values('month').annotate(
+            revenue=Sum('sales_amount'),
+            orders=Sum('order_count')
         ).order_by('month')
     else:
         monthly_revenue = None
     
     # Calculate growth rates
     previous_start = start_date - timedelta(days=(end_date - start_date).days)
-    previous_orders = Order.objects.filter(
-        created_at__date__gte=previous_start,
-        created_at__date__lt=start_date
+    previous = order_totals(previous_start.date(), start_date.date() - timedelta(days=1)).aggregate(
+        orders=Sum('order_count'),
+        revenue=Sum('sales_amount')
     )
-    previous_revenue = previous_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    previous_order_count = previous_orders.count()
+    previous_revenue = previous['revenue'] or 0
+    previous_order_count = previous['orders'] or 0
     
     if previous_revenue > 0:
         revenue_growth = ((total_revenue - previous_revenue) / previous_revenue) * 100
@@ -2430,7 +2441,7 @@ def admin_analytics(request):
 @login_required
 def add_review(request, product_id):
     product = get_object_or_404(Product, id=product_id)
-    customer = request.user.customer
+    customer = request.customer
     
     # Check if customer has purchased this product
     has_purchased = OrderItem.objects.filter(
@@ -2449,6 +2460,10 @@ def add_review(request, product_id):
             messages.error(request, 'Please fill in all required fields.')
             return redirect('product_detail', product_id=product_id)
         
+        if rating not in ('1', '2', '3', '4', '5'):
+            messages.error(request, 'Please choose a rating from 1 to 5 stars.')
+            return redirect('product_detail', product_id=product_id)
+        
         # Check if user already reviewed this product
         existing_review = Review.objects.filter(
             product=product,
@@ -2459,15 +2474,17 @@ def add_review(request, product_id):
             messages.warning(request, 'You have already reviewed this product.')
             return redirect('product_detail', product_id=product_id)
         
-        review = Review.objects.create(
-            product=product,
-            customer=customer,
-            rating=int(rating),
-            title=title,
-            comment=comment,
-            image=image,
-            is_verified_purchase=has_purchased
-        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                product=product,
+                customer=customer,
+                rating=int(rating),
+                title=title,
+                comment=comment,
+                image=image,
+                is_verified_purchase=has_purchased
+            )
+            count_review(review)
         
         # Log activity
         log_activity(
@@ -2487,7 +2504,7 @@ def add_review(request, product_id):
 @login_required
 def submit_feedback(request):
     if request.method == 'POST':
-        customer = request.user.customer
+        customer = request.customer
         feedback_type = request.POST.get('feedback_type', 'general')
         subject = request.POST.get('subject')
         message_text = request.POST.get('message')
@@ -2520,7 +2537,7 @@ def submit_feedback(request):
 
 @login_required
 def customer_feedback(request):
-    customer = request.user.customer
+    customer = request.customer
     feedbacks = Feedback.objects.filter(customer=customer).order_by('-created_at')
     
     return render(request, 'musubiapp/customer_feedback.html', {
@@ -2540,10 +2557,11 @@ def admin_feedback_list(request):
     if type_filter != 'all':
         feedbacks = feedbacks.filter(feedback_type=type_filter)
     
-    feedbacks = feedbacks.order_by('-created_at')
+    page_obj = KeysetPaginator(feedbacks.select_related('customer__user'), per_page=50).get_page(request)
     
     return render(request, 'musubiapp/admin_feedback_list.html', {
-        'feedbacks': feedbacks,
+        'page_obj': page_obj,
+        'feedbacks': page_obj.object_list,
         'status_filter': status_filter,
         'type_filter': type_filter
     })
@@ -2580,17 +2598,18 @@ def admin_feedback_detail(request, feedback_id):
 
 @admin_required
 def admin_reviews_list(request):
-    reviews = Review.objects.select_related('product', 'customer__user').order_by('-created_at')
+    reviews = Review.objects.select_related('product', 'customer__user')
+    page_obj = KeysetPaginator(reviews, per_page=50).get_page(request)
     
     return render(request, 'musubiapp/admin_reviews_list.html', {
-        'reviews': reviews
+        'page_obj': page_obj,
+        'reviews': page_obj.object_list,
     })
 
 @admin_required
 def admin_review_toggle_approval(request, review_id):
     review = get_object_or_404(Review, id=review_id)
-    review.is_approved = not review.is_approved
-    review.save()
+    set_review_approval(review, not review.is_approved)
     
     status = 'approved' if review.is_approved else 'hidden'
     messages.success(request, f'Review {status} successfully!')
@@ -3,6 +3,10 @@ ASGI config for musubiproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. ``uvicorn musubiproject.asgi:application``)
+to enable the notification badge stream; under WSGI the pages fall back to
+polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -1,6 +1,9 @@
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,10 +33,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'musubiapp.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'musubiapp.middleware.ETagMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'musubiapp.middleware.CustomerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,22 +62,137 @@ TEMPLATES = [
     },
 ]
 
+# Response compression and ETags (musubiapp.middleware)
+# Responses of COMPRESSION_TYPES of at least COMPRESSION_MIN_SIZE bytes are
+# sent gzip-compressed, or with brotli at COMPRESSION_BROTLI_QUALITY (0-11)
+# when the brotli package is installed and the client accepts it. GET
+# responses get a weak ETag, so revisits can be answered with 304 Not
+# Modified. Views decorated with no_transform are left alone.
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_TYPES = [
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+]
+COMPRESSION_BROTLI_QUALITY = 5
+ETAGS_ENABLED = True
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded media is streamed by musubiapp.media_views.serve_media, with or
+# without DEBUG. Set SERVE_MEDIA = False when the web server serves MEDIA_URL.
+# Browsers may reuse a media file for MEDIA_CACHE_MAX_AGE seconds before
+# revalidating it with its ETag.
+SERVE_MEDIA = True
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Uploaded images are also stored as JPEG and WebP copies at these widths,
+# made on a background thread after the upload is saved (inline when
+# IMAGE_DERIVATIVES_ASYNC is off). Run build_image_derivatives to make
+# copies of images uploaded before, or after changing the widths.
+IMAGE_DERIVATIVE_WIDTHS = [320, 480, 640, 960]
+IMAGE_DERIVATIVES_ASYNC = True
+
 WSGI_APPLICATION = 'musubiproject.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
+#
+# Chosen with DB_ENGINE:
+#
+# sqlite (default): DB_NAME, default db.sqlite3. Run manage.py enable_wal
+# once per database file when deploying, after migrate, so readers no
+# longer wait for a writer; SQLite keeps the mode in the file, so it is not
+# set here on every connection, which would rewrite the db.sqlite3 in the
+# repository. Connections to a WAL database use synchronous=NORMAL (see
+# musubiapp/database.py), so a write no longer waits for an fsync. Every
+# connection waits up to DB_BUSY_TIMEOUT ms for the write lock instead of
+# failing, and memory-maps up to DB_MMAP_SIZE bytes of the file.
+# Transactions take the write lock when they begin
+# (IMMEDIATE), so two checkouts that both read before writing queue up
+# rather than one failing with "database is locked".
+#
+# postgres: DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT, with
+# psycopg installed. Connections are kept for DB_CONN_MAX_AGE seconds and
+# checked before reuse. Set DB_POOL=1 (needs psycopg[pool]) to use a pool of
+# DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections per process instead.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # On disk rather than in memory, so the tests lock and wait for
+            # locks as the real database does
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join([
+                    f"PRAGMA busy_timeout={int(os.environ.get('DB_BUSY_TIMEOUT', 5000))}",
+                    f"PRAGMA mmap_size={int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))}",
+                ]),
+            },
+        }
+    }
+elif DB_ENGINE == 'postgres':
+    _db_pool = os.environ.get('DB_POOL', '') not in ('', '0', 'false')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'musubi'),
+            'USER': os.environ.get('DB_USER', 'musubi'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # A pool keeps its own connections; Django must not keep them too
+            'CONN_MAX_AGE': 0 if _db_pool else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                },
+            } if _db_pool else {},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'DB_ENGINE must be sqlite or postgres, not {DB_ENGINE!r}')
+
+
+# Cache
+# Unread counters, the dashboard figures and the product grids of the menu
+# are cached. The default local memory cache is private to each process,
+# so with more than one web or worker process pick a shared backend with
+# CACHE_BACKEND (file, memcached or redis) and point CACHE_LOCATION at the
+# directory or server, e.g. CACHE_BACKEND=redis
+# CACHE_LOCATION=redis://127.0.0.1:6379/1. Memcached needs pymemcache and
+# Redis needs redis-py.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'musubi'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')]
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+        'KEY_PREFIX': 'musubi',
+        'TIMEOUT': 300,
     }
 }
 
+# Seconds a product grid of the home page, menu or search results stays
+# cached. Changing a product, its stock or its reviews shows at once anyway.
+CATALOG_CACHE_TIMEOUT = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -111,13 +232,40 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic stores static files under content-hashed names with .gz
+# (and, with the brotli package installed, .br) copies; see
+# musubiapp.assets. Page styles and scripts are kept in
+# musubiapp/static/musubiapp/pages, not inline in the templates. With DEBUG
+# off, musubiapp.media_views.serve_static sends the collected files, hashed
+# ones with a one-year Cache-Control and the rest for STATIC_CACHE_MAX_AGE
+# seconds. Set SERVE_STATIC = False when the web server serves STATIC_URL.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'musubiapp.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+SERVE_STATIC = True
+STATIC_CACHE_MAX_AGE = 3600
+# Without collectstatic output for a file, {% static %} raises in
+# production; with DEBUG on it links the plain file instead.
+STATIC_MANIFEST_STRICT = not DEBUG
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Add to settings.py
+# CustomerProfileBackend is ModelBackend, but fetches the Customer profile
+# with the user so the role decorators and request.customer need no query.
+# ModelBackend stays listed so sessions started before it keep working;
+# new sign-ins use the first backend, which turns away wrong passwords
+# itself so they are only hashed once.
 AUTHENTICATION_BACKENDS = [
+    'musubiapp.backends.CustomerProfileBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
@@ -128,6 +276,43 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 CART_SESSION_ID = 'cart'
 
+# Activity logging
+# When buffered, log entries are queued in-process and written in batches of
+# up to ACTIVITY_LOG_BUFFER_SIZE, or once the oldest entry is older than
+# ACTIVITY_LOG_FLUSH_INTERVAL seconds. Pending entries are written at exit.
+ACTIVITY_LOG_BUFFERED = False
+ACTIVITY_LOG_BUFFER_SIZE = 100
+ACTIVITY_LOG_FLUSH_INTERVAL = 5.0
+
+# Notification badge stream (Server-Sent Events, needs the ASGI server)
+# Seconds between cache checks for unread count changes, between keepalive
+# comments, and before a stream is closed so the browser reconnects
+NOTIFICATION_STREAM_CHECK_INTERVAL = 1.0
+NOTIFICATION_STREAM_HEARTBEAT = 15.0
+NOTIFICATION_STREAM_LIFETIME = 300.0
+
+# Seconds a cached unread notification/message counter lives before it is
+# recounted from the database. Run reconcile_unread_counts to rebuild them.
+UNREAD_COUNTER_TIMEOUT = 300
+
+# Seconds the admin dashboard counters are cached. Saving an order, product
+# or customer clears them sooner.
+DASHBOARD_STATS_TIMEOUT = 60
+
+# Background jobs (musubiapp.jobs): emails and the side effects of placing
+# an order are queued in the database and run by "python manage.py
+# run_worker", started next to the web server. A job that fails is retried
+# up to JOB_MAX_ATTEMPTS times, JOB_RETRY_DELAY seconds after the first
+# failure and twice as long after each further one, up to
+# JOB_RETRY_MAX_DELAY. A job still running after JOB_LOCK_TIMEOUT seconds is
+# taken to be lost with its worker and run again. With JOBS_RUN_INLINE on,
+# jobs run in the request that queued them instead, with no worker.
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_RETRY_MAX_DELAY = 3600
+JOB_LOCK_TIMEOUT = 600
+JOBS_RUN_INLINE = False
+
 # Email Configuration (Development - Console Backend)
 # For production, configure with actual SMTP settings
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'